@@ -12,16 +12,63 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .task import Task
-from .benchmark import Benchmark, Category, load_benchmark, list_benchmarks
-from .benchmark import get_benchmark_fileinfo, list_benchmark_fileinfo
-from .question import Question, QuestionSource, GroupedQuestion
-from .media import Media
-from .models import LMModel, LMAnswer
-from .enums import TaskType, TaskLevel, FileType, Modality, ScorerType
-from .evaluator import Evaluator
-from .scorers import get_scorer, list_scorers, add_scorer, update_scorer
-from .logger import set_log_level
+import importlib
+from typing import TYPE_CHECKING
+
+# public names are imported on first access (PEP 562) so `import lmeval`
+# doesn't pay for pydantic models construction and heavy dependencies.
+_LAZY_IMPORTS = {
+    "Task": ".task",
+    "Benchmark": ".benchmark",
+    "Category": ".benchmark",
+    "load_benchmark": ".benchmark",
+    "list_benchmarks": ".benchmark",
+    "get_benchmark_fileinfo": ".benchmark",
+    "list_benchmark_fileinfo": ".benchmark",
+    "Question": ".question",
+    "QuestionSource": ".question",
+    "GroupedQuestion": ".question",
+    "Media": ".media",
+    "LMModel": ".models",
+    "LMAnswer": ".models",
+    "TaskType": ".enums",
+    "TaskLevel": ".enums",
+    "FileType": ".enums",
+    "Modality": ".enums",
+    "ScorerType": ".enums",
+    "Evaluator": ".evaluator",
+    "get_scorer": ".scorers",
+    "list_scorers": ".scorers",
+    "add_scorer": ".scorers",
+    "update_scorer": ".scorers",
+    "set_log_level": ".logger",
+}
+
+if TYPE_CHECKING:
+    from .task import Task
+    from .benchmark import Benchmark, Category, load_benchmark, list_benchmarks
+    from .benchmark import get_benchmark_fileinfo, list_benchmark_fileinfo
+    from .question import Question, QuestionSource, GroupedQuestion
+    from .media import Media
+    from .models import LMModel, LMAnswer
+    from .enums import TaskType, TaskLevel, FileType, Modality, ScorerType
+    from .evaluator import Evaluator
+    from .scorers import get_scorer, list_scorers, add_scorer, update_scorer
+    from .logger import set_log_level
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value  # cache it so __getattr__ is only called once
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 
 __all__ = [
     # utils
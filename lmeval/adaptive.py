@@ -0,0 +1,151 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Adaptive sampling: stop evaluating a task once its score is known.
+
+Planned evaluations are executed in a random order so the answers of each
+(model, prompt, task) are an unbiased sample of its questions. A running
+confidence interval of the mean score is kept for each of them and the
+remaining evaluations are skipped once the interval is narrow enough or is
+disjoint from the intervals of all the other models.
+"""
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+import math
+from statistics import NormalDist
+import threading
+
+# (model_idx, prompt_idx, category_idx, task_idx) of a plan
+GroupKey = tuple[int, int, int, int]
+
+
+def group_key(descriptor) -> GroupKey:
+    "Group of a planned `TaskDescriptor`"
+    return (descriptor.model_idx, descriptor.prompt_idx,
+            descriptor.category_idx, descriptor.task_idx)
+
+
+@dataclass(frozen=True)
+class AdaptivePolicy():
+    """Stopping rule of the adaptive sampling mode.
+
+    Intervals are Wilson score intervals of the mean score, which are
+    conservative for scores in [0, 1]. As the rule is checked after every
+    answer, use a higher `confidence` when the intervals must hold
+    strictly.
+
+    Args:
+        margin: Stop once the interval half width is at most this.
+        confidence: Confidence level of the intervals.
+        min_samples: Answers required before a task can stop.
+        separation: Also stop once the interval doesn't overlap the
+        intervals of the other models on the same prompt and task.
+        seed: Seed of the evaluation order.
+    """
+    margin: float = 0.05
+    confidence: float = 0.95
+    min_samples: int = 20
+    separation: bool = True
+    seed: int = 0
+
+    @property
+    def z(self) -> float:
+        return NormalDist().inv_cdf((1 + self.confidence) / 2)
+
+
+def wilson_interval(mean: float, n: int, z: float) -> tuple[float, float]:
+    "Wilson score interval of a mean in [0, 1] estimated from n samples"
+    if n == 0:
+        return 0.0, 1.0
+    p = min(max(mean, 0.0), 1.0)
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+class SequentialEstimator:
+    "Running score intervals and stopping decisions of a plan"
+
+    def __init__(self, policy: AdaptivePolicy):
+        self.policy = policy
+        self._z = policy.z
+        self._lock = threading.Lock()
+        self._count: Counter[GroupKey] = Counter()
+        self._total: defaultdict[GroupKey, float] = defaultdict(float)
+        # (prompt_idx, category_idx, task_idx) -> models evaluated on it
+        self._peers: defaultdict[tuple, set[int]] = defaultdict(set)
+        self.stopped: dict[GroupKey, str] = {}
+        self.skipped: Counter[GroupKey] = Counter()
+
+    def track(self, key: GroupKey) -> None:
+        "Declare a planned group so it is compared with the others"
+        with self._lock:
+            self._peers[key[1:]].add(key[0])
+
+    def add(self, key: GroupKey, score: float) -> None:
+        "Record the score of an answer, errors must not be recorded"
+        with self._lock:
+            self._count[key] += 1
+            self._total[key] += score
+            self._peers[key[1:]].add(key[0])
+
+    def groups(self) -> list[GroupKey]:
+        "Groups with answers or skipped evaluations"
+        return sorted(set(self._count) | set(self.skipped))
+
+    def num_answers(self, key: GroupKey) -> int:
+        return self._count[key]
+
+    def interval(self, key: GroupKey) -> tuple[float, float, float]:
+        "Mean score and its confidence interval bounds"
+        n = self._count[key]
+        mean = self._total[key] / n if n else 0.0
+        low, high = wilson_interval(mean, n, self._z)
+        return mean, low, high
+
+    def should_stop(self, key: GroupKey) -> bool:
+        "True when the remaining evaluations of the group can be skipped"
+        with self._lock:
+            if key in self.stopped:
+                return True
+            reason = self._stop_reason(key)
+            if reason:
+                self.stopped[key] = reason
+            return bool(reason)
+
+    def skip(self, key: GroupKey) -> None:
+        with self._lock:
+            self.skipped[key] += 1
+
+    def _stop_reason(self, key: GroupKey) -> str:
+        if self._count[key] < self.policy.min_samples:
+            return ''
+        _, low, high = self.interval(key)
+        if (high - low) / 2 <= self.policy.margin:
+            return 'margin'
+        if not self.policy.separation:
+            return ''
+        peers = [(model_idx, *key[1:]) for model_idx in self._peers[key[1:]]
+                 if model_idx != key[0]]
+        if not peers:
+            return ''
+        for peer in peers:
+            if self._count[peer] < self.policy.min_samples:
+                return ''
+            _, peer_low, peer_high = self.interval(peer)
+            if peer_low <= high and low <= peer_high:
+                return ''
+        return 'separated'
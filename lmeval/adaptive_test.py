@@ -0,0 +1,114 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from lmeval import Evaluator
+from lmeval.adaptive import AdaptivePolicy, SequentialEstimator, wilson_interval
+from lmeval.fixtures import make_benchmark
+from lmeval.models.mock_model import MockModel
+from lmeval.prompts import QuestionOnlyPrompt
+
+
+def test_wilson_interval():
+    assert wilson_interval(0.0, 0, 1.96) == (0.0, 1.0)
+    low, high = wilson_interval(0.5, 100, 1.96)
+    assert low == pytest.approx(0.404, abs=1e-3)
+    assert high == pytest.approx(0.596, abs=1e-3)
+    low, high = wilson_interval(1.0, 20, 1.96)
+    assert high == 1.0 and 0.8 < low < 0.9
+
+
+def test_estimator_stopping_rules():
+    policy = AdaptivePolicy(margin=0.1, min_samples=10, separation=False)
+    estimator = SequentialEstimator(policy)
+    key = (0, 0, 0, 0)
+    for i in range(60):
+        assert not estimator.should_stop(key)
+        estimator.add(key, i % 2)
+    # half width of a 0.5 mean is below 0.1 after ~96 answers
+    for i in range(40):
+        estimator.add(key, i % 2)
+    assert estimator.should_stop(key) and estimator.stopped[key] == 'margin'
+
+    estimator = SequentialEstimator(AdaptivePolicy(margin=0.01, min_samples=10))
+    good, bad, other = (0, 0, 0, 0), (1, 0, 0, 0), (0, 0, 0, 1)
+    for _ in range(10):
+        estimator.add(good, 1.0)
+        estimator.add(bad, 0.0)
+        estimator.add(other, 1.0)
+    assert estimator.should_stop(good) and estimator.stopped[good] == 'separated'
+    assert estimator.should_stop(bad)
+    # no other model on that task to be separated from
+    assert not estimator.should_stop(other)
+
+
+def test_plan_adaptive_skips_questions():
+    benchmark = make_benchmark(200)
+    questions = benchmark.categories[0].tasks[0].questions
+    prompt = QuestionOnlyPrompt()
+    answers = ' '.join(q.answer for q in questions)
+    good = MockModel(model_version='good', default_response=answers)
+    bad = MockModel(model_version='bad', default_response='zzz')
+    evaluator = Evaluator(benchmark)
+    evaluator.plan([good, bad], prompt, display_report=False,
+                   max_evaluations_per_task=200,
+                   adaptive=AdaptivePolicy(min_samples=20))
+    # random order, not the cheapest first one
+    planned = [d.question_idx for d in evaluator._tasks['good']]
+    assert planned != sorted(planned) and planned != sorted(planned)[::-1]
+    evaluator.execute(chunk_size=4, model_concurrency=1)
+
+    report = evaluator.adaptive_report()
+    for version, expected in (('good', 1.0), ('bad', 0.0)):
+        [entry] = report[version]
+        assert entry['stopped'] == 'separated'
+        assert entry['mean'] == expected
+        assert 20 <= entry['answered'] < 40
+        assert entry['answered'] + entry['skipped'] == 200
+        answered = sum(version in q.lm_answers.get(prompt.version_string(), {})
+                       for q in questions)
+        assert answered == entry['answered']
+
+    # existing answers count toward the estimates
+    evaluator = Evaluator(benchmark)
+    evaluator.plan([good, bad], prompt, display_report=False,
+                   max_evaluations_per_task=200,
+                   adaptive=AdaptivePolicy(min_samples=20))
+    evaluator.execute(chunk_size=4, model_concurrency=1)
+    assert all(entry['answered'] == report[version][0]['answered']
+               for version, [entry] in evaluator.adaptive_report().items())
+
+
+def test_plan_adaptive_samples_whole_task():
+    benchmark = make_benchmark(200)
+    model = MockModel(model_version='mock-1', default_response='a')
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, QuestionOnlyPrompt(), display_report=False,
+                   max_evaluations_per_task=50,
+                   adaptive=AdaptivePolicy(seed=3))
+    planned = sorted(d.question_idx for d in evaluator._tasks['mock-1'])
+    assert len(planned) == 50
+    # the capped sample isn't the first questions of the task
+    assert planned != list(range(50))
+    assert planned[0] < 40 and planned[-1] >= 160
+    assert sum(idx >= 100 for idx in planned) >= 15
+
+    # same seed, same sample
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, QuestionOnlyPrompt(), display_report=False,
+                   max_evaluations_per_task=50,
+                   adaptive=AdaptivePolicy(seed=3))
+    assert sorted(d.question_idx
+                  for d in evaluator._tasks['mock-1']) == planned
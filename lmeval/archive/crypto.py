@@ -12,13 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import tink
-from tink import aead, secret_key_access
+import functools
 
-aead.register()
 
+@functools.cache
+def _aead():
+    "Import and register tink on first use, it is slow to import"
+    from tink import aead
+    aead.register()
+    return aead
+
+@functools.lru_cache(maxsize=8)
 def get_handle(keyset_str: str):
     """Return a tink keyset handle to encrypt and decrypt data"""
+    import tink
+    from tink import secret_key_access
+    aead = _aead()
     kh = tink.json_proto_keyset_format.parse(keyset_str, secret_key_access.TOKEN)
     return kh.primitive(aead.Aead)
 
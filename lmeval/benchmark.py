@@ -13,28 +13,40 @@
 # limitations under the License.
 
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import List
+import json
+from typing import TYPE_CHECKING, List
 
 from lmeval.media import Media
+from lmeval.models.lmmodel import Step
 from lmeval import utils
 from lmeval.archive import SQLiteArchive, FileInfo
 from lmeval.custom_model import CustomModel
 from lmeval.enums import ScorerType, Modality, TaskLevel
 from lmeval.logger import log
 from lmeval.prompts import Prompt
+from lmeval.question import Question
 from lmeval.scorers import get_scorer
 from lmeval.scorers import Scorer
+from lmeval.scorers.scorer import provenance_slot, score_answers, scoring_key
 from lmeval.task import Task
-import pandas as pd
 from pydantic import Field
 from tabulate import tabulate
 from tqdm.auto import tqdm
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from lmeval.scorers.cache import ScoreCache
 
 BENCHMARK_FNAME = "benchmark.json"
 METADATA_FNAME = "metadata.json"
 STATS_FNAME = "stats.json"
+RAW_RESPONSES_FNAME = "raw_responses.json"
+
+# compact answers storage format markers
+COMPACT_FORMAT = "compact"
+STEP_FIELDS = list(Step.model_fields)
 
 # [Categories]
 class Category(CustomModel):
@@ -100,6 +112,30 @@ class Benchmark(CustomModel):
     def __str__(self) -> str:
         return str(self.name)
 
+    def snapshot(self) -> "Benchmark":
+        """Copy-on-write view of the benchmark for background saves.
+
+        Categories, tasks, questions, medias and answers mappings are shallow
+        copied so answers recorded afterward don't show up in the snapshot and
+        saving it doesn't modify this benchmark. Answers, scorers and medias
+        content are shared as they are not modified once recorded.
+        """
+        categories = []
+        for category in self.categories:
+            tasks = []
+            for task in category.tasks:
+                questions = []
+                for question in task.questions:
+                    lm_answers = {prompt_version: dict(answers)
+                                  for prompt_version, answers
+                                  in question.lm_answers.items()}
+                    medias = [media.model_copy() for media in question.medias]
+                    questions.append(question.model_copy(
+                        update={'lm_answers': lm_answers, 'medias': medias}))
+                tasks.append(task.model_copy(update={'questions': questions}))
+            categories.append(category.model_copy(update={'tasks': tasks}))
+        return self.model_copy(update={'categories': categories})
+
     def to_records(self) -> list[dict]:
         "Return benchmark results as a list of records"
         records = []
@@ -140,8 +176,9 @@ class Benchmark(CustomModel):
                             })
         return records
 
-    def to_dataframe(self) -> pd.DataFrame:
+    def to_dataframe(self) -> "pd.DataFrame":
         "Return benchmark results as a DataFrame"
+        import pandas as pd  # slow to import and only needed here
         records = self.to_records()
         return pd.DataFrame(records)
 
@@ -149,8 +186,22 @@ class Benchmark(CustomModel):
              path: str,
              debug: bool = False,
              archive=None,
-             use_tempfile: bool | None = None):
-        "save the benchmark to a file path"
+             use_tempfile: bool | None = None,
+             compact: bool = False,
+             keep_raw_responses: bool = True):
+        """save the benchmark to a file path
+
+        Args:
+            path: Path of the archive, must end with .db.
+            debug: Print debug information.
+            archive: Archive to use. Defaults to a SQLiteArchive at path.
+            use_tempfile: Work on a temporary copy of the archive.
+            compact: Store answers in compact form: models are stored once
+            and referenced by version_string, steps are stored as rows and
+            raw responses are moved to a separately compressed side table.
+            keep_raw_responses: When compact, keep the raw model responses in
+            the side table. Set to False to drop them entirely.
+        """
 
         # FIXME: perform benchmark checks with validate()
         # add it to the evaluator() as well
@@ -238,12 +289,28 @@ class Benchmark(CustomModel):
         archive.write_json(STATS_FNAME, self.get_stats(), encrypted=False)
 
         # serialize the benchmark data
-        archive.write(BENCHMARK_FNAME,
-                      self.model_dump_json().encode(),
-                      encrypted=True,
-                      compress=True,
-                      file_type="json",
-                      modality="data")
+        if compact:
+            data, raw_responses = self._compact_dump(keep_raw_responses)
+            archive.write(BENCHMARK_FNAME,
+                          json.dumps(data).encode(),
+                          encrypted=True,
+                          compress=True,
+                          file_type="json",
+                          modality="data")
+            # raw responses are bulky and rarely read so they live apart
+            archive.write(RAW_RESPONSES_FNAME,
+                          json.dumps(raw_responses).encode(),
+                          encrypted=True,
+                          compress=True,
+                          file_type="json",
+                          modality="data")
+        else:
+            archive.write(BENCHMARK_FNAME,
+                          self.model_dump_json().encode(),
+                          encrypted=True,
+                          compress=True,
+                          file_type="json",
+                          modality="data")
 
         if debug:
             print(f"Saved benchmark to {path}")
@@ -261,6 +328,29 @@ class Benchmark(CustomModel):
                         pb.update(1)
         pb.close()
 
+    def _compact_dump(self, keep_raw_responses: bool = True) -> tuple[dict, dict]:
+        """Serialize the benchmark with deduplicated answers metadata.
+
+        Returns:
+            The compact benchmark data and the raw responses side table keyed
+            by answer path.
+        """
+        data = self.model_dump(mode="json")
+        models = {}
+        raw_responses = {}
+        for cidx, category in enumerate(data['categories']):
+            for tidx, task in enumerate(category['tasks']):
+                for qidx, question in enumerate(task['questions']):
+                    for prompt_version, answers in question['lm_answers'].items():
+                        for model_version, answer in answers.items():
+                            key = f"{cidx}/{tidx}/{qidx}/{prompt_version}/{model_version}"
+                            _compact_answer(answer, key, models, raw_responses,
+                                            keep_raw_responses)
+        data['answers_format'] = COMPACT_FORMAT
+        data['models'] = models
+        data['step_fields'] = STEP_FIELDS
+        return data, raw_responses
+
     def add_category(self, category: Category):
         """Add a category to the benchmark
 
@@ -304,6 +394,107 @@ class Benchmark(CustomModel):
         task = category.get_task(task_name)
         return task
 
+    def rescore(self,
+                scorers: list[Scorer | ScorerType | str] | None = None,
+                tasks: list[str] | None = None,
+                models: list[str] | None = None,
+                prompts: list[str] | None = None,
+                force: bool = False,
+                max_workers: int = 1,
+                batch_size: int = 1000,
+                cache: "ScoreCache | None" = None,
+                path: str | None = None,
+                **save_kwargs) -> dict:
+        """Score the stored answers again without regenerating them.
+
+        Answers are scored in batches with `Scorer.batch_score()`. Each score
+        records its provenance (scorer version, answer and question hashes)
+        in `LMAnswer.score_provenance` and answers whose provenance is
+        unchanged are skipped.
+
+        Args:
+            scorers: Scorers to apply. Defaults to each task scorer and
+            additional scorers. A scorer of the type of the task scorer
+            updates `LMAnswer.score`, the others update
+            `LMAnswer.additional_scores`.
+            tasks: Names of the tasks to rescore, all by default.
+            models: Model version strings to rescore, all by default.
+            prompts: Prompt version strings to rescore, all by default.
+            force: Rescore answers even if their provenance is unchanged.
+            max_workers: Batches are dispatched to that many workers,
+            processes for CPU bound scorers and threads for the others.
+            batch_size: Number of answers per batch.
+            cache: Reuse and store the scores of the cached scorers there,
+            these scorers are run in threads.
+            path: Save the benchmark there if any answer was updated.
+            save_kwargs: Additional `save()` arguments.
+
+        Returns:
+            Number of answers `scored`, `changed` (score differs),
+            `skipped` and `errors` per scorer type.
+        """
+        if scorers is not None:
+            scorers = [s if isinstance(s, Scorer) else get_scorer(s)
+                       for s in scorers]
+        report = defaultdict(lambda: {'scored': 0, 'changed': 0,
+                                      'skipped': 0, 'errors': 0})
+        num_updated = 0
+        for category in self.categories:
+            for task in category.tasks:
+                if tasks is not None and task.name not in tasks:
+                    continue
+                for scorer, main in _task_scorers(task, scorers):
+                    slot = provenance_slot(scorer, main)
+                    stats = report[provenance_slot(scorer)]
+                    version = scorer.version_hash()
+                    todo = []
+                    for question in task.questions:
+                        for prompt_version, answers in question.lm_answers.items():
+                            if prompts is not None and prompt_version not in prompts:
+                                continue
+                            presented = _presented_question(question,
+                                                            prompt_version)
+                            for model_version, answer in answers.items():
+                                if models is not None and model_version not in models:
+                                    continue
+                                key = scoring_key(version, answer, presented)
+                                if not force and answer.score_provenance.get(slot) == key:
+                                    stats['skipped'] += 1
+                                    continue
+                                todo.append((answer, presented, key))
+                    if not todo:
+                        continue
+                    log.info("Rescoring %d answers of task %s with %s",
+                             len(todo), task.name, scorer.name)
+                    for batch, results in _run_rescore(scorer, todo, task,
+                                                       max_workers, batch_size,
+                                                       cache):
+                        if results is None:
+                            stats['errors'] += len(batch)
+                            continue
+                        for (answer, _, key), result in zip(batch, results):
+                            (score, text, sample_scores, sample_raw_data,
+                             raw_data, data) = result
+                            old = (answer.score if main else
+                                   answer.additional_scores.get(scorer.type))
+                            if main:
+                                answer.score = score
+                                answer.answer = text
+                                answer.sample_scores = sample_scores
+                                answer.sample_raw_data = sample_raw_data
+                                answer.score_raw_data = raw_data
+                                answer.additional_data = data
+                            else:
+                                answer.additional_scores[scorer.type] = score
+                            answer.score_provenance[slot] = key
+                            stats['scored'] += 1
+                            stats['changed'] += int(old != score)
+                            num_updated += 1
+
+        if path and num_updated:
+            self.save(path, **save_kwargs)
+        return dict(report)
+
     def get_stats(self):
         models_stats = {}
         categories_stats = {}
@@ -461,6 +652,137 @@ class Benchmark(CustomModel):
                              "Num Punts"]))
 
 
+def _task_scorers(task: Task,
+                  scorers: list[Scorer] | None) -> list[tuple[Scorer, bool]]:
+    "Scorers to rescore a task with and whether they are its main scorer"
+    if scorers is None:
+        return [(task.scorer, True)] + [(s, False)
+                                        for s in task.additional_scorers]
+    return [(s, s.type == task.scorer.type) for s in scorers]
+
+
+def _presented_question(question: Question, prompt_version: str) -> Question:
+    """Question as the prompt presented it to the models.
+
+    Layouts (e.g. multiple choices answer letters) are only cached in
+    `question.prompt_cache`, scorers need them set on the question as
+    `Prompt.layout_question()` does during the evaluation.
+    """
+    layout = question.prompt_cache.get(prompt_version)
+    if not layout:
+        return question
+    return question.model_copy(update=dict(layout))
+
+
+def _rescore_batch(scorer: Scorer, answers: list, questions: list,
+                   task: Task, cache: "ScoreCache | None" = None) -> list[tuple]:
+    """Score a batch of answers, run in the rescoring workers.
+
+    Returns the scores with the answers fields scorers may set so they can
+    be copied back when the batch was scored in another process.
+    """
+    scores = score_answers(scorer, answers, questions, task, cache)
+    return [(score, a.answer, a.sample_scores, a.sample_raw_data,
+             a.score_raw_data, a.additional_data)
+            for score, a in zip(scores, answers)]
+
+
+def _run_rescore(scorer: Scorer, todo: list[tuple], task: Task,
+                 max_workers: int, batch_size: int,
+                 cache: "ScoreCache | None" = None):
+    "Yield each batch of (answer, question, key) with its results or None"
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+    if max_workers <= 1:
+        for batch in batches:
+            try:
+                yield batch, _rescore_batch(scorer, [b[0] for b in batch],
+                                            [b[1] for b in batch], task, cache)
+            except Exception as e:  # pylint: disable=broad-except
+                log.error("Rescoring failed: %s", e)
+                yield batch, None
+        return
+
+    # the cache connection stays in this process
+    if scorer.cpu_bound and not (cache and cache.caches(scorer)):
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        # only send what scorers look at to the workers, models may hold
+        # unpicklable runtime state (locks, clients)
+        light_task = task.model_copy(update={
+            'questions': [], 'additional_scorers': [],
+            'scorer': task.scorer.model_copy(update={'model': None})})
+        light_scorer = scorer.model_copy(update={'model': None})
+
+        def _submit(batch):
+            answers = [a.model_copy(update={'raw_response': {}, 'spans': [],
+                                            'steps': [], 'model': None})
+                       for a, _, _ in batch]
+            questions = [q.model_copy(update={'lm_answers': {}, 'medias': [],
+                                              'prompt_cache': {}})
+                         for _, q, _ in batch]
+            return executor.submit(_rescore_batch, light_scorer, answers,
+                                   questions, light_task)
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        def _submit(batch):
+            return executor.submit(_rescore_batch, scorer,
+                                   [b[0] for b in batch],
+                                   [b[1] for b in batch], task, cache)
+
+    with executor:
+        futures = [(batch, _submit(batch)) for batch in batches]
+        for batch, future in futures:
+            try:
+                yield batch, future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                log.error("Rescoring failed: %s", e)
+                yield batch, None
+
+
+def _compact_answer(answer: dict, key: str, models: dict, raw_responses: dict,
+                    keep_raw_responses: bool = True):
+    "Replace in place the duplicated parts of a serialized answer"
+    model = answer['model']
+    if model is not None:
+        models.setdefault(model['version_string'], model)
+        answer['model'] = model['version_string']
+    answer['steps'] = [[step[f] for f in STEP_FIELDS] for step in answer['steps']]
+    raw = answer.pop('raw_response', None)
+    if raw and keep_raw_responses:
+        raw_responses[key] = raw
+    for idx, sub_answer in enumerate(answer.get('answer_set', [])):
+        _compact_answer(sub_answer, f"{key}/{idx}", models, raw_responses,
+                        keep_raw_responses)
+
+
+def _expand_answer(answer: dict, key: str, models: dict, step_fields: list[str],
+                   raw_responses: dict):
+    "Inverse of _compact_answer()"
+    if answer['model'] is not None:
+        answer['model'] = models[answer['model']]
+    answer['steps'] = [dict(zip(step_fields, row)) for row in answer['steps']]
+    answer['raw_response'] = raw_responses.get(key, {})
+    for idx, sub_answer in enumerate(answer.get('answer_set', [])):
+        _expand_answer(sub_answer, f"{key}/{idx}", models, step_fields,
+                       raw_responses)
+
+
+def _expand_benchmark_data(data: dict, raw_responses: dict) -> dict:
+    "Turn compact benchmark data back into the regular serialization"
+    models = data.pop('models')
+    step_fields = data.pop('step_fields')
+    data.pop('answers_format')
+    for cidx, category in enumerate(data['categories']):
+        for tidx, task in enumerate(category['tasks']):
+            for qidx, question in enumerate(task['questions']):
+                for prompt_version, answers in question['lm_answers'].items():
+                    for model_version, answer in answers.items():
+                        key = f"{cidx}/{tidx}/{qidx}/{prompt_version}/{model_version}"
+                        _expand_answer(answer, key, models, step_fields,
+                                       raw_responses)
+    return data
+
+
 def get_benchmark_fileinfo(path: str) -> list[FileInfo]:
     "Return benchmark files metadata"
     archive = SQLiteArchive(path=path)
@@ -484,7 +806,12 @@ def load_benchmark(path: str, archive = None, use_tempfile: bool | None = None)
         archive = SQLiteArchive(path, use_tempfile=use_tempfile, restore=True)
 
     # reload benchmark data
-    benchmark = Benchmark.model_validate(archive.read_json(BENCHMARK_FNAME))
+    data = archive.read_json(BENCHMARK_FNAME)
+    if data.get('answers_format') == COMPACT_FORMAT:
+        raw = archive.read(RAW_RESPONSES_FNAME)
+        raw_responses = json.loads(raw) if raw else {}
+        data = _expand_benchmark_data(data, raw_responses)
+    benchmark = Benchmark.model_validate(data)
 
     # reload scorers as their compute function are not serializable
     media_to_load = []
@@ -205,4 +205,186 @@ def test_save_load_multimedia_benchmark(tmp_path_factory):
     benchmark3 = load_benchmark(SAVE_PATH)
     assert benchmark.name == benchmark3.name
     assert benchmark3.categories[0].tasks[0].questions[0].question == qtxt
-    assert benchmark3.categories[0].tasks[0].questions[0].medias[0].modality == 'image'
\ No newline at end of file
+    assert benchmark3.categories[0].tasks[0].questions[0].medias[0].modality == 'image'
+
+def test_compact_save_load(tmp_path_factory):
+    bench_dir = tmp_path_factory.mktemp("benchmark_files") / f"{int(time())}"
+    path = (bench_dir / "benchmark_compact.db").as_posix()
+    prompt = QuestionOnlyPrompt()
+    benchmark = Benchmark(name="demo", description="Demo benchmark")
+    category = Category(name="demo_category")
+    benchmark.categories.append(category)
+    task = Task(name="task demo", type=TaskType.boolean, scorer=TextExactSensitive())
+    category.tasks.append(task)
+
+    models = [LMModel(name="demo", publisher='test', version_string=f"demo-{i}")
+              for i in range(2)]
+    source = QuestionSource(name="demo")
+    for i in range(5):
+        question = Question(id=i, source=source, question="Is the sky red?",
+                            answer='no')
+        question.lm_answers[prompt.version_string()] = {
+            m.version_string: m._build_answer(f"no {i}", generation_time=0.5,
+                                              total_tokens=3)
+            for m in models}
+        question.lm_answers[prompt.version_string()][
+            models[0].version_string].raw_response = {'id': i}
+        task.questions.append(question)
+
+    benchmark.save(path, compact=True)
+    benchmark2 = load_benchmark(path)
+    for q1, q2 in zip(task.questions, benchmark2.categories[0].tasks[0].questions):
+        for m in models:
+            a1 = q1.lm_answers[prompt.version_string()][m.version_string]
+            a2 = q2.lm_answers[prompt.version_string()][m.version_string]
+            assert a2.answer == a1.answer
+            assert a2.model.version_string == m.version_string
+            assert a2.steps[0].total_tokens == 3
+            assert a2.raw_response == a1.raw_response
+
+    # dropping raw responses
+    benchmark.save(path, compact=True, keep_raw_responses=False)
+    benchmark3 = load_benchmark(path)
+    answer = benchmark3.categories[0].tasks[0].questions[0].lm_answers[
+        prompt.version_string()][models[0].version_string]
+    assert answer.raw_response == {}
+
+
+@pytest.mark.parametrize('compact', [True, False])
+def test_save_load_answer_without_model(tmp_path_factory, compact):
+    path = (tmp_path_factory.mktemp("no_model") / "benchmark.db").as_posix()
+    benchmark = Benchmark(name="demo")
+    category = Category(name="demo_category")
+    benchmark.categories.append(category)
+    task = Task(name="task demo", type=TaskType.boolean, scorer=TextExactSensitive())
+    category.tasks.append(task)
+    model = LMModel(name="demo", publisher='test', version_string="demo-0")
+    question = Question(id=0, source=QuestionSource(name="demo"),
+                        question="Is the sky red?", answer='no')
+    answer = model._build_answer("", generation_time=0.1, iserror=True,
+                                 error_reason='timeout')
+    answer.model = None
+    question.lm_answers['prompt'] = {
+        'demo-0': answer,
+        'demo-1': model._build_answer("no", generation_time=0.1)}
+    task.questions.append(question)
+
+    benchmark.save(path, compact=compact)
+    answers = load_benchmark(path).categories[0].tasks[0].questions[0].lm_answers[
+        'prompt']
+    assert answers['demo-0'].model is None
+    assert answers['demo-0'].error_reason == 'timeout'
+    assert answers['demo-1'].model.version_string == 'demo-0'
+
+
+def test_rescore(tmp_path_factory):
+    from lmeval import Evaluator
+    from lmeval.fixtures import make_benchmark
+    from lmeval.models.mock_model import MockModel
+
+    benchmark = make_benchmark(4)
+    task = benchmark.categories[0].tasks[0]
+    for question in task.questions:
+        question.source = QuestionSource(name='test')
+    prompt = QuestionOnlyPrompt()
+    model = MockModel(model_version='mock-1', default_response='a1')
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+    evaluator.execute()
+    answers = [q.lm_answers[prompt.version_string()][model.version_string]
+               for q in task.questions]
+    assert [a.score for a in answers] == [0.0, 1.0, 0.0, 0.0]
+
+    # scores recorded by the evaluator are up to date
+    report = benchmark.rescore()
+    assert report['contain_text_insensitive'] == {
+        'scored': 0, 'changed': 0, 'skipped': 4, 'errors': 0}
+
+    # only the edited answer is rescored
+    answers[2].answer = 'a2'
+    report = benchmark.rescore()
+    assert report['contain_text_insensitive']['scored'] == 1
+    assert [a.score for a in answers] == [0.0, 1.0, 1.0, 0.0]
+
+    # new scorer, in a process pool, saved to the archive
+    path = str(tmp_path_factory.mktemp('rescore') / 'bench.db')
+    report = benchmark.rescore(scorers=[ScorerType.text_exact_sensitive],
+                               max_workers=2, batch_size=2, path=path)
+    assert report['text_exact_sensitive'] == {
+        'scored': 4, 'changed': 4, 'skipped': 0, 'errors': 0}
+    loaded = load_benchmark(path)
+    loaded_answers = [
+        q.lm_answers[prompt.version_string()][model.version_string]
+        for q in loaded.categories[0].tasks[0].questions]
+    assert [a.additional_scores['text_exact_sensitive']
+            for a in loaded_answers] == [0.0, 1.0, 1.0, 0.0]
+    report = loaded.rescore(scorers=[ScorerType.text_exact_sensitive])
+    assert report['text_exact_sensitive']['skipped'] == 4
+
+    # scorer configuration changes invalidate the scores
+    task.scorer.regex = 'changed'
+    assert benchmark.rescore(models=['other'])['contain_text_insensitive'][
+        'scored'] == 0
+    assert benchmark.rescore()['contain_text_insensitive']['scored'] == 4
+
+
+def test_rescore_multiple_choices(tmp_path_factory):
+    from lmeval import Evaluator
+    from lmeval.models.mock_model import MockModel
+    from lmeval.prompts import MultiChoicesPrompt
+
+    benchmark = Benchmark(name='mc')
+    category = Category(name='cat')
+    benchmark.add_category(category)
+    task = Task(name='task', type=TaskType.multiple_choices,
+                scorer=get_scorer(ScorerType.contains_answer_letter_insensitive))
+    category.add_task(task)
+    for i in range(8):
+        task.add_question(Question(question=f"q{i}", answer=f"a{i}",
+                                   choices=[f"b{i}", f"c{i}", f"d{i}"],
+                                   source=QuestionSource(name='test')))
+    prompt = MultiChoicesPrompt(use_original_letters=False)
+    model = MockModel(model_version='mock-1', default_response='A')
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+    evaluator.execute()
+    answers = [q.lm_answers[prompt.version_string()][model.version_string]
+               for q in task.questions]
+    scores = [a.score for a in answers]
+    assert 0 < sum(scores) < len(scores)
+
+    # the answer letters come from the prompt layout, not the stored question
+    report = benchmark.rescore()
+    assert report['contains_answer_letter_insensitive']['skipped'] == 8
+    report = benchmark.rescore(force=True)
+    assert report['contains_answer_letter_insensitive']['changed'] == 0
+    assert [a.score for a in answers] == scores
+
+    path = str(tmp_path_factory.mktemp('rescore_mc') / 'bench.db')
+    benchmark.save(path)
+    loaded = load_benchmark(path)
+    report = loaded.rescore(force=True, max_workers=2, batch_size=4)
+    assert report['contains_answer_letter_insensitive'] == {
+        'scored': 8, 'changed': 0, 'skipped': 0, 'errors': 0}
+
+
+def test_rescore_process_pool_unpicklable_model():
+    from lmeval.fixtures import make_benchmark
+    from lmeval.models.mock_model import LoadTestModel
+
+    benchmark = make_benchmark(4)
+    task = benchmark.categories[0].tasks[0]
+    prompt = QuestionOnlyPrompt()
+    # holds a lock, which cannot be pickled
+    model = LoadTestModel(model_version='load')
+    for question in task.questions:
+        answer = model._build_answer(question.answer, generation_time=0.1)
+        question.lm_answers[prompt.version_string()] = {
+            model.version_string: answer}
+    report = benchmark.rescore(scorers=[ScorerType.text_exact_sensitive],
+                               max_workers=2, batch_size=2)
+    assert report['text_exact_sensitive'] == {
+        'scored': 4, 'changed': 4, 'skipped': 0, 'errors': 0}
+    # the stored answers keep their model
+    assert task.questions[0].lm_answers[prompt.version_string()][
+        'load'].model is model
@@ -12,7 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+
 from .benchmark import Benchmark, Category, Task
+from .enums import EventType
+from .events import EvalEvent, EventBus
+from .logger import log
 from .question import Question
 from .models import LMModel, LMAnswer
 from .prompts import Prompt
@@ -53,4 +58,70 @@ class Callback():
     def on_question_end(self, question: Question, answer: LMAnswer,
                         model: LMModel, prompt: Prompt) -> None:
         "Trigger when a question ends"
-        pass
\ No newline at end of file
+        pass
+
+
+class CallbackDispatcher():
+    """Deliver the callback hooks from the events stream thread.
+
+    Hooks are published on the `EventBus` by the evaluation workers and
+    invoked by its consumer thread, so a slow callback never adds latency to
+    the generation. When `max_queue_size` per question hooks are pending,
+    new ones are either dropped or block the workers until there is room
+    depending on the policy. Evaluation start and end hooks are never
+    dropped nor counted.
+    """
+
+    POLICIES = ('drop', 'block')
+
+    def __init__(self,
+                 callback: Callback,
+                 bus: EventBus,
+                 max_queue_size: int = 10000,
+                 policy: str = 'drop') -> None:
+        """
+        Args:
+            callback: User callback receiving the hooks.
+            bus: Events stream delivering the hooks, subscribed to here.
+            max_queue_size: Maximum number of pending hooks.
+            policy: What to do when the queue is full: 'drop' the hook or
+            'block' the worker until the callback catches up.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown policy {policy}, use one of {self.POLICIES}")
+        self.callback = callback
+        self.bus = bus
+        self.policy = policy
+        self.num_dropped = 0
+        # hooks are dispatched concurrently by the workers
+        self._dropped_lock = threading.Lock()
+        # one permit per pending droppable hook
+        self._slots = threading.Semaphore(max_queue_size)
+        bus.subscribe(self, types={EventType.callback})
+
+    def dispatch(self, hook: str, *args, droppable: bool = True) -> None:
+        "Queue a call to the callback `hook` method"
+        if droppable and not self._slots.acquire(
+                blocking=self.policy == 'block'):
+            with self._dropped_lock:
+                self.num_dropped += 1
+            return
+        self.bus.publish(EvalEvent(type=EventType.callback, model='',
+                                   payload=(hook, args, droppable)))
+
+    def __call__(self, events: list[EvalEvent]) -> None:
+        for event in events:
+            hook, args, droppable = event.payload
+            try:
+                getattr(self.callback, hook)(*args)
+            except Exception as e:  # pylint: disable=broad-except
+                log.error(f"callback {hook} failed: {e}")
+            finally:
+                if droppable:
+                    self._slots.release()
+
+    def close(self) -> None:
+        "Report the dropped hooks, call once the events stream is closed"
+        if self.num_dropped:
+            log.warning(f"{self.num_dropped} callback hooks dropped, "
+                        "callback is slower than the evaluation")
@@ -0,0 +1,143 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import pytest
+
+from lmeval import Evaluator
+from lmeval.callback import Callback, CallbackDispatcher
+from lmeval.events import EventBus
+from lmeval.fixtures import make_benchmark
+from lmeval.models.mock_model import MockModel
+from lmeval.prompts import QuestionOnlyPrompt
+
+
+class RecordingCallback(Callback):
+
+    def __init__(self, delay: float = 0) -> None:
+        self.delay = delay
+        self.calls = []
+        self.threads = set()
+
+    def _record(self, name):
+        self.threads.add(threading.get_ident())
+        self.calls.append(name)
+        time.sleep(self.delay)
+
+    def on_evaluation_start(self, model, prompt):
+        self._record('evaluation_start')
+
+    def on_evaluation_end(self, model, prompt):
+        self._record('evaluation_end')
+
+    def on_question_start(self, question, model, prompt):
+        self._record('question_start')
+
+    def on_question_end(self, question, answer, model, prompt):
+        assert answer.answer
+        self._record('question_end')
+
+
+def test_execute_dispatch_callbacks():
+    callback = RecordingCallback()
+    evaluator = Evaluator(make_benchmark(6), callback=callback)
+    evaluator.plan(MockModel(model_version='mock-1', default_response='a'), QuestionOnlyPrompt(),
+                   display_report=False)
+    evaluator.execute(chunk_size=2)
+    assert callback.calls[0] == 'evaluation_start'
+    assert callback.calls[-1] == 'evaluation_end'
+    assert callback.calls.count('question_start') == 6
+    assert callback.calls.count('question_end') == 6
+    assert callback.benchmark is evaluator.benchmark
+    assert threading.get_ident() not in callback.threads
+
+
+def test_dispatcher_drop_policy():
+    callback = RecordingCallback(delay=0.01)
+    bus = EventBus(max_batch_size=1)
+    dispatcher = CallbackDispatcher(callback, bus, max_queue_size=2)
+    bus.start()
+    start = time.time()
+    for _ in range(50):
+        dispatcher.dispatch('on_question_start', None, None, None)
+    # slow callback doesn't stall the producer
+    assert time.time() - start < 0.1
+    dispatcher.dispatch('on_evaluation_end', None, None, droppable=False)
+    bus.close()
+    dispatcher.close()
+    assert dispatcher.num_dropped > 0
+    assert len(callback.calls) + dispatcher.num_dropped == 51
+    assert callback.calls[-1] == 'evaluation_end'
+
+
+def test_dispatcher_concurrent_drops():
+    dispatcher = CallbackDispatcher(RecordingCallback(), EventBus(),
+                                    max_queue_size=1)
+
+    def worker():
+        for _ in range(1000):
+            dispatcher.dispatch('on_question_start', None, None, None)
+
+    # not started: everything past the first hook is dropped
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert dispatcher.num_dropped == 8 * 1000 - 1
+
+
+def test_dispatcher_block_policy():
+    callback = RecordingCallback()
+    bus = EventBus()
+    dispatcher = CallbackDispatcher(callback, bus, max_queue_size=2,
+                                    policy='block')
+    bus.start()
+    for _ in range(20):
+        dispatcher.dispatch('on_question_start', None, None, None)
+    bus.close()
+    dispatcher.close()
+    assert dispatcher.num_dropped == 0
+    assert len(callback.calls) == 20
+
+    with pytest.raises(ValueError):
+        CallbackDispatcher(callback, EventBus(), policy='unknown')
+
+
+def test_dispatcher_shares_event_bus():
+    callback = RecordingCallback()
+    bus = EventBus()
+    received = []
+    bus.subscribe(received.extend)
+    dispatcher = CallbackDispatcher(callback, bus)
+    bus.start()
+    dispatcher.dispatch('on_question_start', None, None, None)
+    bus.close()
+    # hooks are delivered by the bus thread and hidden from other subscribers
+    assert callback.calls == ['question_start']
+    assert received == []
+
+
+def test_execute_slow_callback_block_policy():
+    # workers wait for room outside the checkpoint lock, nothing is dropped
+    callback = RecordingCallback(delay=0.01)
+    evaluator = Evaluator(make_benchmark(8), callback=callback)
+    evaluator.plan(MockModel(model_version='mock-1', default_response='a'),
+                   QuestionOnlyPrompt(), display_report=False)
+    evaluator.execute(chunk_size=1, callback_policy='block',
+                      callback_queue_size=1)
+    assert callback.calls.count('question_end') == 8
+    assert callback.calls[-1] == 'evaluation_end'
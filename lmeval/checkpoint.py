@@ -0,0 +1,100 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections.abc import Callable
+import threading
+import time
+from typing import Any
+
+from .logger import log
+
+
+class CheckpointWriter():
+    """Persist checkpoints from a background thread.
+
+    Workers only request a checkpoint. The writer thread takes the snapshot
+    when it is free and saves it while the evaluation continues, so at most
+    one save is in flight and the requests made during a save are coalesced
+    into the next one.
+    """
+
+    def __init__(self,
+                 snapshot: Callable[[], Any],
+                 save: Callable[[Any], None]) -> None:
+        """
+        Args:
+            snapshot: Returns a consistent copy of the state to persist. Called
+            from the writer thread, it must be cheap as it usually runs under
+            the workers lock.
+            save: Persists a snapshot.
+        """
+        self.snapshot = snapshot
+        self.save = save
+        self.num_saves = 0
+        self.num_coalesced = 0
+        self.save_time = 0.0
+        self.error: Exception | None = None
+        self._pending = False
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._closing = False
+        self._thread = threading.Thread(target=self._run,
+                                        name="lmeval-checkpoint",
+                                        daemon=True)
+        self._thread.start()
+
+    def request(self) -> None:
+        "Ask for a checkpoint, returns immediately"
+        with self._cond:
+            if self._pending:
+                self.num_coalesced += 1
+            self._pending = True
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Write the pending checkpoint and stop the writer thread.
+
+        Raises the error of the last failed save, if any.
+        """
+        if self._thread is not None:
+            with self._cond:
+                self._closing = True
+                self._cond.notify()
+            self._thread.join()
+            self._thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                self._pending = False
+            start = time.time()
+            try:
+                self.save(self.snapshot())
+                self.num_saves += 1
+            except Exception as e:  # pylint: disable=broad-except
+                log.error(f"checkpoint failed: {e}")
+                self.error = e
+            self.save_time += time.time() - start
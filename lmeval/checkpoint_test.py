@@ -0,0 +1,123 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import pytest
+
+from lmeval import Evaluator, QuestionSource, load_benchmark
+from lmeval.checkpoint import CheckpointWriter
+from lmeval.enums import SpanType
+from lmeval.fixtures import make_benchmark
+from lmeval.models.mock_model import MockModel
+from lmeval.prompts import QuestionOnlyPrompt
+
+
+def test_writer_coalesces_requests():
+    release = threading.Event()
+    saved = []
+    counter = iter(range(100))
+
+    def _save(snapshot):
+        release.wait()
+        saved.append(snapshot)
+
+    writer = CheckpointWriter(lambda: next(counter), _save)
+    writer.start()
+    writer.request()
+    # requests made while the first save is in flight become one save
+    for _ in range(5):
+        writer.request()
+    release.set()
+    writer.close()
+    assert writer.num_saves == len(saved) <= 2
+    assert writer.num_coalesced >= 4
+
+
+def test_writer_raises_save_error():
+
+    def _save(_):
+        raise OSError('disk full')
+
+    writer = CheckpointWriter(lambda: None, _save)
+    writer.start()
+    writer.request()
+    with pytest.raises(OSError):
+        writer.close()
+
+
+def test_snapshot_is_isolated():
+    benchmark = make_benchmark(2)
+    model = MockModel(model_version='mock-1', default_response='a')
+    question = benchmark.categories[0].tasks[0].questions[0]
+    question.lm_answers['p'] = {'m1': model._build_answer('a', generation_time=1)}
+
+    snapshot = benchmark.snapshot()
+    question.lm_answers['p']['m2'] = model._build_answer('b', generation_time=1)
+    question.lm_answers['p2'] = {}
+    snap_question = snapshot.categories[0].tasks[0].questions[0]
+    assert list(snap_question.lm_answers) == ['p']
+    assert list(snap_question.lm_answers['p']) == ['m1']
+    assert snap_question.lm_answers['p']['m1'] is question.lm_answers['p']['m1']
+
+
+def test_execute_background_checkpoints(tmp_path):
+    save_path = str(tmp_path / 'bench.db')
+    benchmark = make_benchmark(12)
+    for question in benchmark.categories[0].tasks[0].questions:
+        question.source = QuestionSource(name='test')
+    prompt = QuestionOnlyPrompt()
+    model = MockModel(model_version='mock-1', default_response='a')
+    evaluator = Evaluator(benchmark, save_path=save_path)
+    evaluator.plan(model, prompt, display_report=False)
+    evaluator.execute(save_interval=2, chunk_size=2)
+    assert evaluator.num_saved == evaluator.num_processed == 12
+    loaded = load_benchmark(save_path)
+    for question in loaded.categories[0].tasks[0].questions:
+        assert model.version_string in question.lm_answers[
+            prompt.version_string()]
+
+
+def test_checkpoints_apply_new_answers_only(tmp_path, monkeypatch):
+    benchmark = make_benchmark(12)
+    for question in benchmark.categories[0].tasks[0].questions:
+        question.source = QuestionSource(name='test')
+    prompt = QuestionOnlyPrompt()
+    model = MockModel(model_version='mock-1', default_response='a')
+    evaluator = Evaluator(benchmark, save_path=str(tmp_path / 'bench.db'))
+    evaluator.plan(model, prompt, display_report=False)
+
+    journals = []
+    snapshot = evaluator._checkpoint_snapshot
+
+    def _snapshot():
+        journal, num_processed = snapshot()
+        journals.append(len(journal))
+        return journal, num_processed
+
+    # the full copy is only taken once, when the execution starts
+    monkeypatch.setattr(evaluator, '_checkpoint_snapshot', _snapshot)
+    copies = []
+    monkeypatch.setattr(type(benchmark), 'snapshot',
+                        lambda self: copies.append(self) or
+                        self.model_copy(deep=True))
+    evaluator.execute(save_interval=2, chunk_size=2)
+    assert len(copies) == 1
+    # each answer is handed to the writer at most once
+    assert journals and sum(journals) <= 12
+    assert evaluator._journal is None
+    for question in benchmark.categories[0].tasks[0].questions:
+        answer = question.lm_answers[prompt.version_string()][
+            model.version_string]
+        assert answer.spans[-1].name == SpanType.persist.value
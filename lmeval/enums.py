@@ -21,6 +21,27 @@ class StepType(Enum):
   ranking = "ranking"
   scoring = "scoring"
 
+# [Evaluation events]
+class EventType(Enum):
+  answer = "answer"
+  score = "score"
+  error = "error"
+  punt = "punt"
+  callback = "callback"
+
+# [Tracing]
+class SpanType(Enum):
+  plan = "plan"
+  render = "render"
+  media = "media"
+  queue = "queue"
+  network = "network"
+  first_byte = "first_byte"
+  parse = "parse"
+  punt = "punt"
+  scoring = "scoring"
+  persist = "persist"
+
 # [Benchmark]
 
 class Modality(Enum):
@@ -81,6 +102,9 @@ class ScorerType(Enum):
   meteor = "meteor"
   mauve = "mauve"
 
+  # code scorers
+  python_execution = "python_execution"
+
 
 
 # [question]
@@ -125,4 +149,5 @@ class MultiShotStrategy(Enum):
   single = "single"  # no multi-shot scoring
   average = "average"   # take average score
   max = "max" # take the max score
-  majority = "majority"  # take the majority score
\ No newline at end of file
+  majority = "majority"  # take the majority score
+  pass_at_k = "pass_at_k"  # unbiased pass@k of the samples
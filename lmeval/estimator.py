@@ -0,0 +1,120 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cost and latency estimation used by the evaluation planner."""
+
+from pydantic import Field
+
+from lmeval.custom_model import CustomModel
+from lmeval.enums import StepType
+
+# rough number of characters per token for english text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    "Cheap token count estimate that does not require a tokenizer"
+    if not text:
+        return 0
+    return tokens_from_length(len(text))
+
+
+def tokens_from_length(num_chars: int) -> int:
+    "Token count estimate for a text of the given length"
+    if num_chars <= 0:
+        return 0
+    return max(1, -(-num_chars // CHARS_PER_TOKEN))
+
+
+class ModelProfile(CustomModel):
+    "Historical generation statistics for a given model version"
+    version_string: str
+    num_answers: int = Field(default=0)
+    total_cost: float = Field(default=0.0)
+    total_time: float = Field(default=0.0)
+    total_prompt_tokens: int = Field(default=0)
+    total_completion_tokens: int = Field(default=0)
+
+    def add_step(self, step) -> None:
+        "Account for a generation step"
+        self.num_answers += 1
+        self.total_cost += step.cost
+        self.total_time += step.execution_time
+        self.total_prompt_tokens += step.prompt_tokens
+        self.total_completion_tokens += step.completion_tokens
+
+    @property
+    def has_history(self) -> bool:
+        return self.num_answers > 0
+
+    def rates(self) -> tuple[float, float, float]:
+        "Mean cost, prompt tokens and generation time per answer"
+        if not self.num_answers:
+            return (0.0, 0.0, 0.0)
+        return (self.total_cost / self.num_answers,
+                self.total_prompt_tokens / self.num_answers,
+                self.total_time / self.num_answers)
+
+    def estimate_cost(self, prompt_tokens: int) -> float:
+        "Estimate the cost of an answer for a prompt of the given size"
+        return estimate_cost(self.rates(), prompt_tokens)
+
+    def estimate_duration(self) -> float:
+        "Estimate the generation time (in seconds) of an answer"
+        # latency is dominated by completion length so the prompt size
+        # isn't accounted for
+        return self.rates()[2]
+
+
+def estimate_cost(rates: tuple[float, float, float], prompt_tokens: int) -> float:
+    "Estimate the cost of an answer from a profile `rates()`"
+    mean_cost, mean_prompt_tokens, _ = rates
+    if not mean_prompt_tokens or not prompt_tokens:
+        return mean_cost
+    # scale the mean cost by the relative prompt size
+    return mean_cost * prompt_tokens / mean_prompt_tokens
+
+
+def build_model_profiles(benchmark, model_versions: list[str] | None = None
+                         ) -> dict[str, ModelProfile]:
+    """Collect per model generation statistics from the benchmark answers.
+
+    Args:
+        benchmark: Benchmark to collect the statistics from.
+        model_versions: Restrict the profiles to these model versions.
+
+    Returns:
+        Profiles keyed by model version string.
+    """
+    profiles: dict[str, ModelProfile] = {}
+    if model_versions is not None:
+        for version in model_versions:
+            profiles[version] = ModelProfile(version_string=version)
+
+    for category in benchmark.categories:
+        for task in category.tasks:
+            for question in task.questions:
+                for answers in question.lm_answers.values():
+                    for model_version, answer in answers.items():
+                        if model_version not in profiles:
+                            if model_versions is not None:
+                                continue
+                            profiles[model_version] = ModelProfile(
+                                version_string=model_version)
+                        if answer.iserror:
+                            continue
+                        for step in answer.steps:
+                            if step.type == StepType.lmgeneration.value:
+                                profiles[model_version].add_step(step)
+    return profiles
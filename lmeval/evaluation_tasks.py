@@ -1,16 +1,75 @@
+from dataclasses import dataclass
+import hashlib
+import json
 from typing import Optional
 from pydantic import Field
 
 from lmeval.custom_model import CustomModel
+from lmeval.enums import TaskType
+from lmeval.media import Media
 from lmeval.benchmark import Category
 from lmeval.task import Task
 from lmeval.question import Question, GroupedQuestion
 from lmeval.models import LMAnswer, LMModel
 from lmeval.prompts import Prompt
 from lmeval.scorers import PuntDetector
+from lmeval.tracing import Span
+from lmeval.adaptive import SequentialEstimator
 
 
 
+def media_digest(media: Media) -> str:
+    "Hash of a media content, falls back on its name when not available"
+    content = media.content
+    if not content and media.original_path:
+        try:
+            with open(media.original_path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            content = b""
+    if not content:
+        return f"{media.filename}:{media.size}"
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def input_fingerprint(prompt_input: str,
+                      medias: list[Media] | None = None) -> str:
+    """Hash of the question input sent to the model for a task.
+
+    Generation parameters are left out: they are chosen at execution time
+    and `Evaluator.plan()` can't tell which ones an answer used.
+
+    Args:
+        prompt_input: Rendered prompt, or the JSON messages for completions.
+        medias: Question medias.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(prompt_input.encode())
+    for media in medias or []:
+        h.update(media_digest(media).encode())
+    return h.hexdigest()
+
+
+def question_fingerprint(question: Question, task: Task, prompt: Prompt) -> str:
+    """Fingerprint a question would get if evaluated now with a prompt.
+
+    Mirrors `Evaluator.prepare_task()` rendering so it matches the answers
+    fingerprint when the question, prompt and medias are unchanged.
+    """
+    if task.type == TaskType.grouped_completion.value:
+        return ""
+    if task.type == TaskType.completion.value:
+        messages = question.messages or [{
+            "role": "user",
+            "content": prompt.render(question, task)
+        }]
+        prompt_input = json.dumps(messages)
+    else:
+        prompt_input = prompt.render_layout(prompt.layout_question(question),
+                                            task)
+    return input_fingerprint(prompt_input, question.medias)
+
+
 class EvalTask(CustomModel):  #  Generic[M, P]):
     benchmark_name: str  # needed to propagate it to the models
     question: Question
@@ -29,6 +88,12 @@ class EvalTask(CustomModel):  #  Generic[M, P]):
     punted: bool = Field(default=False)
     error: bool = Field(default=False)
 
+    # stages timing recorded before the answer exists
+    spans: list[Span] = Field(default_factory=list)
+
+    # hash of the model input, see input_fingerprint()
+    fingerprint: str = Field(default="")
+
     def __str__(self) -> str:
         return f"{self.lm_model.version_string}:{self.prompt.name} {self.category.name} / {self.task.name} / {self.question.id}"
 
@@ -39,3 +104,42 @@ class CompletionEvalTask(EvalTask):
 
 class GroupedCompletionEvalTask(EvalTask):
     question: GroupedQuestion
+
+
+@dataclass(frozen=True, slots=True)
+class TaskDescriptor:
+    """Compact, validation free reference to a planned evaluation.
+
+    Indices point into the benchmark categories, tasks and questions and
+    into the models and prompts of the plan they belong to. The `EvalTask`
+    is only materialized when the evaluation is executed.
+    """
+    plan_idx: int
+    category_idx: int
+    task_idx: int
+    question_idx: int
+    prompt_idx: int
+    model_idx: int
+    prompt_tokens: int = 0
+    planned_at: float = 0.0
+
+    def to_tuple(self) -> tuple:
+        "Plain tuple representation, e.g. to send it across processes"
+        return (self.plan_idx, self.category_idx, self.task_idx,
+                self.question_idx, self.prompt_idx, self.model_idx,
+                self.prompt_tokens, self.planned_at)
+
+    @classmethod
+    def from_tuple(cls, data: tuple | list) -> "TaskDescriptor":
+        return cls(*data)
+
+
+@dataclass(slots=True)
+class PlanContext:
+    "Models, prompts and punt detector of an `Evaluator.plan()` call"
+    models: list[LMModel]
+    prompts: list[Prompt]
+    punt_detector: Optional[PuntDetector]
+    started_at: float
+    # set when the plan uses adaptive sampling
+    adaptive: Optional[SequentialEstimator] = None
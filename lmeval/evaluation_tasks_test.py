@@ -0,0 +1,59 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+
+import pytest
+
+from lmeval import Evaluator
+from lmeval.evaluation_tasks import EvalTask, TaskDescriptor
+from lmeval.fixtures import make_benchmark
+from lmeval.models.mock_model import MockModel
+from lmeval.prompts import QuestionOnlyPrompt
+
+
+def test_descriptor_serialization():
+    descriptor = TaskDescriptor(0, 1, 2, 3, 4, 5, prompt_tokens=42,
+                                planned_at=1.5)
+    assert TaskDescriptor.from_tuple(descriptor.to_tuple()) == descriptor
+    assert pickle.loads(pickle.dumps(descriptor)) == descriptor
+    # slotted and immutable
+    assert not hasattr(descriptor, '__dict__')
+    with pytest.raises(AttributeError):
+        descriptor.question_idx = 0
+
+
+def test_plan_queues_descriptors():
+    benchmark = make_benchmark(4)
+    prompt = QuestionOnlyPrompt()
+    models = [MockModel(model_version=f'mock-{i}') for i in range(2)]
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(models, prompt, display_report=False)
+    evaluator.plan(MockModel(model_version='mock-2'), prompt,
+                   display_report=False)
+
+    questions = benchmark.categories[0].tasks[0].questions
+    for model_idx, version in enumerate(['mock-0', 'mock-1', 'mock-2']):
+        descriptors = evaluator._tasks[version]
+        assert len(descriptors) == 4
+        for descriptor in descriptors:
+            assert isinstance(descriptor, TaskDescriptor)
+            etask = evaluator.materialize(descriptor)
+            assert isinstance(etask, EvalTask)
+            assert etask.lm_model.version_string == version
+            assert etask.prompt is prompt
+            assert etask.question is questions[descriptor.question_idx]
+            assert etask.spans[0].name == 'plan'
+    # each plan() call keeps its own models
+    assert [d.plan_idx for d in evaluator._tasks['mock-2']] == [1] * 4
@@ -16,12 +16,13 @@ from enum import Enum
 import json
 from pydantic import Field, BaseModel
 from tabulate import tabulate
-from collections import defaultdict, deque
-from tqdm.auto import tqdm
+from collections import Counter, defaultdict, deque
+from collections.abc import Generator
 from typing import TypeVar, Generic, Optional
 import concurrent.futures
 import functools
 import lmeval
+import random
 import threading
 import time
 import traceback
@@ -29,14 +30,24 @@ import traceback
 from lmeval import utils
 from lmeval.logger import log
 from lmeval.models import LMAnswer, LMModel
+from lmeval.models.batch import BATCH_ENDPOINT, BatchBackend, TERMINAL_STATUSES, read_jsonl, write_jsonl
 from lmeval.scorers import PuntDetector
+from lmeval.scorers.cache import ScoreCache
+from lmeval.scorers.scorer import cached_batch_score, provenance_slot, score_answers, scoring_key
 from lmeval.question import GroupedQuestion, Question
 from lmeval.task import Task
-from lmeval.benchmark import Benchmark, load_benchmark
+from lmeval.benchmark import Benchmark, Category, load_benchmark
 from lmeval.prompts import Prompt
-from lmeval.callback import Callback
-from lmeval.enums import TaskType
-from lmeval.evaluation_tasks import CompletionEvalTask, GroupedCompletionEvalTask, EvalTask
+from lmeval.callback import Callback, CallbackDispatcher
+from lmeval.adaptive import AdaptivePolicy, SequentialEstimator, group_key
+from lmeval.checkpoint import CheckpointWriter
+from lmeval.estimator import ModelProfile, build_model_profiles
+from lmeval.planner import Candidate, RetryPolicy, build_partitions, needs_retry, plan_candidates
+from lmeval.scheduler import Scheduler, concurrency_caps, requests_in_flight
+from lmeval.tracing import Span, trace_span
+from lmeval.enums import EventType, SpanType, TaskType
+from lmeval.events import EvalEvent, EventBus, MetricsSubscriber, ProgressSubscriber, Subscriber
+from lmeval.evaluation_tasks import CompletionEvalTask, GroupedCompletionEvalTask, EvalTask, PlanContext, TaskDescriptor, input_fingerprint
 
 # generic type
 P = TypeVar('P', bound='Prompt')
@@ -46,6 +57,8 @@ M = TypeVar('M', bound='LMModel')
 class AnswerStatus(Enum):
     existing = 0
     planned = 1
+    candidate = 2
+    over_budget = 3
 
 
 class Evaluator():
@@ -63,9 +76,20 @@ class Evaluator():
                  benchmark: str | Benchmark,
                  save_path: str = "",
                  callback: Callback | None = None,
-                 use_tempfile: bool | None = None) -> None:
-        "Instantiate the evaluator system for a given benchmark"  # fix docstring
+                 use_tempfile: bool | None = None,
+                 score_cache: ScoreCache | None = None) -> None:
+        """Instantiate the evaluator system for a given benchmark
+
+        Args:
+            benchmark: Benchmark or path of the benchmark to evaluate.
+            save_path: Where the benchmark is saved with the answers.
+            callback: Evaluation hooks.
+            use_tempfile: Work on a temporary copy of the archives.
+            score_cache: Reuse the scores of expensive scorers, including
+            the punt detector, across runs.
+        """
         self.save_path = save_path
+        self.score_cache = score_cache
         if not self.save_path:
             print("Warning: save_path is not set, results will not be saved.")
 
@@ -91,25 +115,154 @@ class Evaluator():
         self.benchmark_stats = self.benchmark.get_stats()
 
         # tasks queues - grouped by model so we can parallelize
-        self._tasks: dict[str, deque[EvalTask]] = defaultdict(deque)
+        self._tasks: dict[str, deque[TaskDescriptor]] = defaultdict(deque)
+        self._plans: list[PlanContext] = []
+        # scheduling settings the plan durations were estimated for
+        self._chunk_size = 16
+        self._model_concurrency: int | dict[str, int] = 4
 
         # lock for update shared values
         self._checkpoint_lock = threading.Lock()
         self.num_processed = 0
         self.num_saved = 0
+        self._checkpoint_at = 0
+        # answers stored since the last checkpoint and the copy of the
+        # benchmark they are applied to by the checkpoint writer
+        self._journal: list[tuple[str, str, int, str, str, LMAnswer]] | None = None
+        self._checkpoint_copy: Benchmark | None = None
+
+        # events stream consumers, active only during execute()
+        self._subscribers: list[Subscriber] = []
+        self._bus: EventBus | None = None
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """Receive the evaluation events emitted during execute().
+
+        Args:
+            subscriber: Callable receiving batches of `EvalEvent`. It is
+            called from the events thread, never from the workers.
+        """
+        self._subscribers.append(subscriber)
+
+    def _publish_answer_events(self, model_name: str, prompt_ver: str,
+                               etask: EvalTask) -> None:
+        "Emit the events describing an answer outcome"
+        if self._bus is None:
+            return
+        answer = etask.lm_answer
+        common = dict(model=model_name,
+                      prompt=prompt_ver,
+                      category=etask.category.name,
+                      task=etask.task.name,
+                      question_id=etask.question.id)
+        latency = sum(step.execution_time for step in answer.steps)
+        self._bus.publish(EvalEvent(type=EventType.answer,
+                                    latency=latency,
+                                    **common))
+        if answer.iserror:
+            self._bus.publish(EvalEvent(type=EventType.error, **common))
+        if answer.ispunting:
+            self._bus.publish(EvalEvent(type=EventType.punt, **common))
+        else:
+            self._bus.publish(EvalEvent(type=EventType.score,
+                                        score=answer.score,
+                                        **common))
+
+    def materialize(self, descriptor: TaskDescriptor) -> EvalTask:
+        """Create the evaluation task of a planned evaluation.
+
+        Tasks are constructed without validation as their content comes
+        from the benchmark and the plan.
+        """
+        ctx = self._plans[descriptor.plan_idx]
+        category = self.benchmark.categories[descriptor.category_idx]
+        task = category.tasks[descriptor.task_idx]
+        question = task.questions[descriptor.question_idx]
+        fields = dict(benchmark_name=self.benchmark.name,
+                      question=question,
+                      category=category,
+                      task=task,
+                      lm_model=ctx.models[descriptor.model_idx],
+                      lm_answer=None,
+                      prompt=ctx.prompts[descriptor.prompt_idx],
+                      punt_detector=ctx.punt_detector,
+                      spans=[Span(name=SpanType.plan, start=ctx.started_at,
+                                  end=descriptor.planned_at)])
+        if task.type == TaskType.completion.value:
+            return CompletionEvalTask.model_construct(
+                messages=question.messages, **fields)
+        elif task.type == TaskType.grouped_completion.value:
+            assert isinstance(
+                question, GroupedQuestion
+            ), "Grouped completion tasks should have a GroupedQuestion"
+            return GroupedCompletionEvalTask.model_construct(**fields)
+        return EvalTask.model_construct(**fields)
 
     def plan(self,
              models: M | list[M],
              prompts: P | list[P],
              punt_detector: PuntDetector | None = None,
              max_evaluations_per_task: int = 100,
-             display_report: bool = True):
+             display_report: bool = True,
+             max_cost: float | None = None,
+             max_duration: float | None = None,
+             profiles: dict[str, ModelProfile] | None = None,
+             plan_workers: int | None = None,
+             refresh_stale: bool = True,
+             retry: RetryPolicy | None = None,
+             adaptive: AdaptivePolicy | None = None,
+             chunk_size: int = 16,
+             model_concurrency: int | dict[str, int] = 4):
+        """Plan the evaluations that need to be performed.
+
+        Each planned evaluation gets a prompt tokens estimate computed from
+        the prompt length and a cost and duration estimate derived from the
+        historical steps stored in the benchmark for the same model. Planned
+        evaluations are ordered so the cheapest ones are executed first.
+        Prompts are rendered at execution time.
+
+        Args:
+            models: Models to evaluate.
+            prompts: Prompts to use, only those matching the task type are used.
+            punt_detector: Optional punt detector applied to answers.
+            max_evaluations_per_task: Cap on the evaluations per task, prompt and model.
+            display_report: Print the planning report.
+            max_cost: Total cost budget for the planned evaluations.
+            max_duration: Per model wall-clock budget in seconds. Models
+            are executed concurrently so this is also the run budget.
+            profiles: Override the historical profiles keyed by model version.
+            plan_workers: Number of planning processes, by default large
+            plans are partitioned across all CPUs. 1 plans in process.
+            refresh_stale: Evaluate again the answers whose input (rendered
+            prompt and medias) changed since they were generated, detected
+            using the answers fingerprint.
+            retry: Retry mode, only plan the errored and empty answers that
+            are due for another attempt according to the policy. The failed
+            attempts are kept in the new answers steps.
+            adaptive: Adaptive sampling mode, the planned evaluations are
+            executed in a random order, `max_evaluations_per_task` capped
+            tasks are sampled at random, and the remaining ones of a (model,
+            prompt, task) are skipped once its score is estimated within the
+            policy margin or separated from the other models scores. Existing
+            answers count toward the estimates. See `adaptive_report()`.
+            chunk_size: Tasks sent at once to a model, also the default of
+            `execute()`. Used with `model_concurrency` to estimate how many
+            requests run concurrently against `max_duration`.
+            model_concurrency: Maximum number of chunks in flight per model,
+            either for all models or keyed by model version. Also the
+            default of `execute()`.
+
+        Returns:
+            The planning report.
+        """
 
         # stats
         total_evaluations = 0
         # category -> tasks -> prompt -> count
         stats = defaultdict(lambda: defaultdict(lambda: defaultdict(
             lambda: defaultdict(lambda: defaultdict(int)))))
+        estimates = defaultdict(lambda: defaultdict(lambda: defaultdict(
+            lambda: defaultdict(lambda: defaultdict(float)))))
 
         # track potential issues - e.g no prompt for a task type
         track_task_prompts: dict[Task, set[str]] = {}
@@ -129,96 +282,104 @@ class Evaluator():
             models_list
         ), f"Models should have unique version strings - found {len(models_list)} models and {len(versions)} unique version strings"
 
-        # plan the evaluations
+        # historical cost and latency per model
+        model_profiles = build_model_profiles(self.benchmark, list(versions))
+        if profiles:
+            model_profiles.update(profiles)
+
+        # candidates evaluations are planned from the answers index without
+        # rendering prompts, the planned ones are queued as TaskDescriptor
+        plan_idx = len(self._plans)
+        self._plans.append(PlanContext(models=models_list,
+                                       prompts=prompts_list,
+                                       punt_detector=punt_detector,
+                                       started_at=time.time()))
+        model_versions = [model.version_string for model in models_list]
         for category in self.benchmark.categories:
             for task in category.tasks:
                 track_task_prompts[task] = set()
+        partitions = build_partitions(self.benchmark, prompts_list,
+                                      refresh_stale=refresh_stale,
+                                      retry=retry,
+                                      model_versions=model_versions)
+        results = plan_candidates(partitions, model_versions, model_profiles,
+                                  max_evaluations_per_task,
+                                  max_workers=plan_workers,
+                                  seed=adaptive.seed if adaptive else None)
 
-                for question in task.questions:
-                    for prompt in prompts_list:
-                        PROMT_VER = prompt.version_string()
-                        # skip if prompt type does not match task type
-                        if prompt.task_type != task.type:
-                            continue
-                        instanciated_prompt = prompt.render(question, task)
-
-                        for model in models_list:
-                            # form question->prompt->model->answer
-
-                            # skip running questions that are already answered
-                            MODEL_VER = model.version_string
-
-                            # check if the answer already exists
-                            if PROMT_VER in question.lm_answers and MODEL_VER in question.lm_answers[
-                                    PROMT_VER]:
-                                # Already existing results
-                                stats[category.name][task.name][PROMT_VER][
-                                    MODEL_VER][AnswerStatus.existing] += 1
-                                continue
-
-                            # create evaluation task and queue it
-                            if task.type == TaskType.completion.value:
-                                evaltask = CompletionEvalTask(
-                                    benchmark_name=self.benchmark.name,
-                                    question=question,
-                                    category=category,
-                                    task=task,
-                                    lm_model=model,
-                                    lm_answer=None,
-                                    prompt=prompt,
-                                    messages=question.messages,
-                                    tools=question.tools,
-                                    punt_detector=punt_detector,
-                                )
-                            elif task.type == TaskType.grouped_completion.value:
-                                assert isinstance(
-                                    question, GroupedQuestion
-                                ), "Grouped completion tasks should have a GroupedQuestion"
-
-                                evaltask = GroupedCompletionEvalTask(
-                                    benchmark_name=self.benchmark.name,
-                                    question=question,
-                                    category=category,
-                                    task=task,
-                                    lm_model=model,
-                                    lm_answer=None,
-                                    prompt=prompt,
-                                    punt_detector=punt_detector,
-                                )
-                            else:
-                                evaltask = EvalTask(
-                                    benchmark_name=self.benchmark.name,
-                                    question=question,
-                                    category=category,
-                                    task=task,
-                                    lm_model=model,
-                                    lm_answer=None,
-                                    prompt=prompt,
-                                    messages=question.messages,
-                                    tools=question.tools,
-                                    punt_detector=punt_detector,
-                                )
-
-                            # allows to cap the number of evaluations per task
-                            if stats[category.name][
-                                    task.name][PROMT_VER][MODEL_VER][
-                                        AnswerStatus.
-                                        planned] >= max_evaluations_per_task:
-                                log.debug(
-                                    f"Reached max evaluations for task {task.name}, skipping the rest."
-                                )
-                                break
-
-                            self._tasks[MODEL_VER].append(evaltask)
-
-                            # tracking variables for potential errors
-                            track_task_prompts[task].add(
-                                prompt.version_string())
-
-                            # stats
-                            stats[category.name][task.name][PROMT_VER][
-                                MODEL_VER][AnswerStatus.planned] += 1
-                            total_evaluations += 1
+        candidates: list[Candidate] = []
+        for partition, (part_candidates, existing) in zip(partitions, results):
+            category = self.benchmark.categories[partition.category_idx]
+            task = category.tasks[partition.task_idx]
+            PROMT_VER = prompts_list[partition.prompt_idx].version_string()
+            num_candidates = Counter(c[7] for c in part_candidates)
+            for model_idx, MODEL_VER in enumerate(model_versions):
+                if existing[model_idx] or num_candidates[model_idx]:
+                    mstats = stats[category.name][task.name][PROMT_VER][
+                        MODEL_VER]
+                    mstats[AnswerStatus.existing] += existing[model_idx]
+                    mstats[AnswerStatus.candidate] += num_candidates[model_idx]
+            if part_candidates:
+                # tracking variables for potential errors
+                track_task_prompts[task].add(PROMT_VER)
+            candidates.extend(part_candidates)
+
+        # budgets are enforced cheapest first, ties in benchmark order
+        candidates.sort()
+        if adaptive:
+            # random order so each task answers are an unbiased sample
+            random.Random(adaptive.seed).shuffle(candidates)
+            self._plans[plan_idx].adaptive = self._seed_estimator(
+                adaptive, partitions, prompts_list, model_versions)
+        if max_cost is not None or max_duration is not None:
+            for version in versions:
+                if not model_profiles[version].has_history:
+                    log.warning(
+                        f"No history for model {version}, its cost and duration can't be estimated"
+                    )
+
+        # same concurrency as the execution scheduler: chunks in flight
+        # times the requests a model runs at once for a chunk
+        self._chunk_size = chunk_size
+        self._model_concurrency = model_concurrency
+        caps = concurrency_caps(model_versions, model_concurrency)
+        concurrencies = [
+            requests_in_flight(caps[version], chunk_size,
+                               model.runtime_vars.get('max_workers') or 1)
+            for version, model in zip(model_versions, models_list)]
+        prompt_versions = [prompt.version_string() for prompt in prompts_list]
+        total_cost = 0.0
+        model_durations = defaultdict(float)
+        for (cost, duration, prompt_tokens, category_idx, task_idx,
+             question_idx, prompt_idx, model_idx) in candidates:
+            category = self.benchmark.categories[category_idx]
+            MODEL_VER = model_versions[model_idx]
+            PROMT_VER = prompt_versions[prompt_idx]
+            cat_name = category.name
+            task_name = category.tasks[task_idx].name
+
+            duration = duration / concurrencies[model_idx]
+            if ((max_cost is not None and total_cost + cost > max_cost)
+                    or (max_duration is not None and
+                        model_durations[MODEL_VER] + duration > max_duration)):
+                stats[cat_name][task_name][PROMT_VER][MODEL_VER][
+                    AnswerStatus.over_budget] += 1
+                continue
+            total_cost += cost
+            model_durations[MODEL_VER] += duration
+
+            self._tasks[MODEL_VER].append(TaskDescriptor(
+                plan_idx, category_idx, task_idx, question_idx, prompt_idx,
+                model_idx, prompt_tokens, time.time()))
+
+            # stats
+            stats[cat_name][task_name][PROMT_VER][MODEL_VER][
+                AnswerStatus.planned] += 1
+            est = estimates[cat_name][task_name][PROMT_VER][MODEL_VER]
+            est['tokens'] += prompt_tokens
+            est['cost'] += cost
+            est['duration'] += duration
+            total_evaluations += 1
 
         # find potential issues
         for tsk, plist in track_task_prompts.items():
@@ -234,12 +395,17 @@ class Evaluator():
             for task, tdata in cdata.items():
                 for model, mdata in tdata.items():
                     for prompt, pdata in mdata.items():
+                        edata = estimates[cat][task][model][prompt]
                         rows.append([
                             cat, task, model, prompt,
                             pdata[AnswerStatus.planned],
                             pdata[AnswerStatus.existing],
                             pdata[AnswerStatus.planned] +
-                            pdata[AnswerStatus.existing]
+                            pdata[AnswerStatus.existing],
+                            pdata[AnswerStatus.over_budget],
+                            int(edata['tokens']),
+                            round(edata['cost'], 4),
+                            round(edata['duration'], 1)
                         ])
                         report[model].append({
                             "category":
@@ -251,7 +417,15 @@ class Evaluator():
                             "planned":
                             pdata[AnswerStatus.planned],
                             "existing":
-                            pdata[AnswerStatus.existing]
+                            pdata[AnswerStatus.existing],
+                            "over_budget":
+                            pdata[AnswerStatus.over_budget],
+                            "estimated_tokens":
+                            int(edata['tokens']),
+                            "estimated_cost":
+                            edata['cost'],
+                            "estimated_duration":
+                            edata['duration']
                         })
 
         if not display_report:
@@ -261,165 +435,523 @@ class Evaluator():
         print(f"|-Models to evaluate: {len(models_list)}")
         print(f"|-Prompts to evaluate: {len(prompts_list)}")
         print(f"|-Total evaluations to perform: {total_evaluations}")
+        print(f"|-Estimated cost: {total_cost:.4f}")
+        print(f"|-Estimated duration: {max(model_durations.values(), default=0):.1f}s")
         print('\n')
         print(
             tabulate(rows,
                      headers=[
                          "Category", "Task", "Prompt", "Model", "Planned",
-                         "Existing", "Expected Total"
+                         "Existing", "Expected Total", "Over Budget",
+                         "Est. Tokens", "Est. Cost", "Est. Duration"
                      ]))
         return report
 
+    def _seed_estimator(self, policy: AdaptivePolicy,
+                        partitions: list, prompts: list[Prompt],
+                        model_versions: list[str]) -> SequentialEstimator:
+        "Estimator of an adaptive plan, starting from the existing answers"
+        estimator = SequentialEstimator(policy)
+        for partition in partitions:
+            task = self.benchmark.categories[partition.category_idx].tasks[
+                partition.task_idx]
+            prompt_ver = prompts[partition.prompt_idx].version_string()
+            for model_idx, model_ver in enumerate(model_versions):
+                key = (model_idx, partition.prompt_idx,
+                       partition.category_idx, partition.task_idx)
+                estimator.track(key)
+                for question in task.questions:
+                    answer = question.lm_answers.get(prompt_ver, {}).get(
+                        model_ver)
+                    if answer is not None and not answer.iserror:
+                        estimator.add(key, answer.score)
+        return estimator
+
+    def adaptive_report(self) -> dict[str, list[dict]]:
+        """Estimated scores of the adaptive plans.
+
+        Returns:
+            For each model version, the answered and skipped evaluations
+            count, the mean score with its confidence interval and the
+            reason the evaluation stopped (`margin`, `separated` or empty)
+            of each prompt and task.
+        """
+        report = defaultdict(list)
+        for ctx in self._plans:
+            estimator = ctx.adaptive
+            if estimator is None:
+                continue
+            for key in estimator.groups():
+                model_idx, prompt_idx, category_idx, task_idx = key
+                category = self.benchmark.categories[category_idx]
+                mean, low, high = estimator.interval(key)
+                report[ctx.models[model_idx].version_string].append({
+                    "category": category.name,
+                    "task": category.tasks[task_idx].name,
+                    "prompt": ctx.prompts[prompt_idx].version_string(),
+                    "answered": estimator.num_answers(key),
+                    "skipped": estimator.skipped[key],
+                    "mean": mean,
+                    "low": low,
+                    "high": high,
+                    "stopped": estimator.stopped.get(key, ''),
+                })
+        return dict(report)
+
     def execute(self,
                 save_interval: int = 100,
-                use_tempfile: bool | None = None) -> Benchmark:
-        """Execute the evaluation plan"""
-        num_models = len(self._tasks)  # dict[model_name, deque[EvalTask]]
+                use_tempfile: bool | None = None,
+                compact: bool = False,
+                max_workers: int | None = None,
+                chunk_size: int | None = None,
+                model_concurrency: int | dict[str, int] | None = None,
+                metrics_path: str | None = None,
+                callback_policy: str = 'drop',
+                callback_queue_size: int = 10000) -> Benchmark:
+        """Execute the evaluation plan
+
+        The tasks of all the models are multiplexed on a shared worker pool
+        so fast models are not waiting on slow ones.
+
+        Args:
+            save_interval: Number of answers between checkpoints.
+            use_tempfile: Work on a temporary copy of the archive.
+            compact: Save the benchmark using the compact answers format.
+            max_workers: Size of the shared worker pool. Defaults to the sum
+            of the models concurrency.
+            chunk_size: Number of tasks sent at once to a model
+            batch_execute(). Defaults to the one given to `plan()`.
+            model_concurrency: Maximum number of chunks in flight per model,
+            either for all models or keyed by model version. Defaults to the
+            one given to `plan()`.
+            metrics_path: Export the throughput metrics to this path at the
+            end of the run, in Prometheus text format for .prom and .txt files
+            and in JSON otherwise.
+            callback_policy: When the callback can't keep up, either 'drop'
+            the question hooks or 'block' the workers.
+            callback_queue_size: Maximum number of pending callback hooks.
+        """
+        num_models = len(self._tasks)  # dict[model_name, deque[TaskDescriptor]]
         if not num_models:
             raise ValueError("No models need to be evaluated")
         self.num_processed = 0
         self.num_saved = 0
-        display_progress = []
+        self._checkpoint_at = 0
 
-        def _execute_model(model_name: str, etasks: deque[EvalTask],
-                           d_index: int):
-            print(
-                f"exec model: {model_name}, prompts: {len(etasks)}, medias: {len(etasks[0].question.medias)}"
-            )
+        def _execute_chunk(model_name: str,
+                           descriptors: list[TaskDescriptor]) -> int:
             num_executed = 0
+            descriptors = self._skip_stopped(descriptors)
+            if not descriptors:
+                return 0
+            etasks = [self.materialize(d) for d in descriptors]
             model = etasks[0].lm_model
+            chunk_start = time.time()
+            for etask in etasks:
+                etask.spans.append(Span(name=SpanType.queue, start=exec_start,
+                                        end=chunk_start))
             etasks = [self.prepare_task(etask) for etask in etasks]
+            if dispatcher:
+                for etask in etasks:
+                    dispatcher.dispatch('on_question_start', etask.question,
+                                        etask.lm_model, etask.prompt)
 
-            score = 0.0  # live stats
-            count = 0
-            error = 0
-            punt = 0
-            for index, answer in model.batch_execute(tasks=etasks):
+            for index, answer in self._batch_execute(model, etasks):
                 assert answer is not None, f"Answer generation failed for model {model_name}"
                 log.debug(f"model:index: {model_name}, {index}")
                 log.debug(f"model:answer: {answer.answer}")
                 etask = etasks[index]
-                etask.error = answer.iserror
-                if etask.punt_detector:
-                    punt_score = etask.punt_detector.score(
-                        answer, etask.question, etask.task)
-                    log.debug(f"punt_score: {punt_score}")
-
-                    # model is punting
-                    if punt_score == 1.0:
-                        etask.punted = True
-                        answer.ispunting = True
-                        answer.punting_reason = answer.raw_response
-                        answer.answer = ""
-                        log.debug(f"punting detected: {answer.punting_reason}")
-                        punt += 1
-
-                etask.lm_answer = answer
-                if not etask.lm_answer.ispunting:
-                    self.score_answer(etask)
+                self.process_answer(etask, answer)
+                self._record_adaptive(descriptors[index], etask)
                 num_executed += 1
                 prompt_ver = etask.prompt.version_string()
-                model_ver = etask.lm_model.version_string
-                score += answer.score
-                count += 1
-                error += answer.iserror
+                self._publish_answer_events(model_name, prompt_ver, etask)
                 # add answer to benchmark
                 # Only one thread at a time can write to the benchmark
+                persist_start = time.time()
                 with self._checkpoint_lock:
-                    bench_task = self.benchmark.get_task(
-                        etask.category.name, etask.task.name)
-                    bench_question: Question = bench_task.questions[
-                        etask.question.id]
-
-                    if prompt_ver not in bench_question.lm_answers:
-                        bench_question.lm_answers[prompt_ver] = {}
-                    bench_question.lm_answers[prompt_ver][
-                        model_ver] = etask.lm_answer
+                    # the answer is shared with the checkpoints once stored
+                    answer.spans.append(Span(name=SpanType.persist,
+                                             start=persist_start,
+                                             end=time.time()))
+                    bench_question = self._store_answer(etask)
                     self.num_processed += 1
                     log.debug(
                         "Added answer to benchmark (%s, %d): %s; num processed: %d, num saved: %d",
                         model_name, index, bench_question, self.num_processed,
                         self.num_saved)
 
-                    dp = display_progress[d_index]
-                    dp["count"] = count
-                    dp["error"] = error
-                    dp["punt"] = punt
-                    dp["score"] = score
                     if (self.num_processed >= save_interval +
-                            self.num_saved) and self.save_path:
-                        self.benchmark.save(self.save_path,
-                                            use_tempfile=use_tempfile)
-                        self.num_saved = self.num_processed
+                            self._checkpoint_at) and writer:
+                        # saved in the background from a snapshot
+                        writer.request()
+                        self._checkpoint_at = self.num_processed
+                # outside the lock: a blocking dispatch only stalls this worker
+                if dispatcher:
+                    dispatcher.dispatch('on_question_end', bench_question,
+                                        etask.lm_answer, etask.lm_model,
+                                        etask.prompt)
             return num_executed
 
-        with concurrent.futures.ThreadPoolExecutor(num_models) as executor:
-            futures = []
-            for model_name, etasks in self._tasks.items():
-                func = functools.partial(
-                    _execute_model,
-                    model_name=model_name,
-                    etasks=etasks,
-                    d_index=len(display_progress),
-                )
-                display_progress.append({
-                    "pbar":
-                    tqdm(desc=f"Model {model_name}", total=len(etasks)),
-                    "total":
-                    len(etasks),
-                    "count":
-                    0,
-                    "error":
-                    0,
-                    "punt":
-                    0,
-                    "score":
-                    0.0,
-                    "shown":
-                    0
-                })
-                futures.append(executor.submit(func))
-            done = False
-            while not done:
-                done = True
-                for i, future in enumerate(futures):
-                    if future is None:
-                        continue
-                    elif future.done():
-                        r = future.result()  # need to get result to get errors
-                        log.info(f"future: {i} returned {r}")
-                        futures[i] = None
-                    else:
-                        done = False
-
-                    with self._checkpoint_lock:
-                        dp = display_progress[i]
-                        count = dp["count"]
-                        shown = dp["shown"]
-                        if dp["shown"] < count:
-                            pbar = dp["pbar"]
-                            pbar.update(count - shown)
-                            dp["shown"] = count
-                            pbar.set_postfix({
-                                "score": dp["score"] / count,
-                                "error_rate": dp["error"] / count,
-                                "punt_rate": dp["punt"] / count,
-                            })
-                    if not done:
-                        log.debug("waiting")
-                        time.sleep(2)
-
-            for dp in display_progress:
-                dp["pbar"].close()
+        totals = {}
+        for model_name, descriptors in self._tasks.items():
+            first = descriptors[0]
+            question = self.benchmark.categories[first.category_idx].tasks[
+                first.task_idx].questions[first.question_idx]
+            print(
+                f"exec model: {model_name}, prompts: {len(descriptors)}, medias: {len(question.medias)}"
+            )
+            totals[model_name] = len(descriptors)
+
+        # progress and metrics are consumed from the events stream so the
+        # workers never wait on the display
+        self._bus = EventBus()
+        progress = ProgressSubscriber(totals)
+        self._bus.subscribe(progress)
+        metrics = None
+        if metrics_path:
+            metrics = MetricsSubscriber()
+            self._bus.subscribe(metrics)
+        for subscriber in self._subscribers:
+            self._bus.subscribe(subscriber)
+
+        # user callback hooks are delivered by the events stream thread
+        dispatcher = None
+        evaluations = {}
+        if self.callback:
+            self.callback.benchmark = self.benchmark
+            dispatcher = CallbackDispatcher(self.callback, self._bus,
+                                            max_queue_size=callback_queue_size,
+                                            policy=callback_policy)
+        self._bus.start()
+        exec_start = time.time()
+        if dispatcher:
+            for descriptors in self._tasks.values():
+                for descriptor in descriptors:
+                    ctx = self._plans[descriptor.plan_idx]
+                    model = ctx.models[descriptor.model_idx]
+                    prompt = ctx.prompts[descriptor.prompt_idx]
+                    key = (model.version_string, prompt.version_string())
+                    evaluations.setdefault(key, (model, prompt))
+            for model, prompt in evaluations.values():
+                dispatcher.dispatch('on_evaluation_start', model, prompt,
+                                    droppable=False)
+
+        # checkpoints are written by a background thread so the workers
+        # never wait on the benchmark serialization
+        writer = None
+        if self.save_path:
+            # taken once, checkpoints then only apply the new answers
+            self._checkpoint_copy = self.benchmark.snapshot()
+            self._journal = []
+            writer = CheckpointWriter(self._checkpoint_snapshot,
+                                      functools.partial(self._save_checkpoint,
+                                                        use_tempfile=use_tempfile,
+                                                        compact=compact))
+            writer.start()
+
+        scheduler = Scheduler(self._tasks,
+                              max_workers=max_workers,
+                              chunk_size=chunk_size or self._chunk_size,
+                              model_concurrency=(self._model_concurrency
+                                                 if model_concurrency is None
+                                                 else model_concurrency))
+        try:
+            results = scheduler.run(_execute_chunk)
+        finally:
+            if dispatcher:
+                for model, prompt in evaluations.values():
+                    dispatcher.dispatch('on_evaluation_end', model, prompt,
+                                        droppable=False)
+            self._bus.close()
+            self._bus = None
+            progress.close()
+            if metrics:
+                metrics.export(metrics_path)
+            if dispatcher:
+                dispatcher.close()
+            if writer:
+                try:
+                    # raises if a checkpoint failed
+                    writer.close()
+                finally:
+                    self._journal = None
+                    self._checkpoint_copy = None
+        for model_name, executed in results.items():
+            log.info(f"{model_name}: {sum(executed)} tasks executed")
+        num_skipped = sum(sum(ctx.adaptive.skipped.values())
+                          for ctx in self._plans if ctx.adaptive)
+        if num_skipped:
+            log.info(f"{num_skipped} tasks skipped by adaptive sampling")
 
         # save benchmark one last time
         if (self.num_saved < self.num_processed) and self.save_path:
-            self.benchmark.save(self.save_path)
+            self.benchmark.save(self.save_path, compact=compact)
             self.num_saved = self.num_processed
 
         # return benchmark so people can manipulate it after evaluation
         return self.benchmark
 
+    def _skip_stopped(self, descriptors: list[TaskDescriptor]
+                      ) -> list[TaskDescriptor]:
+        "Drop the evaluations of the adaptive groups that stopped"
+        kept = []
+        for descriptor in descriptors:
+            estimator = self._plans[descriptor.plan_idx].adaptive
+            if estimator is not None:
+                key = group_key(descriptor)
+                if estimator.should_stop(key):
+                    estimator.skip(key)
+                    continue
+            kept.append(descriptor)
+        return kept
+
+    def _record_adaptive(self, descriptor: TaskDescriptor,
+                         etask: EvalTask) -> None:
+        estimator = self._plans[descriptor.plan_idx].adaptive
+        if estimator is not None and not etask.lm_answer.iserror:
+            estimator.add(group_key(descriptor), etask.lm_answer.score)
+
+    def execute_batch(self,
+                      backend: BatchBackend,
+                      job_dir: str,
+                      poll_interval: float = 60.0,
+                      temperature: float = 0.0,
+                      max_tokens: int = 4096,
+                      use_tempfile: bool | None = None,
+                      compact: bool = False) -> Benchmark:
+        """Execute the evaluation plan through a provider batch API.
+
+        The planned tasks of each model are written to a JSONL job file and
+        submitted as one job. Jobs are tracked in `job_dir` so calling it
+        again after an interruption resumes the pending jobs instead of
+        submitting them again. Completion tasks are not supported and stay
+        queued for `execute()`.
+
+        Args:
+            backend: Batch API used to run the jobs.
+            job_dir: Directory holding the jobs files and state.
+            poll_interval: Seconds between jobs status checks.
+            temperature: Generation temperature.
+            max_tokens: Maximum number of generated tokens.
+            use_tempfile: Work on a temporary copy of the archive.
+            compact: Save the benchmark using the compact answers format.
+        """
+        if not self._tasks:
+            raise ValueError("No models need to be evaluated")
+        job_path = utils.Path(job_dir)
+        job_path.mkdir(parents=True, exist_ok=True)
+        state_path = job_path / "state.json"
+        state = {"jobs": []}
+        if state_path.exists():
+            state = json.loads(state_path.read_text())
+
+        def _save_state():
+            state_path.write_text(json.dumps(state, indent=2))
+
+        # map the batch requests back to their tasks
+        pending: dict[str, dict[str, tuple[TaskDescriptor, EvalTask]]] = {}
+        for model_name, descriptors in self._tasks.items():
+            etasks = {}
+            for descriptor in descriptors:
+                etask = self.materialize(descriptor)
+                if etask.task.type in (TaskType.completion.value,
+                                       TaskType.grouped_completion.value):
+                    continue
+                if not hasattr(etask.lm_model, 'batch_request'):
+                    raise ValueError(
+                        f"Model {model_name} doesn't support batch execution")
+                etasks[self._batch_id(etask)] = (descriptor, etask)
+            if len(etasks) < len(descriptors):
+                log.warning(f"{model_name}: completion tasks are not supported "
+                            "in batch mode and stay queued")
+            pending[model_name] = etasks
+
+        # resume the jobs in flight and submit the tasks they don't cover
+        jobs = [job for job in state["jobs"]
+                if not job.get("ingested") and job["model"] in pending
+                and job["status"] not in ("failed", "expired", "cancelled")]
+        for model_name, etasks in pending.items():
+            covered = set()
+            for job in jobs:
+                if job["model"] == model_name:
+                    requests = read_jsonl(job_path / job["input_file"])
+                    covered.update(r["custom_id"] for r in requests)
+            requests = []
+            for custom_id, (_, etask) in etasks.items():
+                if custom_id in covered:
+                    continue
+                etask = self.prepare_task(etask)
+                mds = etask.question.medias if etask.question.medias else []
+                mds = mds if isinstance(mds, list) else [mds]
+                body = etask.lm_model.batch_request(
+                    etask.instanciated_prompt, mds, temperature, max_tokens,
+                    max(etask.task.num_shots, 1))
+                requests.append({"custom_id": custom_id, "method": "POST",
+                                 "url": BATCH_ENDPOINT, "body": body})
+            if not requests:
+                continue
+            input_file = f"requests_{len(state['jobs']):05d}.jsonl"
+            write_jsonl(job_path / input_file, requests)
+            job = {"model": model_name, "input_file": input_file,
+                   "job_id": backend.submit(job_path / input_file),
+                   "status": "submitted", "submitted_at": time.time(),
+                   "completed_at": None, "ingested": False}
+            log.info(f"{model_name}: submitted batch job {job['job_id']} "
+                     f"with {len(requests)} requests")
+            state["jobs"].append(job)
+            jobs.append(job)
+            _save_state()
+
+        # wait for all the jobs to be done
+        while True:
+            for job in jobs:
+                if job["status"] in TERMINAL_STATUSES:
+                    continue
+                job["status"] = backend.status(job["job_id"])
+                if job["status"] in TERMINAL_STATUSES:
+                    job["completed_at"] = time.time()
+            _save_state()
+            if all(job["status"] in TERMINAL_STATUSES for job in jobs):
+                break
+            time.sleep(poll_interval)
+
+        # ingest the results
+        self.num_processed = 0
+        for job in jobs:
+            if job["status"] != "completed":
+                log.error(f"{job['model']}: batch job {job['job_id']} "
+                          f"{job['status']}, its tasks stay queued")
+                continue
+            output_file = job["input_file"].replace("requests_", "results_")
+            backend.download(job["job_id"], job_path / output_file)
+            results = {r["custom_id"]: r
+                       for r in read_jsonl(job_path / output_file)}
+            etasks = pending[job["model"]]
+            timing = (job["submitted_at"], job["completed_at"])
+            ingested = set()
+            for request in read_jsonl(job_path / job["input_file"]):
+                custom_id = request["custom_id"]
+                if custom_id not in etasks:
+                    continue  # answered since the job submission
+                descriptor, etask = etasks.pop(custom_id)
+                etask = self.prepare_task(etask)
+                answer = etask.lm_model.batch_answer(results.get(custom_id),
+                                                     etask.instanciated_prompt,
+                                                     timing)
+                self.process_answer(etask, answer)
+                with self._checkpoint_lock:
+                    self._store_answer(etask)
+                    self.num_processed += 1
+                ingested.add(descriptor)
+            queue = self._tasks[job["model"]]
+            self._tasks[job["model"]] = deque(d for d in queue
+                                              if d not in ingested)
+            if not self._tasks[job["model"]]:
+                del self._tasks[job["model"]]
+            job["ingested"] = True
+            _save_state()
+            log.info(f"{job['model']}: ingested {len(ingested)} answers "
+                     f"from batch job {job['job_id']}")
+
+        if self.num_processed and self.save_path:
+            self.benchmark.save(self.save_path, use_tempfile=use_tempfile,
+                                compact=compact)
+            self.num_saved = self.num_processed
+        return self.benchmark
+
+    @staticmethod
+    def _batch_id(etask: EvalTask) -> str:
+        "Batch request id of a task, stable across runs"
+        return "|".join([etask.category.name, etask.task.name,
+                         str(etask.question.id), etask.prompt.version_string()])
+
+    def _checkpoint_snapshot(self) -> tuple[list, int]:
+        "Answers stored since the last checkpoint and the answers count"
+        with self._checkpoint_lock:
+            journal, self._journal = self._journal, []
+            return journal, self.num_processed
+
+    def _save_checkpoint(self, snapshot: tuple[list, int],
+                         use_tempfile: bool | None = None,
+                         compact: bool = False) -> None:
+        "Apply the new answers to the checkpoint copy and save it"
+        journal, num_processed = snapshot
+        benchmark = self._checkpoint_copy
+        for (category_name, task_name, question_id, prompt_ver, model_ver,
+             answer) in journal:
+            question = benchmark.get_task(category_name,
+                                          task_name).questions[question_id]
+            question.lm_answers.setdefault(prompt_ver, {})[model_ver] = answer
+        benchmark.save(self.save_path, use_tempfile=use_tempfile,
+                       compact=compact)
+        with self._checkpoint_lock:
+            self.num_saved = num_processed
+
+    @staticmethod
+    def _batch_execute(model: LMModel, etasks: list[EvalTask]
+                       ) -> Generator[tuple[int, LMAnswer], None, None]:
+        "Generate the answers of tasks, with `Task.num_shots` samples each"
+        by_shots = defaultdict(list)
+        for index, etask in enumerate(etasks):
+            by_shots[max(etask.task.num_shots, 1)].append(index)
+        for num_shots, indexes in by_shots.items():
+            tasks = [etasks[index] for index in indexes]
+            for index, answer in model.batch_execute(tasks=tasks,
+                                                     completions=num_shots):
+                yield indexes[index], answer
+
+    def process_answer(self, etask: EvalTask, answer: LMAnswer) -> EvalTask:
+        "Attach an answer to its task, detecting punts and scoring it"
+        etask.error = answer.iserror
+        answer.spans = etask.spans + answer.spans
+        if etask.punt_detector:
+            with trace_span(answer.spans, SpanType.punt):
+                punt_score = cached_batch_score(
+                    etask.punt_detector, [answer], [etask.question],
+                    etask.task, self.score_cache)[0]
+            log.debug(f"punt_score: {punt_score}")
+
+            # model is punting
+            if punt_score == 1.0:
+                etask.punted = True
+                answer.ispunting = True
+                answer.punting_reason = answer.answer
+                answer.answer = ""
+                log.debug(f"punting detected: {answer.punting_reason}")
+
+        answer.fingerprint = etask.fingerprint
+        etask.lm_answer = answer
+        if not etask.lm_answer.ispunting:
+            with trace_span(answer.spans, SpanType.scoring):
+                self.score_answer(etask, self.score_cache)
+        return etask
+
+    def _store_answer(self, etask: EvalTask) -> Question:
+        """Add a task answer to the benchmark, the checkpoint lock must be held.
+
+        Returns:
+            The benchmark question holding the answer.
+        """
+        bench_task = self.benchmark.get_task(etask.category.name,
+                                             etask.task.name)
+        bench_question: Question = bench_task.questions[etask.question.id]
+        prompt_ver = etask.prompt.version_string()
+        if prompt_ver not in bench_question.lm_answers:
+            bench_question.lm_answers[prompt_ver] = {}
+        answers = bench_question.lm_answers[prompt_ver]
+        previous = answers.get(etask.lm_model.version_string)
+        if previous is not None and needs_retry(previous):
+            # keep the failed attempts history
+            etask.lm_answer.steps = previous.steps + etask.lm_answer.steps
+        answers[etask.lm_model.version_string] = etask.lm_answer
+        if self._journal is not None:
+            self._journal.append((etask.category.name, etask.task.name,
+                                  etask.question.id, prompt_ver,
+                                  etask.lm_model.version_string,
+                                  etask.lm_answer))
+        return bench_question
+
     @staticmethod
     def prepare_task(etask: EvalTask) -> EvalTask:
         """Prepares the prompt and other data for a given eval task."""
@@ -439,22 +971,29 @@ class Evaluator():
         elif etask.instanciated_prompt:
             instanciated_prompt = etask.instanciated_prompt
         else:
-            instanciated_prompt = etask.prompt.render(etask.question,
-                                                      etask.task)
+            with trace_span(etask.spans, SpanType.render):
+                # work on the question as presented by the prompt so scorers
+                # see its answer letters without touching the benchmark one
+                etask.question = etask.prompt.layout_question(etask.question)
+                instanciated_prompt = etask.prompt.render_layout(etask.question,
+                                                                 etask.task)
             etask.instanciated_prompt = instanciated_prompt
 
         log.debug(f"prompt: {instanciated_prompt}")
 
         # deal with question media which are not reload from the benchmark file
         if etask.question.medias:
-            for media in etask.question.medias:
-                if not media.content:
-                    if not utils.Path(media.original_path).exists():
-                        raise ValueError(
-                            f"media {media.original_path} not found")
-                    media.content = utils.Path(
-                        media.original_path).read_bytes()
+            with trace_span(etask.spans, SpanType.media):
+                for media in etask.question.medias:
+                    if not media.content:
+                        if not utils.Path(media.original_path).exists():
+                            raise ValueError(
+                                f"media {media.original_path} not found")
+                        media.content = utils.Path(
+                            media.original_path).read_bytes()
 
+        etask.fingerprint = input_fingerprint(etask.instanciated_prompt,
+                                              etask.question.medias)
         return etask
 
     @staticmethod
@@ -520,15 +1059,26 @@ class Evaluator():
         return etask
 
     @staticmethod
-    def score_answer(etask: EvalTask) -> EvalTask:
-        """Score an answer for a given eval task"""
+    def score_answer(etask: EvalTask,
+                     cache: ScoreCache | None = None) -> EvalTask:
+        """Score an answer for a given eval task
+
+        Args:
+            etask: Evaluation task holding the answer.
+            cache: Reuse and store the scores of the cached scorers there.
+        """
         assert etask.lm_answer is not None, "Cannot score an answer that has not been generated"
         assert not etask.lm_answer.ispunting, "Cannot score a punted answer"
 
         try:
-            score = etask.task.scorer.score(etask.lm_answer, etask.question,
-                                            etask.task)
+            # samples are scored and aggregated when there are several
+            score = score_answers(etask.task.scorer, [etask.lm_answer],
+                                  [etask.question], etask.task, cache)[0]
             etask.lm_answer.score = score
+            etask.lm_answer.score_provenance[provenance_slot(
+                etask.task.scorer, main=True)] = scoring_key(
+                etask.task.scorer.version_hash(), etask.lm_answer,
+                etask.question)
             etask.score = score
             log.debug(f"answer score: {score}")
         except Exception as e:
@@ -538,6 +1088,10 @@ class Evaluator():
             etask.error = True
 
         for scorer in etask.task.additional_scorers:
-            score = scorer.score(etask.lm_answer, etask.question, etask.task)
+            score = cached_batch_score(scorer, [etask.lm_answer],
+                                       [etask.question], etask.task, cache)[0]
             etask.lm_answer.additional_scores[scorer.type] = score
+            etask.lm_answer.score_provenance[provenance_slot(scorer)] = \
+                scoring_key(scorer.version_hash(), etask.lm_answer,
+                            etask.question)
         return etask
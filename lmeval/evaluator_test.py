@@ -0,0 +1,149 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the evaluator planning and execution."""
+
+import pytest
+
+from lmeval import Evaluator
+from lmeval.enums import MultiShotStrategy
+from lmeval.fixtures import make_benchmark
+from lmeval.models.mock_model import MockModel
+from lmeval.prompts import QuestionOnlyPrompt
+
+
+def test_plan_budget():
+    benchmark = make_benchmark()
+    prompt = QuestionOnlyPrompt()
+    model = MockModel(model_version='mock-1', default_response='a')
+
+    # history: answered question cost 1.0 each
+    task = benchmark.categories[0].tasks[0]
+    for question in task.questions[:2]:
+        answer = model._build_answer('a', generation_time=2.0, cost=1.0,
+                                     prompt_tokens=100)
+        question.lm_answers[prompt.version_string()] = {
+            model.version_string: answer}
+
+    evaluator = Evaluator(benchmark)
+    report = evaluator.plan(model, prompt, max_cost=3.0, display_report=False)
+    entry = report[prompt.version_string()][0]
+    assert entry['existing'] == 2
+    assert entry['planned'] + entry['over_budget'] == 8
+    assert entry['over_budget'] > 0
+    assert entry['estimated_cost'] <= 3.0
+    assert entry['estimated_duration'] > 0
+
+    # cheapest (shortest) questions are planned first
+    planned = [evaluator.materialize(descriptor)
+               for descriptor in evaluator._tasks[model.version_string]]
+    lengths = [len(etask.question.question) for etask in planned]
+    assert lengths == sorted(lengths)
+    assert planned[0].question.id == len(task.questions) - 1
+
+
+@pytest.mark.parametrize('model_concurrency, chunk_size, planned',
+                         [(1, 16, 2), (4, 1, 8), (2, 16, 4)])
+def test_plan_duration_uses_scheduler_concurrency(model_concurrency,
+                                                  chunk_size, planned):
+    benchmark = make_benchmark()
+    prompt = QuestionOnlyPrompt()
+    model = MockModel(model_version='mock-1', default_response='a')
+    task = benchmark.categories[0].tasks[0]
+    for question in task.questions[:2]:
+        answer = model._build_answer('a', generation_time=2.0, cost=0.0,
+                                     prompt_tokens=100)
+        question.lm_answers[prompt.version_string()] = {
+            model.version_string: answer}
+
+    # mock model runs one request at a time per chunk: max_workers is unset
+    evaluator = Evaluator(benchmark)
+    report = evaluator.plan(model, prompt, max_duration=4.0,
+                            chunk_size=chunk_size,
+                            model_concurrency=model_concurrency,
+                            display_report=False)
+    entry = report[prompt.version_string()][0]
+    assert entry['planned'] == planned
+    assert evaluator._model_concurrency == model_concurrency
+    assert evaluator._chunk_size == chunk_size
+
+
+def test_plan_without_history():
+    benchmark = make_benchmark(5)
+    model = MockModel(model_version='mock-1', default_response='a')
+    evaluator = Evaluator(benchmark)
+    report = evaluator.plan(model, QuestionOnlyPrompt(), max_cost=1.0,
+                            display_report=False)
+    entry = list(report.values())[0][0]
+    # unknown cost can't exceed the budget
+    assert entry['planned'] == 5
+    assert entry['estimated_tokens'] > 0
+    assert entry['estimated_cost'] == 0
+
+
+def test_execute_multiple_models():
+    benchmark = make_benchmark(7)
+    prompt = QuestionOnlyPrompt()
+    models = [MockModel(model_version=f'mock-{i}', default_response='a')
+              for i in range(3)]
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(models, prompt, display_report=False)
+    evaluator.execute(chunk_size=2, model_concurrency=2)
+    for question in benchmark.categories[0].tasks[0].questions:
+        answers = question.lm_answers[prompt.version_string()]
+        assert sorted(answers) == [m.version_string for m in models]
+    assert evaluator.num_processed == 7 * len(models)
+
+
+@pytest.mark.parametrize('strategy, score, answer', [
+    (MultiShotStrategy.single, 0.0, 'b'),
+    (MultiShotStrategy.average, 0.5, 'b'),
+    (MultiShotStrategy.max, 1.0, 'A0'),
+    (MultiShotStrategy.majority, 1.0, 'A0'),
+    (MultiShotStrategy.pass_at_k, 0.5, 'A0'),
+])
+def test_score_samples(strategy, score, answer):
+    benchmark = make_benchmark(1)
+    task = benchmark.categories[0].tasks[0]
+    task.num_shots = 4
+    task.multi_short_scoring_strategy = strategy
+    model = MockModel(model_version='mock-1', default_response='a')
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, QuestionOnlyPrompt(), display_report=False)
+    etask = evaluator.materialize(evaluator._tasks[model.version_string][0])
+    lm_answer = model._build_answer('b', generation_time=1)
+    lm_answer.samples = ['b', 'A0', 'a0 ', 'c']
+    evaluator.process_answer(etask, lm_answer)
+    assert lm_answer.sample_scores == [0.0, 1.0, 1.0, 0.0]
+    assert lm_answer.score == score
+    assert lm_answer.answer == answer
+
+
+def test_execute_requests_num_shots_samples():
+    benchmark = make_benchmark(3)
+    task = benchmark.categories[0].tasks[0]
+    task.num_shots = 5
+    model = MockModel(model_version='mock-1', default_response='a')
+    requested = []
+    batch_execute = model.batch_execute
+
+    def _batch_execute(tasks, completions=1, **kwargs):
+        requested.append(completions)
+        return batch_execute(tasks, completions=completions, **kwargs)
+
+    object.__setattr__(model, 'batch_execute', _batch_execute)
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, QuestionOnlyPrompt(), display_report=False)
+    evaluator.execute()
+    assert requested and set(requested) == {5}
@@ -0,0 +1,233 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Evaluation events stream used for progress reporting and metrics."""
+
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import json
+from typing import Any
+import queue
+import threading
+import time
+
+from tqdm.auto import tqdm
+
+from lmeval.enums import EventType
+from lmeval.logger import log
+
+# a subscriber receives the events in batches
+Subscriber = Callable[[list["EvalEvent"]], None]
+
+# events delivered to the subscribers that don't select their types
+ANSWER_EVENTS = frozenset({EventType.answer, EventType.score, EventType.error,
+                           EventType.punt})
+
+
+@dataclass(slots=True)
+class EvalEvent:
+    "Event emitted by the evaluator for each answer lifecycle step"
+    type: EventType
+    model: str
+    prompt: str = ""
+    category: str = ""
+    task: str = ""
+    question_id: int = -1
+    score: float = 0.0
+    latency: float = 0.0
+    timestamp: float = field(default_factory=time.time)
+    # event specific data, e.g the arguments of a callback hook
+    payload: Any = None
+
+
+class EventBus():
+    """Fan out evaluation events to subscribers from a dedicated thread.
+
+    Publishing is a non blocking put on a SimpleQueue so worker threads never
+    contend on a lock to report progress. A single consumer thread drains
+    the queue and delivers the events in batches to every subscriber.
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_batch_size: int = 256) -> None:
+        self.max_batch_size = max_batch_size
+        self.subscribers: list[tuple[Subscriber, frozenset[EventType]]] = []
+        self._queue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self,
+                  subscriber: Subscriber,
+                  types: set[EventType] | None = None) -> None:
+        """Register a subscriber, must be called before start().
+
+        Args:
+            subscriber: Callable receiving batches of events.
+            types: Event types delivered to the subscriber, defaults to the
+            answer events.
+        """
+        types = ANSWER_EVENTS if types is None else frozenset(types)
+        self.subscribers.append((subscriber, types))
+
+    def publish(self, event: EvalEvent) -> None:
+        self._queue.put(event)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run,
+                                        name="lmeval-events",
+                                        daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        "Deliver the pending events and stop the consumer thread"
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is self._STOP:
+                batch.pop()
+                running = False
+            if not batch:
+                continue
+            for subscriber, types in self.subscribers:
+                events = [event for event in batch if event.type in types]
+                if not events:
+                    continue
+                try:
+                    subscriber(events)
+                except Exception as e:  # pylint: disable=broad-except
+                    log.error(f"event subscriber {subscriber} failed: {e}")
+
+
+class ProgressSubscriber():
+    "Display a progress bar per model with live score, error and punt rates"
+
+    def __init__(self, totals: dict[str, int]) -> None:
+        self.pbars = {
+            model: tqdm(desc=f"Model {model}", total=total)
+            for model, total in totals.items()
+        }
+        self.stats = defaultdict(lambda: defaultdict(float))
+
+    def __call__(self, events: list[EvalEvent]) -> None:
+        updated = defaultdict(int)
+        for event in events:
+            stats = self.stats[event.model]
+            if event.type == EventType.answer:
+                stats['count'] += 1
+                updated[event.model] += 1
+            elif event.type == EventType.score:
+                stats['score'] += event.score
+            elif event.type == EventType.error:
+                stats['error'] += 1
+            elif event.type == EventType.punt:
+                stats['punt'] += 1
+
+        for model, count in updated.items():
+            stats = self.stats[model]
+            pbar = self.pbars[model]
+            pbar.update(count)
+            pbar.set_postfix({
+                "score": stats['score'] / stats['count'],
+                "error_rate": stats['error'] / stats['count'],
+                "punt_rate": stats['punt'] / stats['count'],
+            })
+
+    def close(self) -> None:
+        for pbar in self.pbars.values():
+            pbar.close()
+
+
+class MetricsSubscriber():
+    """Aggregate throughput and quality metrics per model.
+
+    Metrics can be exported as JSON or in the Prometheus text exposition
+    format.
+    """
+
+    def __init__(self) -> None:
+        self.start_time = time.time()
+        self.last_time = self.start_time
+        self.metrics = defaultdict(lambda: defaultdict(float))
+
+    def __call__(self, events: list[EvalEvent]) -> None:
+        for event in events:
+            metrics = self.metrics[event.model]
+            if event.type == EventType.answer:
+                metrics['answers'] += 1
+                metrics['latency'] += event.latency
+            elif event.type == EventType.score:
+                metrics['scored'] += 1
+                metrics['score'] += event.score
+            elif event.type == EventType.error:
+                metrics['errors'] += 1
+            elif event.type == EventType.punt:
+                metrics['punts'] += 1
+            self.last_time = max(self.last_time, event.timestamp)
+
+    def to_dict(self) -> dict:
+        "Return the metrics keyed by model"
+        elapsed = max(self.last_time - self.start_time, 1e-9)
+        data = {}
+        for model, m in self.metrics.items():
+            answers = m['answers']
+            data[model] = {
+                "answers": int(answers),
+                "errors": int(m['errors']),
+                "punts": int(m['punts']),
+                "mean_score": m['score'] / m['scored'] if m['scored'] else 0.0,
+                "mean_latency": m['latency'] / answers if answers else 0.0,
+                "throughput": answers / elapsed,
+            }
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps({"elapsed": self.last_time - self.start_time,
+                           "models": self.to_dict()})
+
+    def to_prometheus(self) -> str:
+        "Return the metrics in the Prometheus text exposition format"
+        data = self.to_dict()
+        lines = []
+        for name, mtype in [("answers", "counter"), ("errors", "counter"),
+                            ("punts", "counter"), ("mean_score", "gauge"),
+                            ("mean_latency", "gauge"), ("throughput", "gauge")]:
+            metric = f"lmeval_{name}"
+            lines.append(f"# TYPE {metric} {mtype}")
+            for model, values in data.items():
+                lines.append(f'{metric}{{model="{model}"}} {values[name]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        "Write the metrics to path, .prom and .txt files use the Prometheus format"
+        if path.endswith((".prom", ".txt")):
+            content = self.to_prometheus()
+        else:
+            content = self.to_json()
+        with open(path, "w") as f:
+            f.write(content)
@@ -0,0 +1,77 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+
+from lmeval.enums import EventType
+from lmeval.events import EvalEvent, EventBus, MetricsSubscriber
+from lmeval.fixtures import make_benchmark
+from lmeval import Evaluator
+from lmeval.models.mock_model import MockModel
+from lmeval.prompts import QuestionOnlyPrompt
+
+
+def test_event_bus_delivers_all_events():
+    received = []
+    bus = EventBus(max_batch_size=8)
+    bus.subscribe(received.extend)
+    bus.start()
+
+    def worker(model):
+        for i in range(100):
+            bus.publish(EvalEvent(type=EventType.answer, model=model,
+                                  question_id=i))
+
+    threads = [threading.Thread(target=worker, args=(f"m{i}",))
+               for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    bus.close()
+    assert len(received) == 400
+
+
+def test_metrics_export():
+    metrics = MetricsSubscriber()
+    metrics([EvalEvent(type=EventType.answer, model="m", latency=1.0),
+             EvalEvent(type=EventType.score, model="m", score=1.0),
+             EvalEvent(type=EventType.answer, model="m", latency=3.0),
+             EvalEvent(type=EventType.error, model="m")])
+    data = json.loads(metrics.to_json())["models"]["m"]
+    assert data["answers"] == 2
+    assert data["errors"] == 1
+    assert data["mean_latency"] == 2.0
+    assert data["mean_score"] == 1.0
+    prom = metrics.to_prometheus()
+    assert 'lmeval_answers{model="m"} 2' in prom
+    assert "# TYPE lmeval_throughput gauge" in prom
+
+
+def test_execute_events(tmp_path):
+    benchmark = make_benchmark(5)
+    model = MockModel(model_version='mock-1', default_response='a')
+    evaluator = Evaluator(benchmark)
+    events = []
+    evaluator.subscribe(events.extend)
+    evaluator.plan(model, QuestionOnlyPrompt(), display_report=False)
+    metrics_path = tmp_path / "metrics.json"
+    evaluator.execute(metrics_path=str(metrics_path))
+
+    answers = [e for e in events if e.type == EventType.answer]
+    assert len(answers) == 5
+    assert {e.model for e in events} == {model.version_string}
+    data = json.loads(metrics_path.read_text())
+    assert data["models"][model.version_string]["answers"] == 5
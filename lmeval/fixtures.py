@@ -17,11 +17,16 @@ import pytest
 from typing import Dict, Union, Any
 
 from dotenv import load_dotenv
+from lmeval.benchmark import Benchmark, Category
+from lmeval.enums import TaskType, ScorerType
 from lmeval.models import lmmodel
 from lmeval.models import mock_model
 from lmeval.models.lmmodel import LMModel
 from lmeval.models.gemini import GeminiModel
 from lmeval.models.litellm import proxy_make_model
+from lmeval.question import Question
+from lmeval.scorers import get_scorer
+from lmeval.task import Task
 
 
 eu_countries = [
@@ -114,6 +119,28 @@ def get_country_multi_choice(num_choices: int = 4) -> Dict[str, Any]:
     }
 
 
+def make_benchmark(num_questions: int = 10, padding: int = 40) -> Benchmark:
+    """Single task benchmark whose question `i` expects the answer `a{i}`.
+
+    Args:
+        num_questions: Number of questions.
+        padding: Questions are padded so they get shorter as `i` increases,
+        which makes the cheapest first planning order observable.
+    """
+    benchmark = Benchmark(name='test')
+    category = Category(name='cat')
+    benchmark.add_category(category)
+    task = Task(name='task', type=TaskType.text_generation,
+                scorer=get_scorer(ScorerType.contain_text_insensitive))
+    category.add_task(task)
+    for i in range(num_questions):
+        question = f"q{i}"
+        if padding:
+            question += " " + "x" * padding * (num_questions - i)
+        task.add_question(Question(question=question, answer=f"a{i}"))
+    return benchmark
+
+
 @pytest.fixture
 def gemini_mock() -> lmmodel.LMModel:
     return mock_model.MockGeminiModel(model_version="gemini-1.5-flash-001")
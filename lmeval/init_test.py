@@ -0,0 +1,49 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import subprocess
+import sys
+
+import pytest
+
+import lmeval
+
+HEAVY_MODULES = ["litellm", "pandas", "tink", "openai"]
+
+
+def _loaded_modules(code: str) -> set[str]:
+    out = subprocess.run(
+        [sys.executable, "-c",
+         f"import sys; {code}; print(' '.join(sys.modules))"],
+        capture_output=True, text=True, check=True).stdout
+    return set(out.split())
+
+
+@pytest.mark.parametrize("code", [
+    "import lmeval",
+    "from lmeval import Benchmark, Evaluator, load_benchmark",
+    "from lmeval.models.mock_model import MockModel",
+])
+def test_import_does_not_load_heavy_modules(code):
+    modules = _loaded_modules(code)
+    for name in HEAVY_MODULES:
+        assert name not in modules, f"{name} imported by: {code}"
+
+
+def test_lazy_attributes():
+    for name in lmeval.__all__:
+        assert getattr(lmeval, name) is not None
+    assert set(lmeval.__all__) <= set(dir(lmeval))
+    with pytest.raises(AttributeError):
+        lmeval.does_not_exist
@@ -0,0 +1,209 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provider batch APIs used by `Evaluator.execute_batch()`.
+
+Requests are written as an OpenAI batch JSONL file, one request per line:
+`{"custom_id", "method", "url", "body"}`. Results come back in the same
+format: `{"custom_id", "response": {"status_code", "body"}, "error"}`.
+"""
+
+from collections.abc import Callable
+import json
+from pathlib import Path
+import threading
+import time
+import uuid
+
+from ..logger import log
+from .replay import chat_completion_response, messages_text
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# job statuses after which the job won't change anymore
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def read_jsonl(path: str | Path) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_jsonl(path: str | Path, rows: list[dict]) -> None:
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+class BatchBackend():
+    "Lifecycle of a provider batch job"
+
+    def submit(self, input_path: Path) -> str:
+        "Upload a JSONL requests file and start a job, returns its id"
+        raise NotImplementedError
+
+    def status(self, job_id: str) -> str:
+        "Current job status, one of the `TERMINAL_STATUSES` once done"
+        raise NotImplementedError
+
+    def download(self, job_id: str, output_path: Path) -> Path:
+        "Write the results JSONL of a completed job to output_path"
+        raise NotImplementedError
+
+
+class LiteLLMBatchBackend(BatchBackend):
+    """Batch API of a provider supported by litellm (e.g. openai, azure).
+
+    Args:
+        provider: litellm provider name.
+        completion_window: Time the provider has to process the job.
+        api_key: Provider API key, defaults to the provider env variable.
+        base_url: Custom provider endpoint.
+    """
+
+    def __init__(self, provider: str = "openai",
+                 completion_window: str = "24h",
+                 api_key: str | None = None,
+                 base_url: str | None = None) -> None:
+        self.provider = provider
+        self.completion_window = completion_window
+        self.kwargs = {"custom_llm_provider": provider}
+        if api_key:
+            self.kwargs["api_key"] = api_key
+        if base_url:
+            self.kwargs["api_base"] = base_url
+
+    def submit(self, input_path: Path) -> str:
+        import litellm
+        with open(input_path, "rb") as f:
+            input_file = litellm.create_file(file=f, purpose="batch",
+                                             **self.kwargs)
+        batch = litellm.create_batch(completion_window=self.completion_window,
+                                     endpoint=BATCH_ENDPOINT,
+                                     input_file_id=input_file.id,
+                                     **self.kwargs)
+        return batch.id
+
+    def _retrieve(self, job_id: str):
+        import litellm
+        return litellm.retrieve_batch(batch_id=job_id, **self.kwargs)
+
+    def status(self, job_id: str) -> str:
+        return self._retrieve(job_id).status
+
+    def download(self, job_id: str, output_path: Path) -> Path:
+        import litellm
+        batch = self._retrieve(job_id)
+        data = b""
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = litellm.file_content(file_id=file_id, **self.kwargs)
+                data += content.content
+        Path(output_path).write_bytes(data)
+        return Path(output_path)
+
+
+class StubBatchBackend(BatchBackend):
+    """Local batch API emulating the provider jobs lifecycle.
+
+    Jobs go through `validating` and `in_progress` before `completed`, each
+    status check moving them one step forward. Jobs are stored in `root` so
+    a new backend pointing to the same directory resumes them.
+
+    Args:
+        root: Directory where the jobs are stored.
+        responder: Called with each request body, returns the answer text.
+        Raising marks the request as failed. Defaults to `default_response`.
+        default_response: Answer text when there is no responder.
+        polls_to_complete: Number of status checks before completion.
+        fail_job: Make all the jobs fail, to test error handling.
+    """
+
+    def __init__(self, root: str | Path,
+                 responder: Callable[[dict], str] | None = None,
+                 default_response: str = "A",
+                 polls_to_complete: int = 2,
+                 fail_job: bool = False) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.responder = responder
+        self.default_response = default_response
+        self.polls_to_complete = polls_to_complete
+        self.fail_job = fail_job
+        self.num_submitted = 0
+        self._lock = threading.Lock()
+
+    def _job_path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.json"
+
+    def _load(self, job_id: str) -> dict:
+        path = self._job_path(job_id)
+        if not path.exists():
+            raise ValueError(f"Unknown batch job {job_id}")
+        return json.loads(path.read_text())
+
+    def _save(self, job: dict) -> None:
+        self._job_path(job["id"]).write_text(json.dumps(job))
+
+    def submit(self, input_path: Path) -> str:
+        job_id = f"batch_{uuid.uuid4().hex}"
+        requests = read_jsonl(input_path)
+        with self._lock:
+            self._save({"id": job_id, "status": "validating", "polls": 0,
+                        "created_at": time.time(), "requests": requests})
+            self.num_submitted += 1
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        with self._lock:
+            job = self._load(job_id)
+            if job["status"] in TERMINAL_STATUSES:
+                return job["status"]
+            job["polls"] += 1
+            if self.fail_job:
+                job["status"] = "failed"
+            elif job["polls"] >= self.polls_to_complete:
+                job["results"] = [self._respond(r) for r in job["requests"]]
+                job["status"] = "completed"
+            else:
+                job["status"] = "in_progress"
+            self._save(job)
+            return job["status"]
+
+    def _respond(self, request: dict) -> dict:
+        body = request.get("body", {})
+        result = {"id": f"batch_req_{uuid.uuid4().hex}",
+                  "custom_id": request.get("custom_id"),
+                  "response": None, "error": None}
+        try:
+            content = (self.responder(body) if self.responder
+                       else self.default_response)
+        except Exception as e:
+            log.debug(f"stub batch request failed: {e}")
+            result["error"] = {"code": "server_error", "message": str(e)}
+            return result
+        result["response"] = {
+            "status_code": 200,
+            "body": chat_completion_response(
+                content, body.get("model", "stub"),
+                messages_text(body.get("messages")))
+        }
+        return result
+
+    def download(self, job_id: str, output_path: Path) -> Path:
+        job = self._load(job_id)
+        if job["status"] != "completed":
+            raise ValueError(f"Batch job {job_id} is {job['status']}")
+        write_jsonl(output_path, job["results"])
+        return Path(output_path)
@@ -0,0 +1,153 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+from lmeval import Evaluator
+from lmeval.fixtures import make_benchmark
+from lmeval.models.batch import BATCH_ENDPOINT, StubBatchBackend, read_jsonl, write_jsonl
+from lmeval.models.litellm import LiteLLMModel
+from lmeval.prompts import QuestionOnlyPrompt
+
+
+def _offline_model() -> LiteLLMModel:
+    return LiteLLMModel(model_version='offline', litellm_model='openai/offline',
+                        publisher='offline', api_key='key',
+                        base_url='http://localhost:1')
+
+
+def _responder(body: dict) -> str:
+    # answer q<i> with a<i>, fail q3
+    question = body['messages'][-1]['content']
+    if 'q3' in question:
+        raise RuntimeError('overloaded')
+    return f"answer: a{question.strip()[-1]}"
+
+
+def test_stub_lifecycle(tmp_path):
+    backend = StubBatchBackend(tmp_path / 'jobs', polls_to_complete=2)
+    input_path = tmp_path / 'requests.jsonl'
+    write_jsonl(input_path, [{"custom_id": "1", "method": "POST",
+                              "url": BATCH_ENDPOINT,
+                              "body": {"model": "m", "messages": [
+                                  {"role": "user", "content": "hi"}]}}])
+    job_id = backend.submit(input_path)
+    with pytest.raises(ValueError):
+        backend.download(job_id, tmp_path / 'results.jsonl')
+    assert backend.status(job_id) == 'in_progress'
+    assert backend.status(job_id) == 'completed'
+
+    # jobs survive the backend
+    backend = StubBatchBackend(tmp_path / 'jobs')
+    assert backend.status(job_id) == 'completed'
+    results = read_jsonl(backend.download(job_id, tmp_path / 'results.jsonl'))
+    assert results[0]['custom_id'] == '1'
+    assert results[0]['response']['status_code'] == 200
+    content = results[0]['response']['body']['choices'][0]['message']['content']
+    assert content == 'A'
+
+
+def test_execute_batch(tmp_path):
+    benchmark = make_benchmark(5, padding=0)
+    model = _offline_model()
+    prompt = QuestionOnlyPrompt()
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+    backend = StubBatchBackend(tmp_path / 'stub', responder=_responder)
+    evaluator.execute_batch(backend, str(tmp_path / 'jobs'), poll_interval=0)
+    assert backend.num_submitted == 1
+
+    requests = read_jsonl(tmp_path / 'jobs' / 'requests_00000.jsonl')
+    assert len(requests) == 5
+    assert requests[0]['body']['model'] == 'offline'
+
+    questions = benchmark.categories[0].tasks[0].questions
+    for question in questions:
+        answer = question.lm_answers[prompt.version_string()][
+            model.version_string]
+        if question.question == 'q3':
+            assert answer.iserror
+            assert 'overloaded' in answer.error_reason
+        else:
+            assert not answer.iserror
+            assert answer.score == 1.0
+    # all the tasks were ingested
+    assert not evaluator._tasks
+    state = json.loads((tmp_path / 'jobs' / 'state.json').read_text())
+    assert state['jobs'][0]['ingested']
+
+
+def test_execute_batch_resume(tmp_path, monkeypatch):
+    benchmark = make_benchmark(5, padding=0)
+    model = _offline_model()
+    prompt = QuestionOnlyPrompt()
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+
+    # interrupted while waiting on the job
+    backend = StubBatchBackend(tmp_path / 'stub', polls_to_complete=100)
+    calls = []
+
+    def _interrupt(_):
+        calls.append(1)
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as m:
+        m.setattr('lmeval.evaluator.time.sleep', _interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            evaluator.execute_batch(backend, str(tmp_path / 'jobs'),
+                                    poll_interval=0)
+    assert calls and backend.num_submitted == 1
+
+    # a new run resumes the job instead of submitting a new one
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+    backend = StubBatchBackend(tmp_path / 'stub', polls_to_complete=2)
+    evaluator.execute_batch(backend, str(tmp_path / 'jobs'), poll_interval=0)
+    assert backend.num_submitted == 0
+    questions = benchmark.categories[0].tasks[0].questions
+    for question in questions:
+        assert model.version_string in question.lm_answers[
+            prompt.version_string()]
+
+
+def test_execute_batch_failed_job(tmp_path):
+    benchmark = make_benchmark(2, padding=0)
+    model = _offline_model()
+    prompt = QuestionOnlyPrompt()
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+    backend = StubBatchBackend(tmp_path / 'stub', fail_job=True)
+    evaluator.execute_batch(backend, str(tmp_path / 'jobs'), poll_interval=0)
+    # tasks stay queued for another run
+    assert len(evaluator._tasks[model.version_string]) == 2
+    assert not benchmark.categories[0].tasks[0].questions[0].lm_answers
+
+
+def test_execute_batch_answers_are_not_stale(tmp_path):
+    benchmark = make_benchmark(3, padding=0)
+    model = _offline_model()
+    prompt = QuestionOnlyPrompt()
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+    backend = StubBatchBackend(tmp_path / 'stub')
+    evaluator.execute_batch(backend, str(tmp_path / 'jobs'), poll_interval=0,
+                            temperature=0.7)
+    # the generation parameters don't make the answers look stale
+    evaluator = Evaluator(benchmark)
+    report = evaluator.plan(model, prompt, display_report=False)
+    assert report[prompt.version_string()][0]['planned'] == 0
+    assert report[prompt.version_string()][0]['existing'] == 3
@@ -122,13 +122,18 @@ class HttpBaseModel(LMModel):
         log.debug('posting %s', str(data))
         for _ in range(0, self.runtime_vars['retries'] + 1):
             try:
+                start = time()
                 res = requests.post(query_uri,
                                     headers=self.runtime_vars.get('header'),
                                     json=data,
                                     timeout=self.runtime_vars.get('timeout'))
                 log.debug('returned: %s', res)
                 res.raise_for_status()
-                return json.loads(res.text)
+                response = json.loads(res.text)
+                if self.runtime_vars.get('recorder') is not None:
+                    self.runtime_vars['recorder'].record(
+                        data, response, time() - start)
+                return response
             except Exception as e:  # pylint: disable=broad-except
                 log.warning('POST encountered error %s', repr(e))
         raise e
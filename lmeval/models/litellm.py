@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import defaultdict
 from collections.abc import Generator
+import concurrent.futures
 import os
 import time
 import uuid
@@ -25,11 +27,14 @@ from litellm import completion, completion_cost, batch_completion
 from litellm import ModelResponse, CustomStreamWrapper
 
 from ..enums import FileType, Modality
+from ..estimator import estimate_tokens
 from .lmmodel import LMModel
-from .lmmodel import LMAnswer
+from .lmmodel import LMAnswer, merge_samples
 from ..media import Media
 from ..logger import log
 from ..question import GroupedQuestion
+from ..tracing import Span
+from ..enums import SpanType
 
 
 def update_generation_kwargs(generation_kwargs: dict, update: dict) -> dict:
@@ -39,6 +44,67 @@ def update_generation_kwargs(generation_kwargs: dict, update: dict) -> dict:
     return generation_kwargs
 
 
+def make_micro_batches(sizes: list[tuple[int, int]],
+                       max_batch_tokens: int,
+                       max_batch_media_bytes: int,
+                       max_batch_size: int) -> list[list[int]]:
+    """Group requests in order into size bounded micro-batches.
+
+    Args:
+        sizes: Estimated (tokens, media bytes) of each request.
+        max_batch_tokens: Maximum estimated tokens per micro-batch.
+        max_batch_media_bytes: Maximum media payload per micro-batch.
+        max_batch_size: Maximum number of requests per micro-batch.
+
+    Returns:
+        The requests indices of each micro-batch. A request exceeding the
+        limits on its own gets a micro-batch of its own.
+    """
+    batches = []
+    batch = []
+    batch_tokens = batch_bytes = 0
+    for idx, (tokens, media_bytes) in enumerate(sizes):
+        if batch and (len(batch) >= max_batch_size
+                      or batch_tokens + tokens > max_batch_tokens
+                      or batch_bytes + media_bytes > max_batch_media_bytes):
+            batches.append(batch)
+            batch = []
+            batch_tokens = batch_bytes = 0
+        batch.append(idx)
+        batch_tokens += tokens
+        batch_bytes += media_bytes
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def request_timing(resp: ModelResponse | Exception | None, start: float,
+                   end: float) -> tuple[float, float]:
+    """Client side timing of a request sent in a batch.
+
+    Batch completions only return once their slowest request is done, so
+    the (start, end) window of the batch is only used when litellm didn't
+    record the response time of the request itself.
+
+    Args:
+        resp: Response or error of the request.
+        start: Time the batch was sent.
+        end: Time the batch returned.
+    """
+    elapsed = getattr(resp, '_response_ms', None)
+    if isinstance(elapsed, (int, float)) and elapsed > 0:
+        return start, min(end, start + elapsed / 1000)
+    return start, end
+
+
+def is_retryable(error: Exception | None) -> bool:
+    "Whether a failed request may succeed if sent again"
+    # malformed, oversized or unauthorized requests fail the same way again
+    return not isinstance(error, (litellm.BadRequestError,
+                                  litellm.AuthenticationError,
+                                  litellm.NotFoundError))
+
+
 def proxy_make_model(model='gemini/gemini-2.0-flash-001',
                      proxy=None,
                      proxy_key=None,
@@ -80,7 +146,14 @@ class LiteLLMModel(LMModel):
                  api_key: Optional[str] = None,
                  max_workers: Optional[int] = 20,
                  benchmark_name: str = "unknown",
-                 disable_logging: bool = False):
+                 disable_logging: bool = False,
+                 store_raw_response: bool = True,
+                 max_batch_tokens: int = 200_000,
+                 max_batch_media_bytes: int = 20 * 1024 * 1024,
+                 max_batch_size: Optional[int] = None,
+                 max_retries: int = 2,
+                 retry_backoff: float = 1.0,
+                 supports_n: Optional[bool] = None):
         """Init a LiteLLMModel compatible model
 
         Args:
@@ -92,6 +165,18 @@ class LiteLLMModel(LMModel):
             api_key: Model API key. Defaults to "".
             max_workers: Number of workers to use for batch completion. Defaults to 100 (Litellm default).
             disble_logging: Disables litellm loggging
+            store_raw_response: Keep the full provider response in LMAnswer.raw_response.
+            Disable it to reduce memory and benchmark size on large runs.
+            max_batch_tokens: Maximum estimated prompt tokens per micro-batch
+            sent by batch_generate_text().
+            max_batch_media_bytes: Maximum media payload per micro-batch.
+            max_batch_size: Maximum requests per micro-batch. Defaults to max_workers.
+            max_retries: Number of times a failed batch request is retried on its own.
+            retry_backoff: Delay in seconds before the first retry, doubled
+            at each subsequent retry.
+            supports_n: If the provider returns several completions per
+            request (`n`). Otherwise samples are generated with concurrent
+            requests. Defaults to litellm supported parameters.
         """
 
         # clean up the name
@@ -110,6 +195,19 @@ class LiteLLMModel(LMModel):
         self.runtime_vars['is_custom'] = True if base_url else False
         self.runtime_vars['max_workers'] = max_workers
         self.runtime_vars['benchmark_name'] = benchmark_name
+        self.runtime_vars['store_raw_response'] = store_raw_response
+        self.runtime_vars['max_batch_tokens'] = max_batch_tokens
+        self.runtime_vars['max_batch_media_bytes'] = max_batch_media_bytes
+        self.runtime_vars['max_batch_size'] = max_batch_size or max_workers or 20
+        self.runtime_vars['max_retries'] = max_retries
+        self.runtime_vars['retry_backoff'] = retry_backoff
+        if supports_n is None:
+            try:
+                params = litellm.get_supported_openai_params(model=litellm_model)
+                supports_n = 'n' in (params or [])
+            except Exception:  # unknown model, let the provider decide
+                supports_n = True
+        self.runtime_vars['supports_n'] = supports_n
         if disable_logging:
             self.runtime_vars['no-log'] = True
 
@@ -121,23 +219,169 @@ class LiteLLMModel(LMModel):
             max_tokens: int = 4096,
             completions: int = 1
     ) -> Generator[Tuple[int, LMAnswer], None, None]:
+        """Generate the answers of prompts in size bounded micro-batches.
+
+        Prompts are grouped by estimated tokens and media payload, answers
+        are yielded as each micro-batch completes. Failed requests are
+        retried individually once every micro-batch is sent, so a single
+        failure neither fails nor delays the batch.
+        """
         model = self.runtime_vars['litellm_version_string']
         assert len(prompts) == len(
             medias), "prompts and medias should have the same length"
+        if completions > 1 and not self.runtime_vars.get('supports_n', True):
+            yield from self._batch_generate_samples(prompts, medias,
+                                                    temperature, max_tokens,
+                                                    completions)
+            return
         messages_batch = []
+        sizes = []
         for i, (prompt, media) in enumerate(zip(prompts, medias)):
             messages_batch.append(self._make_messages(prompt, media))
+            media_bytes = sum(len(m.content or b'') for m in media or [])
+            sizes.append((estimate_tokens(prompt), media_bytes))
+
+        batches = make_micro_batches(
+            sizes,
+            max_batch_tokens=self.runtime_vars.get('max_batch_tokens', 200_000),
+            max_batch_media_bytes=self.runtime_vars.get(
+                'max_batch_media_bytes', 20 * 1024 * 1024),
+            max_batch_size=self.runtime_vars.get('max_batch_size') or 20)
+        failures = {}
+        for batch in batches:
+            start = time.time()
+            try:
+                batch_responses = self._batch_completion(
+                    model, [messages_batch[i] for i in batch], temperature,
+                    max_tokens, completions)
+            except Exception as e:
+                log.warning(f"Batch completion of {len(batch)} requests failed: {e}")
+                batch_responses = [e for _ in batch]
+            end = time.time()
+
+            for i, resp in zip(batch, batch_responses):
+                timing = request_timing(resp, start, end)
+                if (not isinstance(resp, ModelResponse) and
+                        is_retryable(resp) and
+                        self.runtime_vars.get('max_retries', 2)):
+                    failures[i] = (resp, timing)
+                    continue
+                yield i, self._make_answer(resp, prompts[i], timing=timing)
+
+        for i, resp, timing in self._retry_completions(
+                model, messages_batch, failures, temperature, max_tokens,
+                completions):
+            yield i, self._make_answer(resp, prompts[i], timing=timing)
+
+    def _batch_generate_samples(
+            self, prompts: list[str], medias: list[list[Media]],
+            temperature: float, max_tokens: int,
+            completions: int) -> Generator[Tuple[int, LMAnswer], None, None]:
+        "Generate the samples of each prompt with concurrent requests"
+        expanded = [i for i in range(len(prompts)) for _ in range(completions)]
+        samples = defaultdict(list)
+        for j, answer in self.batch_generate_text(
+                [prompts[i] for i in expanded], [medias[i] for i in expanded],
+                temperature, max_tokens, completions=1):
+            i = expanded[j]
+            samples[i].append(answer)
+            if len(samples[i]) == completions:
+                yield i, merge_samples(samples.pop(i))
+
+    def batch_request(self,
+                      prompt: str,
+                      medias: list[Media] | Media | None = None,
+                      temperature: float = 0.0,
+                      max_tokens: int = 4096,
+                      completions: int = 1) -> dict:
+        "Body of the chat completion request sent through a provider batch API"
+        # batch APIs expect the provider model name
+        model = self.runtime_vars['litellm_version_string'].split('/', 1)[-1]
+        body = {"model": model,
+                "messages": self._make_messages(prompt, medias),
+                "temperature": temperature,
+                "max_tokens": max_tokens}
+        if completions > 1:
+            body["n"] = completions
+        return body
+
+    def batch_answer(self,
+                     result: dict | None,
+                     prompt: str = "",
+                     timing: tuple[float, float] | None = None) -> LMAnswer:
+        """Convert a provider batch API result line into an answer.
 
-        try:
-            batch_responses = self._batch_completion(model, messages_batch,
-                                                     temperature, max_tokens,
-                                                     completions)
-        except:
-            batch_responses = [None for _ in prompts]
+        Args:
+            result: Result line, None if the request has no result.
+            prompt: Prompt sent to the model.
+            timing: Job (submission, completion) times.
+        """
+        if result is None:
+            return self._make_answer(RuntimeError("No batch result"), prompt)
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            error = result.get("error") or response.get("body")
+            return self._make_answer(RuntimeError(f"Batch request failed: {error}"),
+                                     prompt)
+        return self._make_answer(ModelResponse(**response["body"]), prompt,
+                                 timing=timing)
+
+    def _retry_completions(
+            self, model: str, messages_batch: list[list[dict]],
+            failures: dict[int, tuple[Exception | None, tuple[float, float]]],
+            temperature: float, max_tokens: int, completions: int
+    ) -> Generator[tuple[int, ModelResponse | Exception | None,
+                         tuple[float, float]], None, None]:
+        """Send the failed batch requests again with exponential backoff.
+
+        Each round waits for the backoff delay once then sends all the
+        pending requests concurrently, successes are yielded as they
+        complete and failures are kept for the next round.
 
-        for i, resp in enumerate(batch_responses):
-            answer = self._make_answer(resp, prompts[i])
-            yield i, answer
+        Args:
+            model: litellm model name.
+            messages_batch: Messages of the batch requests.
+            failures: Error and timing of the failed requests keyed by
+            their index in `messages_batch`.
+
+        Yields:
+            The request index, its last response or error and the timing
+            of its last attempt.
+        """
+        delay = self.runtime_vars.get('retry_backoff', 1.0)
+        max_workers = self.runtime_vars.get('max_workers') or len(failures)
+        for attempt in range(self.runtime_vars.get('max_retries', 2)):
+            if not failures:
+                return
+            if delay:
+                time.sleep(delay * 2**attempt)
+
+            def _send(i: int):
+                start = time.time()
+                try:
+                    resp = self._completion(model=model,
+                                            messages=messages_batch[i],
+                                            temperature=temperature,
+                                            max_tokens=max_tokens,
+                                            completions=completions)
+                except Exception as e:
+                    resp = e
+                return resp, (start, time.time())
+
+            with concurrent.futures.ThreadPoolExecutor(
+                    min(max_workers, len(failures))) as executor:
+                futures = {executor.submit(_send, i): i for i in failures}
+                for future in concurrent.futures.as_completed(futures):
+                    i = futures[future]
+                    resp, timing = future.result()
+                    if isinstance(resp, ModelResponse) or not is_retryable(resp):
+                        del failures[i]
+                        yield i, resp, timing
+                    else:
+                        log.debug(f"retry {attempt + 1} failed: {resp}")
+                        failures[i] = (resp, timing)
+        for i, (resp, timing) in failures.items():
+            yield i, resp, timing
 
     def generate_text(self,
                       prompt: str,
@@ -149,6 +393,7 @@ class LiteLLMModel(LMModel):
         model = self.runtime_vars['litellm_version_string']
         messages = self._make_messages(prompt, medias)
 
+        start = time.time()
         try:
             resp = self._completion(model=model,
                                     messages=messages,
@@ -160,7 +405,7 @@ class LiteLLMModel(LMModel):
             print("Can't get response from model:", e)
             print(traceback.format_exc())
 
-        answer = self._make_answer(resp, prompt)
+        answer = self._make_answer(resp, prompt, timing=(start, time.time()))
         return answer
 
     def complete(
@@ -172,6 +417,7 @@ class LiteLLMModel(LMModel):
         **generation_kwargs,
     ) -> LMAnswer:
         # FIXME: finish multi-completion support
+        start = time.time()
         try:
             arguments = dict(
                 model=self.runtime_vars["litellm_version_string"],
@@ -187,7 +433,7 @@ class LiteLLMModel(LMModel):
             resp = None
             print("Can't get response from model:", traceback.format_exc())
 
-        answer = self._make_answer(resp)
+        answer = self._make_answer(resp, timing=(start, time.time()))
         return answer
 
     def _make_grouped_answer(self, answers: list[LMAnswer]) -> LMAnswer:
@@ -287,7 +533,17 @@ class LiteLLMModel(LMModel):
     def _make_answer(self,
                      resp: ModelResponse | CustomStreamWrapper | Exception
                      | None,
-                     prompt: str = "") -> LMAnswer:
+                     prompt: str = "",
+                     timing: tuple[float, float] | None = None) -> LMAnswer:
+        """Convert a litellm response into an answer.
+
+        Args:
+            resp: litellm response or the error raised by the request.
+            prompt: Prompt sent to the model.
+            timing: Client side (start, end) times of the request. Used for
+            the generation time and the network span.
+        """
+        parse_start = time.time()
         iserror = False
         error_reason = ""
         raw_response = ""
@@ -298,12 +554,13 @@ class LiteLLMModel(LMModel):
         total_time = 0
         model_name = self.runtime_vars['litellm_version_string']
         response_id = ""
+        samples = []
 
         if isinstance(resp, ModelResponse):
             response = resp
             response_id = resp.id
 
-            log.info("response: %s", response)
+            log.debug("response: %s", response)
             try:
                 answer_contents = [c.message.content for c in response.choices]
                 tool_calls = [c.message.tool_calls for c in response.choices]
@@ -316,6 +573,7 @@ class LiteLLMModel(LMModel):
                     if answer is not None:
                         raw_response = answer
                         break
+                samples = [a for a in answer_contents if a is not None]
 
             except Exception as e:
                 try:
@@ -324,7 +582,11 @@ class LiteLLMModel(LMModel):
                 except Exception as f:
                     iserror = True
                     error_reason = f"{error_reason} - {f}"
-            total_time = time.time() - response.created
+            if timing:
+                total_time = timing[1] - timing[0]
+            else:
+                # response.created is set by the server, clocks may differ
+                total_time = time.time() - response.created
             if not iserror:
                 try:
                     # compute cost for known models
@@ -370,8 +632,18 @@ class LiteLLMModel(LMModel):
                                     isunsafe=self.isunsafe,
                                     prompt=prompt,
                                     id=response_id)
-        if isinstance(resp, ModelResponse):
+        if len(samples) > 1:
+            # n > 1 completions
+            answer.samples = samples
+            answer.steps[0].shots = len(samples)
+        if isinstance(resp, ModelResponse) and self.runtime_vars.get(
+                'store_raw_response', True):
             answer.raw_response = resp.model_dump()
+        if timing:
+            answer.spans.append(Span(name=SpanType.network, start=timing[0],
+                                     end=timing[1]))
+        answer.spans.append(Span(name=SpanType.parse, start=parse_start,
+                                 end=time.time()))
         return answer
 
     def _batch_completion(self,
@@ -399,6 +671,7 @@ class LiteLLMModel(LMModel):
                 for messages in messages_batch
             ]
 
+        start = time.time()
         batch_responses = batch_completion(
             model=model,
             messages=messages_batch,
@@ -410,8 +683,27 @@ class LiteLLMModel(LMModel):
             max_workers=self.runtime_vars.get('max_workers'),
             extra_headers=self._make_headers(),
             **generation_kwargs)
+        if self.runtime_vars.get('recorder') is not None:
+            latency = time.time() - start
+            for messages, resp in zip(messages_batch, batch_responses):
+                self._record(messages, resp, latency, temperature, max_tokens,
+                             completions, generation_kwargs)
         return batch_responses
 
+    def _record(self, messages: list[dict], resp: ModelResponse,
+                latency: float, temperature: float, max_tokens: int,
+                completions: int, generation_kwargs: dict) -> None:
+        "Store the request/response pair in the recorder cassette"
+        if not isinstance(resp, ModelResponse):
+            return
+        request = dict(messages=messages,
+                       temperature=temperature,
+                       max_tokens=max_tokens,
+                       n=completions,
+                       tools=generation_kwargs.get('tools'))
+        self.runtime_vars['recorder'].record(request, resp.model_dump(),
+                                             latency)
+
     def _completion(self,
                     model: str,
                     messages: list[dict],
@@ -443,6 +735,7 @@ class LiteLLMModel(LMModel):
             messages = self._replace_system_messages(messages)
             messages = self._merge_messages_by_role(messages)
 
+        start = time.time()
         resp = completion(model=model,
                           messages=messages,
                           temperature=temperature,
@@ -452,6 +745,9 @@ class LiteLLMModel(LMModel):
                           base_url=self.runtime_vars.get('base_url'),
                           extra_headers=self._make_headers(),
                           **generation_kwargs)
+        if self.runtime_vars.get('recorder') is not None:
+            self._record(messages, resp, time.time() - start, temperature,
+                         max_tokens, completions, generation_kwargs)
         return resp
 
     def _replace_system_messages(self, messages: list[dict]) -> list[dict]:
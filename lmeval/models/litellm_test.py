@@ -12,7 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .litellm import LiteLLMModel, proxy_make_model
+import time
+
+import litellm
+from litellm import ModelResponse
+import pytest
+
+from lmeval.enums import SpanType
+from lmeval.tracing import spans_summary
+from .litellm import LiteLLMModel, make_micro_batches, proxy_make_model
 from .tests_utils import eval_single_text_generation, eval_batch_text_generation, eval_image_analysis, eval_pdf_analysis
 
 
@@ -38,3 +46,184 @@ def test_litellm_pdf_analysis():
     model = proxy_make_model(disable_logging=True)
     assert model
     eval_pdf_analysis(model)
+
+
+def _offline_model(**kwargs) -> LiteLLMModel:
+    return LiteLLMModel(model_version='offline', litellm_model='openai/offline',
+                        publisher='offline', api_key='key',
+                        base_url='http://localhost:1', retry_backoff=0,
+                        **kwargs)
+
+
+def _response(text: str) -> ModelResponse:
+    return ModelResponse(choices=[{"message": {"role": "assistant",
+                                               "content": text}}],
+                         usage={"prompt_tokens": 1, "completion_tokens": 1,
+                                "total_tokens": 2})
+
+
+def test_make_micro_batches():
+    sizes = [(10, 0), (10, 0), (10, 0), (50, 0), (1, 600), (1, 0)]
+    batches = make_micro_batches(sizes, max_batch_tokens=30,
+                                 max_batch_media_bytes=500, max_batch_size=2)
+    assert batches == [[0, 1], [2], [3], [4], [5]]
+    assert make_micro_batches([], 10, 10, 10) == []
+
+
+def test_batch_generate_text_isolates_failures():
+    model = _offline_model(max_batch_size=2, max_retries=2)
+    batches = []
+    retries = []
+
+    def batch_completion(model_name, messages_batch, *args):
+        batches.append(len(messages_batch))
+        responses = []
+        for messages in messages_batch:
+            prompt = messages[0]['content']
+            if prompt == 'boom':
+                raise RuntimeError('connection reset')
+            responses.append(RuntimeError('overloaded')
+                             if prompt == 'flaky' else _response(prompt.upper()))
+        return responses
+
+    def completion(model, messages, **kwargs):
+        prompt = messages[0]['content']
+        retries.append(prompt)
+        if prompt == 'flaky' and retries.count('flaky') < 2:
+            raise RuntimeError('still overloaded')
+        return _response(prompt.upper())
+
+    model._batch_completion = batch_completion
+    model._completion = completion
+    prompts = ['a', 'flaky', 'boom', 'b', 'c']
+    answers = dict(model.batch_generate_text(prompts, [[] for _ in prompts]))
+
+    assert batches == [2, 2, 1]
+    assert [answers[i].answer for i in range(5)] == ['A', 'FLAKY', 'BOOM', 'B', 'C']
+    assert not any(a.iserror for a in answers.values())
+    # the flaky request was retried twice, the failed batch once per request
+    assert sorted(retries[:3]) == ['b', 'boom', 'flaky']
+    assert retries[3:] == ['flaky']
+
+
+def test_batch_generate_text_retries_in_one_round():
+    model = _offline_model(max_batch_size=2, max_retries=1)
+    model._batch_completion = lambda model_name, messages_batch, *args: [
+        RuntimeError('overloaded') if m[0]['content'].startswith('fail')
+        else _response('ok') for m in messages_batch]
+
+    def completion(model, messages, **kwargs):
+        time.sleep(0.1)
+        return _response('retried')
+
+    model._completion = completion
+    prompts = ['fail0', 'a', 'fail1', 'b', 'fail2', 'c']
+    start = time.time()
+    answers = list(model.batch_generate_text(prompts, [[] for _ in prompts]))
+    # the successes of every micro-batch come before the retries, which are
+    # sent concurrently
+    assert [i for i, _ in answers[:3]] == [1, 3, 5]
+    assert sorted(i for i, _ in answers[3:]) == [0, 2, 4]
+    assert all(a.answer == 'retried' for _, a in answers[3:])
+    assert time.time() - start < 0.25
+
+
+def test_batch_generate_text_does_not_retry_bad_requests():
+    model = _offline_model(max_retries=3)
+    error = litellm.BadRequestError('prompt too long', model='offline',
+                                    llm_provider='openai')
+    model._batch_completion = lambda *args: [error, _response('ok')]
+
+    def completion(**kwargs):
+        raise AssertionError('bad requests should not be retried')
+    model._completion = completion
+
+    answers = dict(model.batch_generate_text(['x' * 100, 'ok'], [[], []]))
+    assert answers[0].iserror and 'prompt too long' in answers[0].error_reason
+    assert answers[1].answer == 'ok'
+
+
+def test_batch_generate_text_samples():
+    model = _offline_model(supports_n=True)
+    calls = []
+
+    def batch_completion(model_name, messages_batch, temperature, max_tokens,
+                         completions):
+        calls.append(completions)
+        return [ModelResponse(choices=[
+            {"message": {"role": "assistant", "content": f"s{i}"}}
+            for i in range(completions)]) for _ in messages_batch]
+
+    model._batch_completion = batch_completion
+    answers = dict(model.batch_generate_text(['a', 'b'], [[], []],
+                                             completions=3))
+    # all the samples are requested in one call
+    assert calls == [3]
+    assert answers[0].samples == ['s0', 's1', 's2']
+    assert answers[0].answer == 's0'
+    assert answers[0].steps[0].shots == 3
+
+
+def test_batch_generate_text_samples_without_n():
+    model = _offline_model(supports_n=False)
+    calls = []
+
+    def batch_completion(model_name, messages_batch, temperature, max_tokens,
+                         completions):
+        calls.append((len(messages_batch), completions))
+        return [_response(messages[0]['content'] + str(i))
+                for i, messages in enumerate(messages_batch)]
+
+    model._batch_completion = batch_completion
+    answers = dict(model.batch_generate_text(['a', 'b'], [[], []],
+                                             completions=2))
+    # samples are concurrent single completion requests
+    assert calls == [(4, 1)]
+    assert answers[0].samples == ['a0', 'a1']
+    assert answers[1].samples == ['b2', 'b3']
+    assert answers[1].steps[0].total_tokens == 4
+    assert answers[1].steps[0].shots == 2
+
+
+def test_batch_generate_text_request_timing():
+    model = _offline_model(max_batch_size=3, max_retries=1)
+
+    def timed(text: str, ms: float) -> ModelResponse:
+        resp = _response(text)
+        resp._response_ms = ms
+        return resp
+
+    def batch_completion(model_name, messages_batch, *args):
+        time.sleep(0.2)
+        return [timed('fast', 10), RuntimeError('overloaded'), timed('slow', 150)]
+
+    def completion(model, messages, **kwargs):
+        time.sleep(0.05)
+        return _response('retried')
+
+    model._batch_completion = batch_completion
+    model._completion = completion
+    answers = dict(model.batch_generate_text(['a', 'b', 'c'], [[], [], []]))
+    times = [answers[i].steps[0].execution_time for i in range(3)]
+    # each answer reports its own request, not the whole batch
+    assert times[0] == pytest.approx(0.01, abs=1e-3)
+    assert 0.05 <= times[1] < 0.15
+    assert times[2] == pytest.approx(0.15, abs=1e-3)
+    network = spans_summary(answers[2].spans)[SpanType.network.value]
+    assert network == pytest.approx(0.15, abs=1e-3)
+
+
+def test_batch_generate_text_retry_timing():
+    model = _offline_model(max_batch_size=2, max_retries=1)
+
+    def completion(model, messages, **kwargs):
+        time.sleep(0.1)
+        return _response('retried')
+
+    model._batch_completion = lambda *args: [RuntimeError('overloaded'),
+                                             _response('ok')]
+    model._completion = completion
+    answers = dict(model.batch_generate_text(['a', 'b'], [[], []]))
+    assert answers[0].steps[0].execution_time >= 0.1
+    # the retry timing doesn't leak to the next answers of the batch
+    assert answers[1].steps[0].execution_time < 0.05
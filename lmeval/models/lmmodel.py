@@ -22,6 +22,7 @@ import base64
 from ..custom_model import CustomModel
 from ..enums import Modality, ScorerType, StepType, MultiShotStrategy, TaskType
 from ..media import Media
+from ..tracing import Span
 
 
 class LMModel(CustomModel):
@@ -267,12 +268,14 @@ class LMAnswer(CustomModel):
     score: float = Field(default=0.0)
     additional_scores: Dict[ScorerType | str, float] = Field(default={})
     score_raw_data: Dict[str, Any] = Field(default={})
+    score_provenance: Dict[str, str] = Field(default_factory=dict,
+                                             description="Scorer version, answer and question hashes each score was computed from, keyed by 'score' or the additional scorer type")
 
     # executions steps
     steps: list[Step] = Field(default=[])
 
-    # model used
-    model: LMModel
+    # model used, None for answers recorded before a model was attached
+    model: LMModel | None
 
     # set of answers when grouped completion is used
     answer_set: list[LMAnswer] = Field(default_factory=list)
@@ -286,5 +289,42 @@ class LMAnswer(CustomModel):
     raw_response: dict = Field(default={},
                                description="Raw response from the model")
 
+    spans: list[Span] = Field(default_factory=list,
+                              description="Timing of the evaluation stages")
+
+    fingerprint: str = Field(default='',
+                             description="Hash of the model input, used to detect stale answers")
+
+    # multi-samples generation, see Task.num_shots
+    samples: list[str] = Field(default_factory=list,
+                               description="All the samples generated when multiple completions are requested")
+    sample_scores: list[float] = Field(default_factory=list,
+                                       description="Score of each sample")
+    sample_raw_data: list[Dict[str, Any]] = Field(default_factory=list,
+                                                  description="Scorer raw data of each sample")
+
     def __str__(self) -> str:
         return str(f"{self.model.name}: {self.answer}")
+
+
+def merge_samples(answers: list[LMAnswer]) -> LMAnswer:
+    """Merge single sample answers generated concurrently into one answer.
+
+    Used when the provider can't return several completions per request.
+    The steps usage and cost are summed, errored samples are dropped unless
+    they all failed.
+    """
+    valid = [answer for answer in answers if not answer.iserror]
+    if not valid:
+        return answers[0]
+    merged = valid[0].model_copy()
+    merged.samples = [answer.answer for answer in valid]
+    step = merged.steps[0].model_copy()
+    step.shots = len(valid)
+    step.total_tokens = sum(a.steps[0].total_tokens for a in valid)
+    step.prompt_tokens = sum(a.steps[0].prompt_tokens for a in valid)
+    step.completion_tokens = sum(a.steps[0].completion_tokens for a in valid)
+    step.cost = sum(a.steps[0].cost for a in valid)
+    step.execution_time = max(a.steps[0].execution_time for a in valid)
+    merged.steps = [step] + merged.steps[1:]
+    return merged
@@ -14,13 +14,21 @@
 
 """Mock model for testing."""
 
+import collections
 from collections.abc import Generator, Iterable
+import concurrent.futures
+import math
+import random
+import threading
+import time
 from typing import Dict, List, Tuple
 
+from lmeval.enums import SpanType
+from lmeval.estimator import estimate_tokens
 from lmeval.logger import log
 from lmeval.media import Media
-from lmeval.models.gemini import GeminiModel
 from lmeval.models.lmmodel import LMModel, LMAnswer
+from lmeval.tracing import Span
 
 
 class MockModel(LMModel):
@@ -29,6 +37,7 @@ class MockModel(LMModel):
   Attributes:
     request_response: Dictionary of request to response.
     default_response: Default response if no matching request is found.
+    latency: Simulated generation latency in seconds.
   """
 
   def __init__(
@@ -36,6 +45,7 @@ class MockModel(LMModel):
       model_version: str,
       request_response: Dict[str, str] | None = None,
       default_response: str | None = None,
+      latency: float = 0.0,
   ):
     super().__init__(
         name=" ".join(model_version.split("-")).capitalize(),
@@ -47,6 +57,7 @@ class MockModel(LMModel):
 
     if default_response is not None:
       self.runtime_vars["default_response"] = default_response
+    self.runtime_vars["latency"] = latency
 
   def set_request_response(self, value: Dict[str, str]):
     """Set the request to response mapping."""
@@ -64,22 +75,26 @@ class MockModel(LMModel):
       completions: int = 1) -> LMAnswer:
     # print(f"generate_text: {prompt}")
     id = "mock"
+    latency = self.runtime_vars.get("latency", 0.0)
+    if latency:
+      time.sleep(latency)
+    generation_time = latency or 0.2
     request_response = self.runtime_vars["request_response"]
     if prompt in request_response:
       answer = self._build_answer(request_response[prompt],
-                                 generation_time=0.2,
+                                 generation_time=generation_time,
                                  iserror=False,
                                  error_reason="",
                                  prompt=prompt, id=id)
     elif "default_response" in self.runtime_vars:
         default_response = self.runtime_vars["default_response"]
         answer = self._build_answer(default_response,
-                                   generation_time=0.2,
+                                   generation_time=generation_time,
                                    iserror=False,
                                    error_reason="",
                                    prompt=prompt, id=id)
     else:
-        answer = self._build_answer("", generation_time=0.2, iserror=True,
+        answer = self._build_answer("", generation_time=generation_time, iserror=True,
                                     id=id, error_reason="No matching request found")
 
     return answer
@@ -90,7 +105,8 @@ class MockModel(LMModel):
       completions: int = 1) -> Generator[Tuple[int, LMAnswer], None, None]:
     log.info(f"mock-batch_generate_text: {len(prompts)} prompts")
     for i, prompt in enumerate(prompts):
-      yield i, self.generate_text(prompt, medias[i], temperature, completions)
+      yield i, self.generate_text(prompt, medias[i], temperature, max_tokens,
+                                  completions)
 
 
 class MockGeminiModel(MockModel):
@@ -106,3 +122,199 @@ class MockGeminiModel(MockModel):
   ):
     super().__init__(model_version, request_response, default_response)
     self.batch_max_workers = batch_max_workers
+
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal",
+                         "exponential")
+
+
+class LoadTestModel(MockModel):
+  """Model simulating a provider under load, for offline load testing.
+
+  Each request draws its latency from a configurable distribution, can fail
+  with a generic or a rate limit (429) error and reports token counts and
+  costs. Batches are executed in parallel on a thread pool so the evaluator
+  concurrency, backpressure and checkpointing can be exercised without
+  network access. Each request draws from its own generator seeded by the
+  seed and the request key (prompt, batch index and attempt) so results are
+  reproducible for a given seed whatever the threads interleaving, except
+  for the capacity errors which depend on the actual concurrency.
+
+  Attributes:
+    latency: Mean latency in seconds.
+    latency_distribution: One of LATENCY_DISTRIBUTIONS.
+    latency_std: Spread of the distribution: standard deviation for normal
+      and lognormal, half width for uniform.
+    error_rate: Probability of a generic error.
+    rate_limit_rate: Probability of a 429 rate limit error.
+    capacity: Maximum number of concurrent requests accepted, requests above
+      it fail with a 429 error. None means unlimited.
+    completion_tokens: Number of tokens generated per sample.
+    input_cost: Cost per prompt token.
+    output_cost: Cost per completion token.
+    stream: Simulate streaming: the first token arrives after
+      `first_token_ratio` of the latency and a first byte span is recorded.
+    max_workers: Number of parallel requests in batch_generate_text.
+    seed: Random seed.
+  """
+
+  def __init__(
+      self,
+      model_version: str = "load-test",
+      default_response: str = "A",
+      latency: float = 0.0,
+      latency_distribution: str = "constant",
+      latency_std: float = 0.0,
+      error_rate: float = 0.0,
+      rate_limit_rate: float = 0.0,
+      capacity: int | None = None,
+      completion_tokens: int = 16,
+      input_cost: float = 0.0,
+      output_cost: float = 0.0,
+      stream: bool = False,
+      first_token_ratio: float = 0.3,
+      max_workers: int = 32,
+      seed: int = 0,
+  ):
+    if latency_distribution not in LATENCY_DISTRIBUTIONS:
+      raise ValueError(f"Unknown latency distribution {latency_distribution}, "
+                       f"use one of {LATENCY_DISTRIBUTIONS}")
+    super().__init__(model_version, default_response=default_response,
+                     latency=latency)
+    self.runtime_vars.update({
+        "latency_distribution": latency_distribution,
+        "latency_std": latency_std,
+        "error_rate": error_rate,
+        "rate_limit_rate": rate_limit_rate,
+        "capacity": capacity,
+        "completion_tokens": completion_tokens,
+        "input_cost": input_cost,
+        "output_cost": output_cost,
+        "stream": stream,
+        "first_token_ratio": first_token_ratio,
+        "max_workers": max_workers,
+        "seed": seed,
+        # attempts per request key, so retries get a new draw
+        "attempts": collections.Counter(),
+        "in_flight": 0,
+        "lock": threading.Lock(),
+        "stats": collections.Counter(),
+    })
+
+  @property
+  def stats(self) -> collections.Counter:
+    "Number of requests, errors, rate limits and max concurrency seen"
+    return self.runtime_vars["stats"]
+
+  def _request_rng(self, prompt: str, index: int = -1) -> random.Random:
+    "Random generator of a request, index is its position in the batch"
+    rv = self.runtime_vars
+    with rv["lock"]:
+      attempt = rv["attempts"][(prompt, index)]
+      rv["attempts"][(prompt, index)] += 1
+    return random.Random(f"{rv['seed']}-{index}-{attempt}-{prompt}")
+
+  def _draw_latency(self, rng: random.Random) -> float:
+    rv = self.runtime_vars
+    mean, std = rv["latency"], rv["latency_std"]
+    dist = rv["latency_distribution"]
+    if not mean or dist == "constant":
+      return mean
+    if dist == "uniform":
+      return rng.uniform(max(0.0, mean - std), mean + std)
+    if dist == "normal":
+      return max(0.0, rng.gauss(mean, std))
+    if dist == "lognormal":
+      # parametrized by the mean and std of the latency itself
+      sigma2 = math.log(1 + (std / mean) ** 2)
+      return rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+    return rng.expovariate(1 / mean)
+
+  def generate_text(
+      self,
+      prompt: str,
+      medias: List[Media] | Media = [],
+      temperature: float | None = 0.0,
+      max_tokens: int = 4096,
+      completions: int = 1) -> LMAnswer:
+    return self._generate(prompt, self._request_rng(prompt), max_tokens,
+                          completions)
+
+  def _generate(self, prompt: str, rng: random.Random, max_tokens: int,
+                completions: int) -> LMAnswer:
+    rv = self.runtime_vars
+    latency = self._draw_latency(rng)
+    error = None
+    with rv["lock"]:
+      rv["in_flight"] += 1
+      stats = rv["stats"]
+      stats["requests"] += 1
+      stats["max_in_flight"] = max(stats["max_in_flight"], rv["in_flight"])
+      over_capacity = rv["capacity"] is not None and rv["in_flight"] > rv["capacity"]
+
+    try:
+      roll = rng.random()
+      if over_capacity or roll < rv["rate_limit_rate"]:
+        error = "RateLimitError: 429 Too Many Requests"
+        latency = min(latency, 0.01)
+      elif roll < rv["rate_limit_rate"] + rv["error_rate"]:
+        error = "APIError: 500 Internal Server Error"
+
+      start = time.time()
+      first_byte = None
+      if rv["stream"] and not error:
+        time.sleep(latency * rv["first_token_ratio"])
+        first_byte = time.time()
+        time.sleep(latency * (1 - rv["first_token_ratio"]))
+      elif latency:
+        time.sleep(latency)
+      end = time.time()
+    finally:
+      with rv["lock"]:
+        rv["in_flight"] -= 1
+
+    if error:
+      with rv["lock"]:
+        stats["rate_limits" if "429" in error else "errors"] += 1
+      answer = self._build_answer("", generation_time=end - start,
+                                  iserror=True, error_reason=error,
+                                  prompt=prompt, id="load-test")
+    else:
+      prompt_tokens = estimate_tokens(prompt)
+      completion_tokens = min(rv["completion_tokens"], max_tokens) * completions
+      cost = (prompt_tokens * rv["input_cost"] +
+              completion_tokens * rv["output_cost"])
+      answer = self._build_answer(rv["default_response"],
+                                  generation_time=end - start,
+                                  total_tokens=prompt_tokens + completion_tokens,
+                                  prompt_tokens=prompt_tokens,
+                                  completion_tokens=completion_tokens,
+                                  cost=cost,
+                                  prompt=prompt, id="load-test")
+      if completions > 1:
+        answer.samples = [rv["default_response"]] * completions
+        answer.steps[0].shots = completions
+    answer.spans.append(Span(name=SpanType.network, start=start, end=end))
+    if first_byte:
+      answer.spans.append(Span(name=SpanType.first_byte, start=start,
+                               end=first_byte))
+    return answer
+
+  def batch_generate_text(
+      self, prompts: list[str], medias: list[list[Media] | Media] = [],
+      temperature: float | None = 0.0, max_tokens: int = 4096,
+      completions: int = 1) -> Generator[Tuple[int, LMAnswer], None, None]:
+    "Execute the prompts in parallel, answers are yielded as they complete"
+    if not prompts:
+      return
+    max_workers = min(self.runtime_vars["max_workers"], len(prompts))
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+      # generators are drawn in submission order to be reproducible
+      futures = {
+          executor.submit(self._generate, prompt,
+                          self._request_rng(prompt, i), max_tokens,
+                          completions): i
+          for i, prompt in enumerate(prompts)
+      }
+      for future in concurrent.futures.as_completed(futures):
+        yield futures[future], future.result()
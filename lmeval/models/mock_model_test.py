@@ -0,0 +1,117 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+import pytest
+
+from lmeval import Evaluator
+from lmeval.enums import SpanType
+from lmeval.fixtures import make_benchmark
+from lmeval.models.mock_model import LoadTestModel
+from lmeval.prompts import QuestionOnlyPrompt
+
+
+def _errors(model, num_prompts=300):
+    answers = dict(model.batch_generate_text(["hello"] * num_prompts))
+    return [answers[i].error_reason for i in range(num_prompts)]
+
+
+def test_load_test_model_parallel_batch():
+    model = LoadTestModel(latency=0.02, max_workers=50)
+    start = time.time()
+    answers = list(model.batch_generate_text(["some prompt"] * 200))
+    # sequential execution would take 4s
+    assert time.time() - start < 2
+    assert sorted(i for i, _ in answers) == list(range(200))
+    assert model.stats["max_in_flight"] > 1
+
+
+def test_load_test_model_errors_are_seeded():
+    model = LoadTestModel(error_rate=0.2, rate_limit_rate=0.1, seed=3)
+    errors = _errors(model)
+    num_429 = sum("429" in e for e in errors)
+    num_500 = sum("500" in e for e in errors)
+    assert 10 < num_429 < 60
+    assert 30 < num_500 < 100
+    assert model.stats["rate_limits"] == num_429
+    # same seed, same failures
+    assert _errors(LoadTestModel(error_rate=0.2, rate_limit_rate=0.1,
+                                 seed=3)) == errors
+
+
+def test_load_test_model_seeded_across_threads():
+    def run():
+        model = LoadTestModel(latency=0.002, latency_std=0.002,
+                              latency_distribution="exponential",
+                              error_rate=0.3, max_workers=16, seed=5)
+        return _errors(model, 64) + _errors(model, 64)
+
+    first = run()
+    assert first == run()
+    # a new attempt of the same request gets a new draw
+    assert first[:64] != first[64:]
+
+
+def test_load_test_model_completions():
+    model = LoadTestModel(default_response="b", completion_tokens=4)
+    answers = dict(model.batch_generate_text(["p"] * 3, completions=3))
+    for answer in answers.values():
+        assert answer.samples == ["b"] * 3
+        assert answer.steps[0].shots == 3
+        assert answer.steps[0].completion_tokens == 12
+    assert model.generate_text("p").samples == []
+
+
+def test_load_test_model_capacity():
+    model = LoadTestModel(latency=0.05, capacity=4, max_workers=16)
+    errors = _errors(model, 32)
+    assert any("429" in e for e in errors)
+    assert sum(not e for e in errors) >= 4
+
+
+def test_load_test_model_tokens_cost_and_streaming():
+    model = LoadTestModel(latency=0.01, completion_tokens=10, input_cost=0.1,
+                          output_cost=1.0, stream=True)
+    answer = model.generate_text("x" * 40)
+    step = answer.steps[0]
+    assert step.prompt_tokens == 10
+    assert step.completion_tokens == 10
+    assert step.cost == pytest.approx(11.0)
+    names = [span.name for span in answer.spans]
+    assert names == [SpanType.network.value, SpanType.first_byte.value]
+    assert answer.spans[1].duration < answer.spans[0].duration
+
+    with pytest.raises(ValueError):
+        LoadTestModel(latency_distribution="unknown")
+
+
+def test_load_test_model_distributions():
+    for dist in ("uniform", "normal", "lognormal", "exponential"):
+        model = LoadTestModel(latency=0.005, latency_std=0.002,
+                              latency_distribution=dist)
+        times = [a.steps[0].execution_time
+                 for _, a in model.batch_generate_text(["p"] * 20)]
+        assert all(t >= 0 for t in times)
+
+
+def test_load_test_model_with_evaluator():
+    benchmark = make_benchmark(200)
+    model = LoadTestModel(default_response="a", error_rate=0.1)
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, QuestionOnlyPrompt(), display_report=False,
+                   max_evaluations_per_task=200)
+    evaluator.execute(chunk_size=32)
+    assert evaluator.num_processed == 200
+    assert model.stats["requests"] == 200
@@ -0,0 +1,318 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Record and replay model requests without network access.
+
+A `Cassette` stores request/response pairs captured from real providers.
+Models record into it when `enable_recording()` is used, and a `StubServer`
+replays it through a local OpenAI compatible HTTP endpoint that
+`LiteLLMModel` and `HttpBaseModel` can point to via their `base_url`.
+"""
+
+from collections import defaultdict
+import gzip
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import random
+import threading
+import time
+import uuid
+from typing import Any
+
+from ..logger import log
+
+CASSETTE_VERSION = 1
+
+# request fields that change the model output
+KEY_FIELDS = ("messages", "temperature", "max_tokens", "n", "tools", "contents",
+              "generation_config")
+
+
+def request_key(request: dict) -> str:
+    """Stable key identifying a request regardless of the model name,
+    credentials or endpoint it was sent to."""
+    data = {k: request.get(k) for k in KEY_FIELDS if request.get(k) is not None}
+    # litellm sends n=1 implicitly while some clients omit it
+    if data.get("n") == 1:
+        del data["n"]
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"),
+                           default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+class Cassette():
+    """Recorded request/response pairs.
+
+    Identical requests recorded several times are replayed in the recording
+    order, cycling once exhausted, so replays are deterministic.
+    """
+
+    def __init__(self) -> None:
+        self.entries: dict[str, list[dict]] = defaultdict(list)
+        self._cursors: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.entries.values())
+
+    def record(self, request: dict, response: dict, latency: float = 0.0) -> None:
+        "Add a request/response pair along with its observed latency"
+        key = request_key(request)
+        with self._lock:
+            self.entries[key].append({"response": response,
+                                      "latency": latency})
+
+    def lookup(self, request: dict) -> dict | None:
+        "Return the next recorded entry for the request or None"
+        key = request_key(request)
+        with self._lock:
+            entries = self.entries.get(key)
+            if not entries:
+                return None
+            idx = self._cursors[key] % len(entries)
+            self._cursors[key] += 1
+            return entries[idx]
+
+    def rewind(self) -> None:
+        "Restart the replay from the first recorded responses"
+        with self._lock:
+            self._cursors.clear()
+
+    def save(self, path: str | Path) -> None:
+        "Save the cassette as compressed JSON"
+        data = {"version": CASSETTE_VERSION, "entries": self.entries}
+        payload = json.dumps(data, separators=(",", ":"), default=str)
+        Path(path).write_bytes(gzip.compress(payload.encode()))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Cassette":
+        data = json.loads(gzip.decompress(Path(path).read_bytes()))
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')}")
+        cassette = cls()
+        cassette.entries.update(data["entries"])
+        return cassette
+
+
+def enable_recording(model, cassette: Cassette) -> Cassette:
+    """Record all the requests made by a model in cassette.
+
+    Supported by `LiteLLMModel` and `HttpBaseModel` subclasses.
+    """
+    model.runtime_vars['recorder'] = cassette
+    return cassette
+
+
+def disable_recording(model) -> None:
+    model.runtime_vars.pop('recorder', None)
+
+
+class LatencyProfile():
+    """Latency applied by the stub server to each response.
+
+    Args:
+        scale: Multiplier applied to the recorded latency, 0 disables it.
+        fixed: Latency in seconds used for unrecorded responses, and for
+        all the responses when scale is 0.
+        jitter: Relative random variation applied to the latency.
+        seed: Random seed for the jitter.
+    """
+
+    def __init__(self, scale: float = 0.0, fixed: float = 0.0,
+                 jitter: float = 0.0, seed: int = 0) -> None:
+        self.scale = scale
+        self.fixed = fixed
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def latency(self, recorded: float | None) -> float:
+        if recorded is not None and self.scale:
+            latency = recorded * self.scale
+        else:
+            latency = self.fixed
+        if self.jitter and latency:
+            with self._lock:
+                latency *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, latency)
+
+
+def chat_completion_response(content: str, model: str, prompt: str) -> dict:
+    "OpenAI chat completion response for content"
+    prompt_tokens = max(1, len(prompt) // 4)
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+def messages_text(messages: list[dict]) -> str:
+    texts = []
+    for message in messages or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+        elif isinstance(content, list):
+            texts.extend(c.get("text", "") for c in content
+                         if isinstance(c, dict))
+    return "\n".join(texts)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: "_StubHTTPServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        log.debug("stub server: " + format, *args)
+
+    def _send_json(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list",
+                                  "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+        stub = self.server.stub
+        stub._count_request()
+        entry = stub.cassette.lookup(request) if stub.cassette else None
+
+        if self.path.endswith("/chat/completions"):
+            if entry:
+                response = entry["response"]
+            elif stub.strict:
+                self._send_json(404, {"error": {"message": "request not recorded"}})
+                return
+            else:
+                response = chat_completion_response(
+                    stub.default_response, request.get("model", "stub"),
+                    messages_text(request.get("messages")))
+        elif self.path.endswith(":query"):
+            # HttpBaseModel (generateContent like) payloads
+            if entry:
+                response = entry["response"]
+            elif stub.strict:
+                self._send_json(404, {"error": {"message": "request not recorded"}})
+                return
+            else:
+                response = {"candidates": [{"content": {"parts": [{
+                    "text": stub.default_response}]}}]}
+        else:
+            self._send_json(404, {"error": {"message": f"unknown route {self.path}"}})
+            return
+
+        latency = stub.latency_profile.latency(entry["latency"] if entry else None)
+        if latency:
+            time.sleep(latency)
+        self._send_json(200, response)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "StubServer"
+
+
+class StubServer():
+    """Local in-process OpenAI compatible server replaying a cassette.
+
+    Routes:
+        POST {base_url}/chat/completions: OpenAI chat completions.
+        POST {base_url}:query: HttpBaseModel queries.
+        GET {base_url}/models: models listing.
+
+    Unrecorded requests are answered with `default_response` unless strict
+    is set, in which case they fail with a 404.
+
+    Example:
+        with StubServer(Cassette.load("run.cassette")) as server:
+            model = LiteLLMModel(model_version="replay",
+                                 litellm_model="openai/replay",
+                                 publisher="replay", api_key="stub",
+                                 base_url=server.base_url)
+    """
+
+    def __init__(self,
+                 cassette: Cassette | None = None,
+                 latency_profile: LatencyProfile | None = None,
+                 default_response: str = "A",
+                 strict: bool = False,
+                 host: str = "127.0.0.1",
+                 port: int = 0) -> None:
+        self.cassette = cassette
+        self.latency_profile = latency_profile or LatencyProfile()
+        self.default_response = default_response
+        self.strict = strict
+        self.num_requests = 0
+        self._counter_lock = threading.Lock()
+        self._httpd = _StubHTTPServer((host, port), _StubHandler)
+        self._httpd.stub = self
+        self._thread: threading.Thread | None = None
+
+    def _count_request(self) -> None:
+        with self._counter_lock:
+            self.num_requests += 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                            name="lmeval-stub-server",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,95 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from lmeval.models.httpmodel import HttpBaseModel
+from lmeval.models.litellm import LiteLLMModel
+from lmeval.models.replay import Cassette, LatencyProfile, StubServer
+from lmeval.models.replay import enable_recording, request_key
+
+
+def _litellm_model(server: StubServer) -> LiteLLMModel:
+    return LiteLLMModel(model_version='stub', litellm_model='openai/stub',
+                        publisher='stub', api_key='stub',
+                        base_url=server.base_url)
+
+
+def test_request_key():
+    msg = [{"role": "user", "content": "hi"}]
+    assert request_key({"messages": msg, "n": 1}) == request_key(
+        {"messages": msg, "model": "other", "api_key": "x"})
+    assert request_key({"messages": msg}) != request_key(
+        {"messages": msg, "temperature": 1})
+
+
+def test_record_and_replay(tmp_path):
+    cassette = Cassette()
+    # the first server plays the role of the real provider
+    with StubServer(default_response="recorded answer") as provider:
+        model = _litellm_model(provider)
+        enable_recording(model, cassette)
+        answer = model.generate_text("What is the answer?")
+        assert answer.answer == "recorded answer"
+        answers = dict(model.batch_generate_text(["q1", "q2"], [[], []]))
+        assert answers[1].answer == "recorded answer"
+    assert len(cassette) == 3
+
+    path = tmp_path / "run.cassette"
+    cassette.save(path)
+    replayed = Cassette.load(path)
+    with StubServer(replayed, default_response="not recorded",
+                    strict=True) as server:
+        model = _litellm_model(server)
+        answer = model.generate_text("What is the answer?")
+        assert answer.answer == "recorded answer"
+        assert not answer.iserror
+        # unrecorded requests fail in strict mode
+        assert model.generate_text("unknown").iserror
+        assert server.num_requests >= 2
+
+
+def test_latency_profile():
+    cassette = Cassette()
+    request = {"messages": [{"role": "user", "content": "hi"}]}
+    cassette.record(request, {"candidates": [{"content": {"parts": [
+        {"text": "hello"}]}}]}, latency=1.0)
+    profile = LatencyProfile(scale=0.1)
+    assert profile.latency(1.0) == 0.1
+    assert LatencyProfile(fixed=0.2).latency(None) == 0.2
+
+    with StubServer(latency_profile=LatencyProfile(fixed=0.1)) as server:
+        model = HttpBaseModel(model_version='stub', publisher='stub',
+                              modalities=None, base_url=server.base_url,
+                              retries=0)
+        start = time.time()
+        res = model._post_query("hello")
+        assert time.time() - start >= 0.1
+        assert res['candidates'][0]['content']['parts'][0]['text'] == "A"
+
+
+def test_http_model_recording():
+    cassette = Cassette()
+    with StubServer(default_response="first") as server:
+        model = HttpBaseModel(model_version='stub', publisher='stub',
+                              modalities=None, base_url=server.base_url,
+                              retries=0)
+        enable_recording(model, cassette)
+        model._post_query("hello")
+    with StubServer(cassette, default_response="second") as server:
+        model = HttpBaseModel(model_version='stub', publisher='stub',
+                              modalities=None, base_url=server.base_url,
+                              retries=0)
+        res = model._post_query("hello")
+        assert res['candidates'][0]['content']['parts'][0]['text'] == "first"
@@ -0,0 +1,64 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Run the lmeval performance suite: python -m lmeval.perf --help"""
+
+from pathlib import Path
+from typing import Optional
+
+import typer
+
+from lmeval.perf.suite import DEFAULT_THRESHOLD, compare_results, load_results
+from lmeval.perf.suite import run_suite, save_results
+
+
+def app(output: Path = typer.Option("perf.json", help="Results JSON file"),
+        sizes: str = typer.Option("1000,10000",
+                                  help="Comma separated benchmark sizes"),
+        cases: Optional[str] = typer.Option(None,
+                                            help="Comma separated cases to run"),
+        repeat: int = typer.Option(3, help="Timed runs per case"),
+        latency: float = typer.Option(0.0, help="Simulated model latency (s)"),
+        baseline: Optional[Path] = typer.Option(
+            None, exists=True, help="Baseline results to compare with"),
+        threshold: float = typer.Option(DEFAULT_THRESHOLD,
+                                        help="Allowed slowdown ratio")):
+    """
+    Benchmark lmeval hot paths and check for regressions.
+    """
+    results = run_suite(sizes=[int(s) for s in sizes.split(",")],
+                        cases=cases.split(",") if cases else None,
+                        repeat=repeat,
+                        latency=latency)
+    save_results(results, output)
+    for key, result in results["results"].items():
+        typer.echo(f"{key:<28} median {result['median']:.4f}s")
+    typer.echo(f"Results saved to {output}")
+
+    if baseline:
+        regressions = compare_results(load_results(baseline), results,
+                                      threshold=threshold)
+        for reg in regressions:
+            typer.echo(f"REGRESSION {reg['case']}: {reg['baseline']:.4f}s -> "
+                       f"{reg['current']:.4f}s ({reg['ratio']:.2f}x)")
+        if regressions:
+            raise typer.Exit(code=1)
+
+
+def main():
+    typer.run(app)
+
+
+if __name__ == "__main__":
+    main()
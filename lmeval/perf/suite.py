@@ -0,0 +1,322 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro and macro benchmarks of lmeval hot paths.
+
+Each case is timed `repeat` times on a freshly built synthetic benchmark and
+the results are stored as JSON so they can be compared against a baseline
+with per case regression thresholds.
+"""
+
+from collections.abc import Callable
+from importlib import metadata
+import json
+from pathlib import Path
+import platform
+import statistics
+import tempfile
+import time
+
+from lmeval.benchmark import load_benchmark
+from lmeval.enums import ScorerType
+from lmeval.evaluator import Evaluator
+from lmeval.logger import log
+from lmeval.models.mock_model import MockModel
+from lmeval.perf.synthetic import add_synthetic_answers, make_synthetic_benchmark
+from lmeval.prompts import MultiChoicesPrompt, QuestionOnlyPrompt
+from lmeval.scorers import get_scorer
+from lmeval.template_engine import TemplateEngine
+
+DEFAULT_SIZES = (1000, 10000)
+DEFAULT_THRESHOLD = 0.25  # 25% slower is a regression
+# differences below this are considered noise (in seconds)
+MIN_DELTA = 0.005
+
+# case name -> setup(size, params) returning the callable to time, params
+# include a scratch `tmp_dir` removed once the run is timed
+CASES: dict[str, Callable[[int, dict], Callable[[], None]]] = {}
+
+
+def register_case(name: str):
+    "Register a performance case"
+    def decorator(fn):
+        CASES[name] = fn
+        return fn
+    return decorator
+
+
+def _questions(benchmark, task_type: str) -> list:
+    return [(question, task)
+            for category in benchmark.categories
+            for task in category.tasks if task.type == task_type
+            for question in task.questions]
+
+
+@register_case("template_render")
+def _template_render(size: int, params: dict):
+    benchmark = make_synthetic_benchmark(size)
+    pairs = _questions(benchmark, "text_generation")
+    engine = TemplateEngine(QuestionOnlyPrompt().template)
+
+    def run():
+        for question, task in pairs:
+            engine.render(question=question, task=task)
+    return run
+
+
+@register_case("multichoices_render")
+def _multichoices_render(size: int, params: dict):
+    benchmark = make_synthetic_benchmark(size)
+    pairs = _questions(benchmark, "multiple_choices")
+    prompt = MultiChoicesPrompt(use_original_letters=False)
+
+    def run():
+        for question, task in pairs:
+            prompt.render(question, task)
+    return run
+
+
+@register_case("multichoices_render_layout")
+def _multichoices_render_layout(size: int, params: dict):
+    benchmark = make_synthetic_benchmark(size)
+    pairs = _questions(benchmark, "multiple_choices")
+    prompt = MultiChoicesPrompt(use_original_letters=False)
+    prompt.precompute_layouts([question for question, _ in pairs])
+
+    def run():
+        for question, task in pairs:
+            prompt.render_layout(question, task)
+    return run
+
+
+@register_case("plan")
+def _plan(size: int, params: dict):
+    benchmark = make_synthetic_benchmark(size)
+    evaluator = Evaluator(benchmark)
+    models = [MockModel(model_version=f"mock-{i}") for i in range(2)]
+    prompts = [QuestionOnlyPrompt(),
+               MultiChoicesPrompt(use_original_letters=False)]
+
+    def run():
+        evaluator.plan(models, prompts, display_report=False,
+                       max_evaluations_per_task=size)
+    return run
+
+
+@register_case("execute")
+def _execute(size: int, params: dict):
+    benchmark = make_synthetic_benchmark(size)
+    evaluator = Evaluator(benchmark)
+    model = MockModel(model_version="mock", default_response="a",
+                      latency=params.get("latency", 0.0))
+    evaluator.plan(model, [QuestionOnlyPrompt(),
+                           MultiChoicesPrompt(use_original_letters=False)],
+                   display_report=False, max_evaluations_per_task=size)
+
+    def run():
+        evaluator.execute()
+    return run
+
+
+def _save_case(size: int, params: dict, with_media: bool):
+    tmp = params["tmp_dir"]
+    benchmark = add_synthetic_answers(
+        make_synthetic_benchmark(size, media_dir=tmp if with_media else None))
+    path = str(Path(tmp) / "bench.db")
+
+    def run():
+        benchmark.save(path, use_tempfile=False)
+    return run
+
+
+def _load_case(size: int, params: dict, with_media: bool):
+    tmp = params["tmp_dir"]
+    benchmark = add_synthetic_answers(
+        make_synthetic_benchmark(size, media_dir=tmp if with_media else None))
+    path = str(Path(tmp) / "bench.db")
+    benchmark.save(path, use_tempfile=False)
+
+    def run():
+        load_benchmark(path, use_tempfile=False)
+    return run
+
+
+register_case("save")(lambda size, params: _save_case(size, params, False))
+register_case("save_media")(lambda size, params: _save_case(size, params, True))
+register_case("load")(lambda size, params: _load_case(size, params, False))
+register_case("load_media")(lambda size, params: _load_case(size, params, True))
+
+
+@register_case("to_records")
+def _to_records(size: int, params: dict):
+    benchmark = add_synthetic_answers(make_synthetic_benchmark(size))
+    return benchmark.to_records
+
+
+@register_case("get_stats")
+def _get_stats(size: int, params: dict):
+    benchmark = add_synthetic_answers(make_synthetic_benchmark(size))
+    return benchmark.get_stats
+
+
+@register_case("ngram_scoring")
+def _ngram_scoring(size: int, params: dict):
+    benchmark = add_synthetic_answers(make_synthetic_benchmark(size))
+    batches = []
+    for question, task in _questions(benchmark, "text_generation"):
+        for answers in question.lm_answers.values():
+            for answer in answers.values():
+                answer.answer = f"{question.question} {answer.answer}"
+                batches.append((answer, question))
+    model_answers = [answer for answer, _ in batches]
+    questions = [question for _, question in batches]
+    scorers = [get_scorer(t) for t in (ScorerType.blue, ScorerType.rouge,
+                                       ScorerType.meteor)]
+
+    def run():
+        for scorer in scorers:
+            scorer.batch_score(model_answers, questions, None)
+    return run
+
+
+@register_case("text_scoring")
+def _text_scoring(size: int, params: dict):
+    benchmark = add_synthetic_answers(make_synthetic_benchmark(size))
+    batches = [(answer, question)
+               for question, task in _questions(benchmark, "text_generation")
+               for answers in question.lm_answers.values()
+               for answer in answers.values()]
+    model_answers = [answer for answer, _ in batches]
+    questions = [question for _, question in batches]
+    scorers = [get_scorer(t) for t in (ScorerType.contain_text_insensitive,
+                                       ScorerType.text_exact_insensitive,
+                                       ScorerType.text_regex_insensitive)]
+    scorers[-1].regex = r"(\w+)$"
+
+    def run():
+        for scorer in scorers:
+            scorer.batch_score(model_answers, questions, None)
+    return run
+
+
+@register_case("code_execution")
+def _code_execution(size: int, params: dict):
+    from lmeval.scorers.code_execution import execute_batch, get_pool  # pylint: disable=import-outside-toplevel
+    get_pool()  # workers start-up is not part of the timing
+    jobs = [("def square(x):\n    return x * x\n",
+             [f"assert square({i}) == {i * i}"]) for i in range(size)]
+
+    def run():
+        execute_batch(jobs)
+    return run
+
+
+def run_suite(sizes: list[int] | tuple[int, ...] = DEFAULT_SIZES,
+              cases: list[str] | None = None,
+              repeat: int = 3,
+              latency: float = 0.0) -> dict:
+    """Run the performance cases.
+
+    Args:
+        sizes: Number of questions of the synthetic benchmarks.
+        cases: Cases to run, defaults to all the registered ones.
+        repeat: Number of timed runs per case and size.
+        latency: Simulated model latency in seconds for the execute case.
+
+    Returns:
+        Results keyed by `case/size` with the metadata of the run.
+    """
+    cases = cases or list(CASES)
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown cases {sorted(unknown)}, available: {list(CASES)}")
+    params = {"latency": latency}
+
+    results = {}
+    for name in cases:
+        for size in sizes:
+            runs = []
+            for _ in range(repeat):
+                # fresh state for each run so caches don't leak across runs
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    fn = CASES[name](size, {**params, "tmp_dir": tmp_dir})
+                    start = time.perf_counter()
+                    fn()
+                    runs.append(time.perf_counter() - start)
+            median = statistics.median(runs)
+            results[f"{name}/{size}"] = {
+                "case": name,
+                "size": size,
+                "runs": runs,
+                "min": min(runs),
+                "median": median,
+                "per_item": median / size,
+            }
+            log.info(f"{name}/{size}: {median:.4f}s")
+
+    try:
+        version = metadata.version("lmeval-framework")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    return {
+        "metadata": {
+            "lmeval": version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "repeat": repeat,
+            "latency": latency,
+        },
+        "results": results
+    }
+
+
+def compare_results(baseline: dict,
+                    current: dict,
+                    threshold: float = DEFAULT_THRESHOLD,
+                    thresholds: dict[str, float] | None = None) -> list[dict]:
+    """Find the cases that regressed compared to a baseline.
+
+    Args:
+        baseline: Results of a previous run_suite().
+        current: Results of the run to check.
+        threshold: Maximum allowed slowdown ratio, 0.25 means 25% slower.
+        thresholds: Per case thresholds overriding the default one.
+
+    Returns:
+        The regressions with their baseline and current median times.
+    """
+    thresholds = thresholds or {}
+    regressions = []
+    for key, result in current["results"].items():
+        if key not in baseline["results"]:
+            continue
+        base = baseline["results"][key]["median"]
+        cur = result["median"]
+        limit = thresholds.get(key, thresholds.get(result["case"], threshold))
+        if cur - base > MIN_DELTA and cur > base * (1 + limit):
+            regressions.append({"case": key,
+                                "baseline": base,
+                                "current": cur,
+                                "ratio": cur / base if base else float("inf"),
+                                "threshold": limit})
+    return regressions
+
+
+def save_results(results: dict, path: str | Path) -> None:
+    Path(path).write_text(json.dumps(results, indent=2))
+
+
+def load_results(path: str | Path) -> dict:
+    return json.loads(Path(path).read_text())
@@ -0,0 +1,57 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+
+import pytest
+
+from lmeval.perf import CASES, compare_results, make_synthetic_benchmark
+from lmeval.perf import run_suite
+
+
+def test_synthetic_benchmark_is_reproducible():
+    b1 = make_synthetic_benchmark(50)
+    b2 = make_synthetic_benchmark(50)
+    assert b1.get_stats()['questions'] == 50
+    q1 = [q.question for c in b1.categories for t in c.tasks for q in t.questions]
+    q2 = [q.question for c in b2.categories for t in c.tasks for q in t.questions]
+    assert q1 == q2
+
+
+def test_run_suite_all_cases():
+    results = run_suite(sizes=[32], repeat=1)
+    assert set(r['case'] for r in results['results'].values()) == set(CASES)
+    for result in results['results'].values():
+        assert result['median'] > 0
+
+    with pytest.raises(ValueError):
+        run_suite(sizes=[32], cases=['unknown'])
+
+
+def test_run_suite_removes_temporary_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    run_suite(sizes=[8], repeat=2, cases=['save_media', 'load_media'])
+    assert not list(tmp_path.iterdir())
+
+
+def test_compare_results():
+    def res(median):
+        return {"results": {"plan/1000": {"case": "plan", "median": median}}}
+
+    assert not compare_results(res(1.0), res(1.1))
+    regressions = compare_results(res(1.0), res(1.5))
+    assert regressions[0]['case'] == "plan/1000"
+    assert not compare_results(res(1.0), res(1.5), thresholds={"plan": 1.0})
+    # tiny absolute differences are noise
+    assert not compare_results(res(0.001), res(0.003))
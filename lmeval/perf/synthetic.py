@@ -0,0 +1,132 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Synthetic benchmarks used to measure lmeval performance."""
+
+from pathlib import Path
+import random
+
+from lmeval.benchmark import Benchmark, Category
+from lmeval.enums import ScorerType, TaskType
+from lmeval.models.mock_model import MockModel
+from lmeval.prompts import MultiChoicesPrompt, QuestionOnlyPrompt
+from lmeval.question import Question, QuestionSource
+from lmeval.scorers import get_scorer
+from lmeval.task import Task
+
+WORDS = ("alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo "
+         "lima mike november oscar papa quebec romeo sierra tango").split()
+
+# smallest valid png: used as media payload
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000001e221bc33000000"
+    "0049454e44ae426082")
+
+
+def _sentence(rng: random.Random, num_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(num_words))
+
+
+def make_synthetic_benchmark(num_questions: int,
+                             num_categories: int = 4,
+                             num_tasks: int = 4,
+                             num_choices: int = 3,
+                             media_dir: str | Path | None = None,
+                             seed: int = 42) -> Benchmark:
+    """Create a benchmark with generated questions.
+
+    Questions are split evenly across categories and tasks, half of the
+    tasks are multiple choices and the other half text generation.
+
+    Args:
+        num_questions: Total number of questions.
+        num_categories: Number of categories.
+        num_tasks: Number of tasks per category.
+        num_choices: Number of wrong choices for multiple choices questions.
+        media_dir: If set an image is written there and attached to every
+        question.
+        seed: Random seed, the same seed always produces the same benchmark.
+
+    Returns:
+        The synthetic benchmark.
+    """
+    rng = random.Random(seed)
+    benchmark = Benchmark(name=f"synthetic-{num_questions}")
+    source = QuestionSource(name="synthetic")
+    media_path = None
+    if media_dir:
+        media_path = Path(media_dir) / "synthetic.png"
+        media_path.write_bytes(PNG_BYTES)
+
+    num_buckets = num_categories * num_tasks
+    for cidx in range(num_categories):
+        category = Category(name=f"category-{cidx}")
+        benchmark.add_category(category)
+        for tidx in range(num_tasks):
+            if tidx % 2:
+                task = Task(name=f"task-{tidx}",
+                            type=TaskType.text_generation,
+                            scorer=get_scorer(ScorerType.contain_text_insensitive))
+            else:
+                task = Task(name=f"task-{tidx}",
+                            type=TaskType.multiple_choices,
+                            scorer=get_scorer(ScorerType.contains_answer_letter_insensitive))
+            category.add_task(task)
+
+            bucket = cidx * num_tasks + tidx
+            size = num_questions // num_buckets
+            size += 1 if bucket < num_questions % num_buckets else 0
+            for qidx in range(size):
+                answer = f"{_sentence(rng, 2)} {bucket}-{qidx}"
+                question = Question(question=_sentence(rng, 20),
+                                    answer=answer,
+                                    source=source)
+                if task.type == TaskType.multiple_choices.value:
+                    question.choices = [f"{_sentence(rng, 3)} {i}"
+                                        for i in range(num_choices)]
+                if media_path:
+                    question.add_media(media_path)
+                task.add_question(question)
+    return benchmark
+
+
+def add_synthetic_answers(benchmark: Benchmark, num_models: int = 2) -> Benchmark:
+    """Answer every question of the benchmark with mock models.
+
+    Args:
+        benchmark: Benchmark to fill.
+        num_models: Number of models answering each question.
+
+    Returns:
+        The benchmark with the answers.
+    """
+    prompts = {TaskType.text_generation.value: QuestionOnlyPrompt(),
+               TaskType.multiple_choices.value: MultiChoicesPrompt(use_original_letters=False)}
+    models = [MockModel(model_version=f"mock-{i}") for i in range(num_models)]
+    for category in benchmark.categories:
+        for task in category.tasks:
+            version = prompts[task.type].version_string()
+            for question in task.questions:
+                answers = question.lm_answers.setdefault(version, {})
+                for idx, model in enumerate(models):
+                    answer = model._build_answer(question.answer if idx else "",
+                                                 generation_time=0.2,
+                                                 cost=0.001,
+                                                 total_tokens=42,
+                                                 prompt_tokens=30,
+                                                 completion_tokens=12)
+                    answer.score = float(bool(idx))
+                    answers[model.version_string] = answer
+    return benchmark
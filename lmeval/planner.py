@@ -0,0 +1,337 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Evaluation planning engine.
+
+Plans are built per (task, prompt) from plain data: an index of the model
+versions that already answered each question and the estimated prompt
+tokens of each question. Prompts are only rendered to check the existing
+answers are not stale, and candidates are integer tuples indexing the
+benchmark so large plans can be partitioned across processes and only the
+planned evaluations get materialized.
+"""
+
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import functools
+import os
+import random
+import time
+from typing import NamedTuple
+
+from lmeval.enums import StepType
+from lmeval.estimator import ModelProfile, estimate_cost, estimate_tokens, tokens_from_length
+from lmeval.evaluation_tasks import question_fingerprint
+
+# below this number of question x prompt x model combinations, planning
+# in process is faster than shipping the partitions to workers: starting the
+# pool and sending the candidates back to the parent costs more than the
+# planning itself of smaller plans
+PARALLEL_MIN_COMBINATIONS = 500_000
+
+
+# candidate evaluation: (cost, duration, prompt_tokens, category_idx,
+# task_idx, question_idx, prompt_idx, model_idx). Plain tuples are cheap to
+# build and to send across processes, and sorting them orders candidates
+# cheapest first then in benchmark order.
+Candidate = tuple[float, float, int, int, int, int, int, int]
+
+
+class PlanPartition(NamedTuple):
+    "Planning inputs of a (task, prompt) pair"
+    category_idx: int
+    task_idx: int
+    prompt_idx: int
+    # per question model versions that already answered with this prompt
+    answered: list[tuple[str, ...]]
+    prompt_tokens: list[int]
+
+
+@dataclass(frozen=True)
+class RetryPolicy():
+    """Selects the failed answers to evaluate again.
+
+    Errored (including timed out) and empty answers are retried until they
+    were attempted `max_attempts` times. After each failed attempt, the
+    answer waits for an exponential backoff window before being retried.
+
+    Args:
+        max_attempts: Maximum number of attempts per answer.
+        backoff: Seconds to wait after the first failed attempt, doubled
+        after each attempt. Either for all models or keyed by model version.
+        max_backoff: Maximum wait between two attempts in seconds.
+        default_backoff: Backoff of the models missing from `backoff` when
+        it is keyed by model version.
+    """
+    max_attempts: int = 3
+    backoff: float | dict[str, float] = 60.0
+    max_backoff: float = 3600.0
+    default_backoff: float = 60.0
+
+    def window(self, model_version: str, attempts: int) -> float:
+        "Seconds to wait before the next attempt of an answer"
+        backoff = self.backoff
+        if isinstance(backoff, dict):
+            backoff = backoff.get(model_version, self.default_backoff)
+        return min(self.max_backoff, backoff * 2 ** max(attempts - 1, 0))
+
+    def should_retry(self, answer, model_version: str, now: float) -> bool:
+        "True when a failed answer is due for another attempt"
+        if not needs_retry(answer):
+            return False
+        attempts = num_attempts(answer)
+        if attempts >= self.max_attempts:
+            return False
+        last_attempt = max((step.timestamp for step in answer.steps),
+                           default=0)
+        return now >= last_attempt + self.window(model_version, attempts)
+
+
+def needs_retry(answer) -> bool:
+    "True for errored answers and for empty answers that are not punts"
+    if answer.iserror:
+        return True
+    return (not answer.ispunting and not answer.answer.strip()
+            and not answer.answer_set)
+
+
+def num_attempts(answer) -> int:
+    "Number of generation attempts recorded in an answer steps"
+    attempts = sum(step.type == StepType.lmgeneration.value
+                   for step in answer.steps)
+    return max(attempts, 1)
+
+
+def retry_index(questions: list, prompt_version: str,
+                model_versions: list[str], policy: RetryPolicy,
+                now: float) -> list[tuple[str, ...]]:
+    """Answers index where only the answers to retry are missing.
+
+    Questions a model never answered are considered answered so a retry
+    plan doesn't start new evaluations.
+    """
+    index = []
+    for question in questions:
+        answers = question.lm_answers.get(prompt_version) or {}
+        skip = []
+        for version in model_versions:
+            answer = answers.get(version)
+            if answer is None or not policy.should_retry(answer, version, now):
+                skip.append(version)
+        index.append(tuple(skip))
+    return index
+
+
+def answer_index(questions: list, prompt_version: str,
+                 fingerprint: Callable | None = None) -> list[tuple[str, ...]]:
+    """Model versions that already answered each question with a prompt.
+
+    Args:
+        questions: Task questions.
+        prompt_version: Version string of the prompt.
+        fingerprint: Returns the current input fingerprint of a question.
+        When set, answers recorded with a different fingerprint are stale
+        and left out of the index so they get evaluated again. It is only
+        called for the questions having fingerprinted answers.
+    """
+    index = []
+    for question in questions:
+        answers = question.lm_answers.get(prompt_version)
+        if not answers:
+            index.append(())
+        elif fingerprint is None:
+            index.append(tuple(answers))
+        else:
+            current = None
+            versions = []
+            for version, answer in answers.items():
+                if answer.fingerprint:
+                    if current is None:
+                        current = fingerprint(question)
+                    if answer.fingerprint != current:
+                        continue
+                versions.append(version)
+            index.append(tuple(versions))
+    return index
+
+
+def prompt_tokens(questions: list, prompt) -> list[int]:
+    "Estimated prompt tokens of each question, without rendering the prompt"
+    tokens = []
+    for question in questions:
+        num_tokens = tokens_from_length(prompt.estimate_length(question))
+        for message in question.messages:
+            content = message.get('content', '')
+            if isinstance(content, str):
+                num_tokens += estimate_tokens(content)
+        tokens.append(num_tokens)
+    return tokens
+
+
+def plan_partition(partition: PlanPartition,
+                   model_versions: list[str],
+                   model_rates: list[tuple[float, float, float]],
+                   max_evaluations_per_task: int,
+                   seed: int | None = None
+                   ) -> tuple[list[Candidate], list[int]]:
+    """Find the evaluations missing for a (task, prompt) pair.
+
+    Args:
+        partition: Planning inputs of the pair.
+        model_versions: Models to evaluate.
+        model_rates: `ModelProfile.rates()` of each model.
+        max_evaluations_per_task: Cap on the candidates per model.
+        seed: Sample the capped candidates at random from the whole task
+        instead of keeping the first questions.
+
+    Returns:
+        The candidates and the number of existing answers per model.
+    """
+    candidates = []
+    existing = []
+    answered = partition.answered
+    tokens = partition.prompt_tokens
+    for model_idx, version in enumerate(model_versions):
+        missing = [idx for idx, versions in enumerate(answered)
+                   if version not in versions]
+        existing.append(len(answered) - len(missing))
+        if seed is not None and len(missing) > max_evaluations_per_task:
+            # seeded per pair so the sample doesn't depend on the sharding
+            random.Random(f"{seed}-{partition.category_idx}-"
+                          f"{partition.task_idx}-{partition.prompt_idx}-"
+                          f"{model_idx}").shuffle(missing)
+        rates = model_rates[model_idx]
+        duration = rates[2]
+        for question_idx in missing[:max_evaluations_per_task]:
+            num_tokens = tokens[question_idx]
+            candidates.append((estimate_cost(rates, num_tokens), duration,
+                               num_tokens, partition.category_idx,
+                               partition.task_idx, question_idx,
+                               partition.prompt_idx, model_idx))
+    return candidates, existing
+
+
+def _plan_partitions(partitions: list[PlanPartition],
+                     model_versions: list[str],
+                     model_rates: list[tuple[float, float, float]],
+                     max_evaluations_per_task: int,
+                     seed: int | None = None) -> list:
+    return [plan_partition(p, model_versions, model_rates,
+                           max_evaluations_per_task, seed)
+            for p in partitions]
+
+
+def build_partitions(benchmark, prompts: list,
+                     refresh_stale: bool = True,
+                     retry: RetryPolicy | None = None,
+                     model_versions: list[str] | None = None
+                     ) -> list[PlanPartition]:
+    """Collect the planning inputs of each (task, prompt) pair.
+
+    Prompts layouts are precomputed along the way so the token estimates
+    account for the choices presented.
+
+    Args:
+        benchmark: Benchmark to plan.
+        prompts: Prompts to evaluate.
+        refresh_stale: Plan again the answers whose input fingerprint
+        changed since they were generated.
+        retry: Only plan the failed answers of `model_versions` that are
+        due for a retry.
+        model_versions: Models to retry.
+    """
+    now = time.time()
+    partitions = []
+    for category_idx, category in enumerate(benchmark.categories):
+        for task_idx, task in enumerate(category.tasks):
+            for prompt_idx, prompt in enumerate(prompts):
+                # skip if prompt type does not match task type
+                if prompt.task_type != task.type:
+                    continue
+                prompt.precompute_layouts(task.questions)
+                if retry is not None:
+                    answered = retry_index(task.questions,
+                                           prompt.version_string(),
+                                           model_versions or [], retry, now)
+                else:
+                    fingerprint = None
+                    if refresh_stale:
+                        fingerprint = functools.partial(question_fingerprint,
+                                                        task=task,
+                                                        prompt=prompt)
+                    answered = answer_index(task.questions,
+                                            prompt.version_string(),
+                                            fingerprint)
+                partitions.append(PlanPartition(
+                    category_idx, task_idx, prompt_idx, answered,
+                    prompt_tokens(task.questions, prompt)))
+    return partitions
+
+
+def plan_candidates(partitions: list[PlanPartition],
+                    model_versions: list[str],
+                    profiles: dict[str, ModelProfile],
+                    max_evaluations_per_task: int,
+                    max_workers: int | None = None,
+                    seed: int | None = None
+                    ) -> list[tuple[list[Candidate], list[int]]]:
+    """Plan all the partitions, across processes for large plans.
+
+    Args:
+        partitions: Output of `build_partitions()`.
+        model_versions: Models to evaluate.
+        profiles: Models profiles keyed by version string.
+        max_evaluations_per_task: Cap on the candidates per task, prompt
+        and model.
+        max_workers: Number of planning processes. Defaults to the number
+        of CPUs for plans over `PARALLEL_MIN_COMBINATIONS` combinations and
+        to in process planning otherwise, including on single CPU hosts. 1
+        disables the process pool.
+        seed: Random sample of the capped candidates, see
+        `plan_partition()`.
+
+    Returns:
+        The `plan_partition()` results in partitions order.
+    """
+    rates = [profiles[version].rates() for version in model_versions]
+    num_combinations = sum(len(p.answered)
+                           for p in partitions) * len(model_versions)
+    if max_workers is None:
+        max_workers = 1
+        if num_combinations >= PARALLEL_MIN_COMBINATIONS:
+            max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(partitions))
+    if max_workers <= 1 or not model_versions:
+        return _plan_partitions(partitions, model_versions, rates,
+                                max_evaluations_per_task, seed)
+
+    # contiguous balanced shards keep the results in partitions order
+    shards = [[] for _ in range(max_workers)]
+    target = num_combinations / len(model_versions) / max_workers
+    shard_idx, shard_size = 0, 0
+    for partition in partitions:
+        if shard_size >= target and shard_idx < max_workers - 1:
+            shard_idx, shard_size = shard_idx + 1, 0
+        shards[shard_idx].append(partition)
+        shard_size += len(partition.answered)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_plan_partitions, shard, model_versions,
+                                   rates, max_evaluations_per_task, seed)
+                   for shard in shards if shard]
+        for future in futures:
+            results.extend(future.result())
+    return results
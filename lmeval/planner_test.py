@@ -0,0 +1,159 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from lmeval import Evaluator
+from lmeval.estimator import ModelProfile
+from lmeval.fixtures import make_benchmark
+from lmeval.models.mock_model import MockModel
+from lmeval.perf.synthetic import make_synthetic_benchmark
+from lmeval.planner import RetryPolicy, build_partitions, plan_candidates
+from lmeval.prompts import MultiChoicesPrompt, QuestionOnlyPrompt
+
+
+def test_plan_does_not_render_prompts(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("prompts should not be rendered while planning")
+    monkeypatch.setattr(QuestionOnlyPrompt, "render", fail)
+    monkeypatch.setattr(MultiChoicesPrompt, "render", fail)
+
+    benchmark = make_synthetic_benchmark(40)
+    models = [MockModel(model_version=f"mock-{i}") for i in range(2)]
+    evaluator = Evaluator(benchmark)
+    report = evaluator.plan(models,
+                            [QuestionOnlyPrompt(),
+                             MultiChoicesPrompt(use_original_letters=False)],
+                            display_report=False)
+    assert sum(len(tasks) for tasks in evaluator._tasks.values()) == 80
+    for entries in report.values():
+        for entry in entries:
+            assert entry['estimated_tokens'] > 0
+
+
+def test_existing_answers_and_cap():
+    benchmark = make_benchmark(6)
+    prompt = QuestionOnlyPrompt()
+    models = [MockModel(model_version=f"mock-{i}") for i in range(2)]
+    questions = benchmark.categories[0].tasks[0].questions
+    for question in questions[:4]:
+        question.lm_answers[prompt.version_string()] = {
+            'mock-0': models[0]._build_answer('a', generation_time=1.0)}
+
+    partitions = build_partitions(benchmark, [prompt])
+    versions = [m.version_string for m in models]
+    profiles = {v: ModelProfile(version_string=v) for v in versions}
+    [(candidates, existing)] = plan_candidates(partitions, versions, profiles,
+                                               max_evaluations_per_task=3)
+    assert existing == [4, 0]
+    planned = sorted((c[7], c[5]) for c in candidates)
+    assert planned == [(0, 4), (0, 5), (1, 0), (1, 1), (1, 2)]
+
+
+def test_process_pool_matches_in_process():
+    benchmark = make_synthetic_benchmark(200)
+    prompts = [QuestionOnlyPrompt(),
+               MultiChoicesPrompt(use_original_letters=False)]
+    partitions = build_partitions(benchmark, prompts)
+    versions = ['mock-0', 'mock-1']
+    profiles = {v: ModelProfile(version_string=v, num_answers=1,
+                                total_cost=1.0, total_prompt_tokens=10)
+                for v in versions}
+    serial = plan_candidates(partitions, versions, profiles, 100,
+                             max_workers=1)
+    parallel = plan_candidates(partitions, versions, profiles, 100,
+                               max_workers=2)
+    assert parallel == serial
+
+
+def test_plan_refreshes_stale_answers():
+    benchmark = make_benchmark(5)
+    prompt = QuestionOnlyPrompt()
+    model = MockModel(model_version='mock-1', default_response='a')
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+    evaluator.execute()
+    questions = benchmark.categories[0].tasks[0].questions
+    answers = [q.lm_answers[prompt.version_string()][model.version_string]
+               for q in questions]
+    assert all(answer.fingerprint for answer in answers)
+
+    # unchanged benchmark, nothing to run
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+    assert not evaluator._tasks
+
+    # only the edited question is evaluated again, answers without
+    # fingerprint are kept as is
+    questions[1].question = 'edited'
+    answers[2].fingerprint = ''
+    questions[2].question = 'edited too'
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+    planned = evaluator._tasks[model.version_string]
+    assert [d.question_idx for d in planned] == [1]
+    evaluator.execute()
+    answer = questions[1].lm_answers[prompt.version_string()][
+        model.version_string]
+    assert answer is not answers[1] and answer.fingerprint != answers[1].fingerprint
+
+    # staleness check can be disabled
+    questions[3].question = 'edited'
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False, refresh_stale=False)
+    assert not evaluator._tasks
+
+
+def test_plan_retries_failed_answers():
+    benchmark = make_benchmark(5)
+    prompt = QuestionOnlyPrompt()
+    model = MockModel(model_version='mock-1', default_response='a')
+    questions = benchmark.categories[0].tasks[0].questions
+    now = time.time()
+
+    def _answer(text, iserror=False, attempts=1, age=3600):
+        answer = model._build_answer(text, generation_time=1, iserror=iserror)
+        answer.steps = [answer.steps[0].model_copy() for _ in range(attempts)]
+        for step in answer.steps:
+            step.timestamp = int(now - age)
+        return answer
+
+    versions = [
+        _answer('a'),  # fine
+        _answer('', iserror=True),  # due for a retry
+        _answer('', age=10),  # empty but still in its backoff window
+        _answer('', iserror=True, attempts=3),  # out of attempts
+    ]  # last question never answered, not retried
+    for question, answer in zip(questions, versions):
+        question.lm_answers[prompt.version_string()] = {
+            model.version_string: answer}
+
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False,
+                   retry=RetryPolicy(max_attempts=3, backoff=60))
+    planned = evaluator._tasks[model.version_string]
+    assert [d.question_idx for d in planned] == [1]
+    evaluator.execute()
+    answer = questions[1].lm_answers[prompt.version_string()][
+        model.version_string]
+    assert not answer.iserror
+    # the failed attempt is kept in the steps
+    assert len(answer.steps) == 2 and answer.steps[0].iserror
+
+    # per model backoff
+    policy = RetryPolicy(backoff={model.version_string: 1}, max_backoff=5)
+    assert policy.window(model.version_string, 1) == 1
+    assert policy.window(model.version_string, 10) == 5
+    assert policy.window('other', 1) == 5  # default backoff, capped
+    assert policy.should_retry(versions[2], model.version_string, now)
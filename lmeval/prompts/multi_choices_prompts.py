@@ -12,7 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import random
+from dataclasses import dataclass
+from hashlib import blake2b
 from string import ascii_uppercase
 from ..template_engine import TemplateEngine
 from ..question import Question
@@ -20,6 +21,176 @@ from ..task import Task
 from .prompt import Prompt
 from ..enums import TaskType
 
+
+@dataclass(frozen=True, slots=True)
+class ChoiceLayout:
+    "Immutable presentation of a question choices for a given prompt version"
+    multi_choices: str
+    letters: str
+    answer_letter: str
+    letter_pairs: tuple[tuple[str, str], ...]
+
+    @property
+    def letter_mapping(self) -> dict[str, str]:
+        return dict(self.letter_pairs)
+
+    def to_cache(self) -> dict:
+        "Question fields set by the layout, as stored in `prompt_cache`"
+        return {'multi_choices': self.multi_choices,
+                'letters': self.letters,
+                'answer_letter': self.answer_letter,
+                'letter_mapping': self.letter_mapping}
+
+    @classmethod
+    def from_cache(cls, data: dict) -> "ChoiceLayout":
+        return cls(multi_choices=data['multi_choices'],
+                   letters=data['letters'],
+                   answer_letter=data['answer_letter'],
+                   letter_pairs=tuple(data['letter_mapping'].items()))
+
+
+def layout_seed(question: Question, version: str) -> int:
+    "Deterministic shuffle seed derived from the question and prompt version"
+    parts = [version, question.question, question.answer]
+    parts += question.additional_answers + question.choices
+    key = "\x1f".join(str(p) for p in parts)
+    return int.from_bytes(blake2b(key.encode(), digest_size=16).digest(), 'big')
+
+
+def seeded_shuffle(items: list, seed: int) -> None:
+    "Fisher-Yates shuffle in place drawing the swaps from the seed digits"
+    for i in range(len(items) - 1, 0, -1):
+        seed, j = divmod(seed, i + 1)
+        items[i], items[j] = items[j], items[i]
+
+
+class _LayoutView():
+    "Read only view of a question with a layout applied, used for rendering"
+    __slots__ = ('_question', '_fields')
+
+    def __init__(self, question: Question, fields: dict) -> None:
+        self._question = question
+        self._fields = fields
+
+    def __getattr__(self, name: str):
+        if name in self._fields:
+            return self._fields[name]
+        return getattr(self._question, name)
+
+
+class ChoicesPrompt(Prompt):
+    """Base class of the multiple choices prompts.
+
+    The layout (choices order, letters and answer letters) of a question is
+    computed once per prompt version using a shuffle seeded by the question
+    and the prompt version, and stored in `question.prompt_cache` so every
+    model is asked exactly the same question. Once `precompute_layouts()` has
+    been called, `render_layout()` and `layout_question()` never modify the
+    question and are safe to use from multiple threads.
+    """
+    use_original_letters: bool = False
+
+    def _possible_answers(self, question: Question) -> list[str]:
+        raise NotImplementedError
+
+    def _answer_letter(self, question: Question,
+                       letter_mapping: dict[str, str]) -> str:
+        raise NotImplementedError
+
+    def _check(self, question: Question, task: Task | None = None) -> None:
+        if task is not None and task.type != self.task_type:
+            raise ValueError(f"Task type {task.type} does not match prompt task type {self.task_type}")
+        assert question.answer not in question.choices, f"Answer {question.answer} should not be in other choices. {question.choices}"
+
+    def compute_layout(self, question: Question) -> ChoiceLayout:
+        "Compute the question layout, ignoring the cached one"
+        possible_answers = self._possible_answers(question)
+        if self.use_original_letters:
+            assert len(possible_answers) == len(question.original_letters), f"Original letters {question.original_letters} should match the number of possible answers {possible_answers}"
+            letters_list = list(question.original_letters)
+        else:
+            seeded_shuffle(possible_answers,
+                           layout_seed(question, self.version_string()))
+            letters_list = list(ascii_uppercase[:len(possible_answers)])
+
+        # don't put space between letter and answer it decrease accuracy...
+        choices_list = [f"{letter}:{answer}"
+                        for letter, answer in zip(letters_list, possible_answers)]
+        letter_mapping = dict(zip(letters_list, possible_answers))
+        if self.use_original_letters:
+            choices_list.sort()
+            letters_list.sort()
+
+        return ChoiceLayout(multi_choices="\n".join(choices_list),
+                            letters=', '.join(letters_list),
+                            answer_letter=self._answer_letter(question, letter_mapping),
+                            letter_pairs=tuple(letter_mapping.items()))
+
+    def _layout_fields(self, question: Question) -> dict:
+        cached = question.prompt_cache.get(self.version_string())
+        if cached is not None:
+            return cached
+        self._check(question)
+        return self.compute_layout(question).to_cache()
+
+    def layout(self, question: Question) -> ChoiceLayout:
+        "Return the question layout, computing it if it is not cached"
+        return ChoiceLayout.from_cache(self._layout_fields(question))
+
+    def precompute_layouts(self, questions: list[Question]) -> int:
+        """Compute and cache the layouts of the questions that lack one.
+
+        Args:
+            questions: Questions to prepare.
+
+        Returns:
+            Number of layouts computed.
+        """
+        version = self.version_string()
+        num_computed = 0
+        for question in questions:
+            if version not in question.prompt_cache:
+                self._check(question)
+                # store assignements for reuse accross models to have the exact same question
+                question.prompt_cache[version] = self.compute_layout(question).to_cache()
+                num_computed += 1
+        return num_computed
+
+    def estimate_length(self, question: Question) -> int:
+        "Approximate number of characters of the rendered prompt"
+        fields = self._layout_fields(question)
+        # letters are listed twice in the default templates
+        return (len(self.template) + len(question.question) +
+                len(fields['multi_choices']) + 2 * len(fields['letters']))
+
+    def layout_question(self, question: Question) -> Question:
+        "Return a copy of the question with its layout fields set"
+        return question.model_copy(update=dict(self._layout_fields(question)))
+
+    def render_layout(self, question: Question, task: Task,
+                      layout: ChoiceLayout | None = None) -> str:
+        "Render the prompt for a question and task without modifying them"
+        self._check(question, task)
+        fields = layout.to_cache() if layout else self._layout_fields(question)
+        template = TemplateEngine(self.template)
+        return template.render(question=_LayoutView(question, fields), task=task)
+
+    def render(self, question: Question, task: Task) -> str:
+        "Render prompt for a given question and task"
+        self._check(question, task)
+        version = self.version_string()
+        fields = self._layout_fields(question)
+        if version not in question.prompt_cache:
+            # store assignements for reuse accross models to have the exact same question
+            question.prompt_cache[version] = fields
+
+        # assign to the current question
+        for name, value in fields.items():
+            setattr(question, name, value)
+        template = TemplateEngine(self.template)
+        return template.render(question=question, task=task)
+
+
 MULTI_ANSWER_TEMPLATE = """
         Accurately answer the following question:
 
@@ -38,8 +209,7 @@ MULTI_ANSWER_TEMPLATE = """
     """
 
 
-class MultiChoicesMultiAnswersPrompt(Prompt):
-    use_original_letters: bool = False
+class MultiChoicesMultiAnswersPrompt(ChoicesPrompt):
 
     def __init__(self,
                 template: str = MULTI_ANSWER_TEMPLATE,
@@ -55,73 +225,21 @@ class MultiChoicesMultiAnswersPrompt(Prompt):
                             version=version)
             self.use_original_letters = use_original_letters
 
-    def render(self, question: Question, task: Task) -> str:
-        "Render prompt for a given question and task"
-
-        if task.type != self.task_type:
-            raise ValueError(f"Task type {task.type} does not match prompt task type {self.task_type}")
-
-        assert question.answer not in question.choices, f"Answer {question.answer} should not be in other choices. {question.choices}"
-
-
-        version = self.version_string()
-
-        if version in question.prompt_cache:
-            question.multi_choices = question.prompt_cache[version]['multi_choices']
-            question.letters = question.prompt_cache[version]['letters']
-            question.answer_letter = question.prompt_cache[version]['answer_letter']
-            question.letter_mapping = question.prompt_cache[version]['letter_mapping']
-        else:
-            possible_answers = [question.answer] + question.additional_answers +  question.choices
-            if self.use_original_letters:
-                assert len(possible_answers) == len(question.original_letters), f"Original letters {question.original_letters} should match the number of possible answers {possible_answers}"
-            else:    
-                random.shuffle(possible_answers)
-
-            # Construct the list of possible answers
-            choices_list = []
-            letters_list = []
-            letter_mapping = {}
-            correct_letters = []
-            for idx, answer in enumerate(possible_answers):
-                letter = question.original_letters[idx] if self.use_original_letters else ascii_uppercase[idx]
-                # don't put space between letter and answer it decrease accuracy...
-                choices_list.append(f"{letter}:{answer}")
-                letters_list.append(letter)
-                letter_mapping[letter] = answer
-
-                # mark the answer and additional answers as correct
-                if answer == question.answer:
-                    correct_letters.append(letter)
-                if answer in question.additional_answers:
-                    correct_letters.append(letter)
-            if self.use_original_letters:
-                choices_list.sort()
-                letters_list.sort()
-                correct_letters.sort()
-
-            question.answer_letter = ', '.join(correct_letters)
-
-            # flatten
-            multi_choices = "\n".join(choices_list)
-            letters = ', '.join(letters_list)
-
-            # assign to the current question
-            question.multi_choices = multi_choices
-            question.letters = letters
-            question.letter_mapping = letter_mapping
+    def _possible_answers(self, question: Question) -> list[str]:
+        return [question.answer] + question.additional_answers + question.choices
 
-            # store assignements for reuse accross models to have the exact same question
-            question.prompt_cache[version] = {
-                'multi_choices': multi_choices,
-                'letters': letters,
-                'answer_letter': question.answer_letter,
-                'letter_mapping': letter_mapping
-            }
-
-        # render full template
-        template = TemplateEngine(self.template)
-        return template.render(question=question, task=task)
+    def _answer_letter(self, question: Question,
+                       letter_mapping: dict[str, str]) -> str:
+        # mark the answer and additional answers as correct
+        correct_letters = []
+        for letter, answer in letter_mapping.items():
+            if answer == question.answer:
+                correct_letters.append(letter)
+            if answer in question.additional_answers:
+                correct_letters.append(letter)
+        if self.use_original_letters:
+            correct_letters.sort()
+        return ', '.join(correct_letters)
 
 
 TEMPLATE = """
@@ -142,8 +260,7 @@ TEMPLATE = """
     """
 
 
-class MultiChoicesPrompt(Prompt):
-    use_original_letters: bool = False
+class MultiChoicesPrompt(ChoicesPrompt):
 
     def __init__(self,
                 template: str = TEMPLATE,
@@ -159,61 +276,13 @@ class MultiChoicesPrompt(Prompt):
                             version=version)
             self.use_original_letters = use_original_letters
 
-    def render(self, question: Question, task: Task) -> str:
-        "Render prompt for a given question and task"
-
-        if task.type != self.task_type:
-            raise ValueError(f"Task type {task.type} does not match prompt task type {self.task_type}")
-
-        assert question.answer not in question.choices, f"Answer {question.answer} should not be in other choices. {question.choices}"
-
-        version = self.version_string()
-
-        if version in question.prompt_cache:
-            question.multi_choices = question.prompt_cache[version]['multi_choices']
-            question.letters = question.prompt_cache[version]['letters']
-            question.answer_letter = question.prompt_cache[version]['answer_letter']
-            question.letter_mapping = question.prompt_cache[version]['letter_mapping']
-        else:
-            possible_answers = [question.answer] + question.choices
-            if self.use_original_letters:
-                assert len(possible_answers) == len(question.original_letters), f"Original letters {question.original_letters} should match the number of possible answers {possible_answers}"
-            else:    
-                random.shuffle(possible_answers)
-
-            # Construct the list of possible answers
-            choices_list = []
-            letters_list = []
-            letter_mapping = {}
-            for idx, answer in enumerate(possible_answers):
-                letter = question.original_letters[idx] if self.use_original_letters else ascii_uppercase[idx]
-                # don't put space between letter and answer it decrease accuracy...
-                choices_list.append(f"{letter}:{answer}")
-                letters_list.append(letter)
-                letter_mapping[letter] = answer
-                if answer == question.answer:
-                    question.answer_letter = letter
-            if self.use_original_letters:
-                choices_list.sort()
-                letters_list.sort()
-
-            # flatten
-            multi_choices = "\n".join(choices_list)
-            letters = ', '.join(letters_list)
-
-            # assign to the current question
-            question.multi_choices = multi_choices
-            question.letters = letters
-            question.letter_mapping = letter_mapping
+    def _possible_answers(self, question: Question) -> list[str]:
+        return [question.answer] + question.choices
 
-            # store assignements for reuse accross models to have the exact same question
-            question.prompt_cache[version] = {
-                'multi_choices': multi_choices,
-                'letters': letters,
-                'answer_letter': question.answer_letter,
-                'letter_mapping': letter_mapping
-            }
-
-        # render full template
-        template = TemplateEngine(self.template)
-        return template.render(question=question, task=task)
\ No newline at end of file
+    def _answer_letter(self, question: Question,
+                       letter_mapping: dict[str, str]) -> str:
+        answer_letter = question.answer_letter
+        for letter, answer in letter_mapping.items():
+            if answer == question.answer:
+                answer_letter = letter
+        return answer_letter
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
+import random
+
 import pytest
 from lmeval.prompts import MultiChoicesPrompt, MultiChoicesMultiAnswersPrompt
 from lmeval import Question, Task, TaskType
@@ -194,3 +197,72 @@ def test_answer_in_choice_fail():
                 scorer=get_scorer(ScorerType.contain_text_insensitive))
     with pytest.raises(AssertionError):
         prompt.render(question, task)
+
+
+def _capital_question(qid: int = 1) -> Question:
+    return Question(id=qid,
+                    question="What is the capital of France?",
+                    answer="Paris",
+                    choices=["London", "Berlin", "Madrid", "Rome"])
+
+
+def test_render_layout_does_not_modify_question():
+    prompt = MultiChoicesPrompt(use_original_letters=False)
+    task = Task(name="Capitals", type=TaskType.multiple_choices,
+                scorer=get_scorer(ScorerType.contains_answer_letter_insensitive))
+    question = _capital_question()
+    assert prompt.precompute_layouts([question]) == 1
+    assert prompt.precompute_layouts([question]) == 0
+    before = question.model_dump()
+
+    rendered_prompt = prompt.render_layout(question, task)
+    laid_out = prompt.layout_question(question)
+    assert question.model_dump() == before
+    assert question.answer_letter == ""
+
+    assert laid_out.letter_mapping[laid_out.answer_letter] == "Paris"
+    assert f"{laid_out.answer_letter}:Paris" in rendered_prompt
+    # legacy render gives the same prompt and sets the question fields
+    assert prompt.render(question, task) == rendered_prompt
+    assert question.answer_letter == laid_out.answer_letter
+
+
+def test_layout_is_deterministic():
+    prompt = MultiChoicesPrompt(use_original_letters=False)
+    layouts = {prompt.compute_layout(_capital_question()) for _ in range(10)}
+    assert len(layouts) == 1
+
+    # layouts are independent from the global random state
+    random.seed(1)
+    first = prompt.compute_layout(_capital_question())
+    random.seed(2)
+    assert prompt.compute_layout(_capital_question()) == first
+
+    # cached layouts are reused as is
+    question = _capital_question()
+    prompt.precompute_layouts([question])
+    assert prompt.layout(question) == first
+
+
+def test_concurrent_render_layout():
+    prompt = MultiChoicesMultiAnswersPrompt(use_original_letters=False)
+    task = Task(name="Paris Info",
+                type=TaskType.multiple_choices_multiple_answers,
+                scorer=get_scorer(ScorerType.contains_answer_letters_insensitive))
+    questions = [Question(id=i,
+                          question=f"Question {i}",
+                          answer=f"answer {i}",
+                          additional_answers=[f"other answer {i}"],
+                          choices=[f"wrong {i}-{j}" for j in range(3)])
+                 for i in range(50)]
+    prompt.precompute_layouts(questions)
+    expected = [prompt.render_layout(q, task) for q in questions]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        rendered = list(executor.map(lambda q: prompt.render_layout(q, task),
+                                     questions * 4))
+    assert rendered == expected * 4
+    for question in questions:
+        assert question.answer_letter == ""
+        laid_out = prompt.layout_question(question)
+        correct = {laid_out.letter_mapping[l] for l in laid_out.answer_letter.split(', ')}
+        assert correct == {question.answer, *question.additional_answers}
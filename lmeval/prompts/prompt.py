@@ -41,4 +41,20 @@ class Prompt(CustomModel):
         if task.type != self.task_type:
             raise ValueError(f"Task type {task.type} does not match prompt task type {self.task_type}")
         template = TemplateEngine(self.template)
-        return template.render(question=question, task=task)
\ No newline at end of file
+        return template.render(question=question, task=task)
+
+    def estimate_length(self, question: Question) -> int:
+        "Approximate number of characters of the rendered prompt"
+        return len(self.template) + len(question.question)
+
+    def precompute_layouts(self, questions: list[Question]) -> int:
+        "Prepare the questions presentation ahead of rendering, if any"
+        return 0
+
+    def layout_question(self, question: Question) -> Question:
+        "Return the question as presented by this prompt"
+        return question
+
+    def render_layout(self, question: Question, task: Task) -> str:
+        "Render the prompt without modifying the question"
+        return self.render(question, task)
@@ -0,0 +1,140 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Scheduler multiplexing the evaluation tasks of all models on a shared pool."""
+
+from collections import deque
+from collections.abc import Callable
+import concurrent.futures
+from typing import Any
+
+from lmeval.logger import log
+
+
+def concurrency_caps(names, model_concurrency: int | dict[str, int]
+                     ) -> dict[str, int]:
+    """Maximum number of chunks in flight per model.
+
+    Args:
+        names: Model version strings.
+        model_concurrency: Cap for all models or keyed by model version,
+        missing models get 1.
+    """
+    if isinstance(model_concurrency, int):
+        model_concurrency = {name: model_concurrency for name in names}
+    return {name: max(1, model_concurrency.get(name, 1)) for name in names}
+
+
+def requests_in_flight(cap: int, chunk_size: int, batch_workers: int) -> int:
+    """Concurrent requests of a model while it is scheduled.
+
+    Args:
+        cap: Chunks in flight, see `concurrency_caps()`.
+        chunk_size: Tasks per chunk.
+        batch_workers: Requests a model runs at once for a chunk.
+    """
+    return max(1, cap) * max(1, min(chunk_size, batch_workers))
+
+
+class Scheduler():
+    """Dispatch chunks of tasks from per model queues onto a shared worker pool.
+
+    Free workers always pick up work from the model with the most remaining
+    tasks that is below its concurrency cap, so a slow or rate limited model
+    does not hold idle workers while other models still have work queued.
+    Completion is driven by the futures themselves, no polling is involved.
+    """
+
+    def __init__(self,
+                 queues: dict[str, deque],
+                 max_workers: int | None = None,
+                 chunk_size: int = 16,
+                 model_concurrency: int | dict[str, int] = 4) -> None:
+        """
+        Args:
+            queues: Tasks to execute keyed by model version.
+            max_workers: Size of the shared pool. Defaults to the sum of the
+            per model concurrency caps.
+            chunk_size: Number of tasks dispatched at once to a model so it
+            can batch them.
+            model_concurrency: Maximum number of chunks in flight per model,
+            either for all models or keyed by model version.
+        """
+        assert chunk_size > 0, "chunk_size must be positive"
+        self.queues = {name: deque(tasks) for name, tasks in queues.items()}
+        self.chunk_size = chunk_size
+        self.caps = concurrency_caps(queues, model_concurrency)
+        self.max_workers = max_workers or max(1, sum(self.caps.values()))
+        self.in_flight = {name: 0 for name in queues}
+
+    def remaining(self, name: str) -> int:
+        "Number of tasks not yet dispatched for a model"
+        return len(self.queues[name])
+
+    def _next_model(self) -> str | None:
+        "Model with the most remaining work that can accept a new chunk"
+        best = None
+        for name, queue in self.queues.items():
+            if not queue or self.in_flight[name] >= self.caps[name]:
+                continue
+            if best is None or len(queue) > len(self.queues[best]):
+                best = name
+        return best
+
+    def _next_chunk(self, name: str) -> list:
+        queue = self.queues[name]
+        return [queue.popleft() for _ in range(min(self.chunk_size, len(queue)))]
+
+    def run(self,
+            execute: Callable[[str, list], Any],
+            on_done: Callable[[str, list, Any], None] | None = None) -> dict[str, list]:
+        """Execute all the queued tasks.
+
+        Args:
+            execute: Called from a worker thread with a model name and a
+            chunk of its tasks.
+            on_done: Called from the calling thread each time a chunk completes
+            with the model name, the chunk and the execute() result.
+
+        Returns:
+            execute() results keyed by model name.
+        """
+        results = {name: [] for name in self.queues}
+        pending: dict[concurrent.futures.Future, tuple[str, list]] = {}
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+            while True:
+                # keep every worker busy
+                while len(pending) < self.max_workers:
+                    name = self._next_model()
+                    if name is None:
+                        break
+                    chunk = self._next_chunk(name)
+                    self.in_flight[name] += 1
+                    future = executor.submit(execute, name, chunk)
+                    pending[future] = (name, chunk)
+                    log.debug("scheduled %d tasks for %s, %d remaining",
+                              len(chunk), name, self.remaining(name))
+                if not pending:
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    name, chunk = pending.pop(future)
+                    self.in_flight[name] -= 1
+                    result = future.result()  # propagates worker errors
+                    results[name].append(result)
+                    if on_done:
+                        on_done(name, chunk, result)
+        return results
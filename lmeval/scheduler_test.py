@@ -0,0 +1,61 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from collections import defaultdict, deque
+
+import pytest
+
+from lmeval.scheduler import Scheduler
+
+
+def test_scheduler_caps_and_completion():
+    queues = {"slow": deque(range(8)), "fast": deque(range(40))}
+    lock = threading.Lock()
+    in_flight = defaultdict(int)
+    max_in_flight = defaultdict(int)
+    finished_at = {}
+
+    def execute(name, chunk):
+        with lock:
+            in_flight[name] += 1
+            max_in_flight[name] = max(max_in_flight[name], in_flight[name])
+        time.sleep(0.05 if name == "slow" else 0.001)
+        with lock:
+            in_flight[name] -= 1
+        return len(chunk)
+
+    def on_done(name, chunk, result):
+        finished_at[name] = time.time()
+
+    scheduler = Scheduler(queues, max_workers=4, chunk_size=2,
+                          model_concurrency={"slow": 1, "fast": 3})
+    results = scheduler.run(execute, on_done=on_done)
+
+    assert sum(results["slow"]) == 8
+    assert sum(results["fast"]) == 40
+    assert max_in_flight["slow"] == 1
+    assert max_in_flight["fast"] <= 3
+    # fast model work is not serialized behind the slow one
+    assert finished_at["fast"] < finished_at["slow"]
+
+
+def test_scheduler_propagates_errors():
+    def execute(name, chunk):
+        raise RuntimeError("boom")
+
+    scheduler = Scheduler({"model": deque(range(3))}, chunk_size=1)
+    with pytest.raises(RuntimeError):
+        scheduler.run(execute)
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from .scorer import Scorer
+from .cache import ScoreCache
 from .llm_rater import LLMRater
 from .loader import get_scorer, list_scorers, add_scorer, update_scorer
 from .dummy_scorer import Always0Scorer, Always1Scorer
@@ -21,10 +22,13 @@ from .exact_text import TextExactSensitive, TextExactInsensitive
 from .contain_text import ContainTextSensitive, ContainTextInsensitive
 from .regex import TextSensitiveRegex, TextInsensitiveRegex
 from .multiple_choices import ContainAnswerLetterInsensitive, ContainAnswerLettersInsensitive
+from .ngram import BleuScorer, MeteorScorer, RougeScorer
+from .code_execution import CodeExecutionScorer
 from .punt_detector import PuntDetector
 
 __all__ = [
     "Scorer",
+    "ScoreCache",
     "add_scorer",
     "update_scorer",
     "get_scorer",
@@ -38,6 +42,10 @@ __all__ = [
     "ContainTextInsensitive",
     "TextSensitiveRegex",
     "TextInsensitiveRegex",
+    "BleuScorer",
+    "MeteorScorer",
+    "RougeScorer",
+    "CodeExecutionScorer",
     "ContainAnswerLetterInsensitive",
     "ContainAnswerLettersInsensitive",
     "PuntDetector",
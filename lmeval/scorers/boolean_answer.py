@@ -13,11 +13,18 @@
 # limitations under the License.
 
 from .scorer import Scorer
+from .matching import MultiPatternMatcher, normalize, normalize_reference
 from ..question import Question
 from ..models import LMAnswer
 
 from ..enums import ScorerType, Modality
 
+# various words that convey yes or no
+_TRUE_WORDS = ["yes", "true", "correct", "right"]
+_FALSE_WORDS = ["no", "false", "incorrect", "wrong"]
+_TRUE_MATCHER = MultiPatternMatcher(_TRUE_WORDS)
+_FALSE_MATCHER = MultiPatternMatcher(_FALSE_WORDS)
+
 
 class BooleanAnswerScorer(Scorer):
     name: str = ScorerType.boolean_answer.name
@@ -26,22 +33,17 @@ class BooleanAnswerScorer(Scorer):
     modality: Modality = Modality.text
 
     def _score(self, model_answer: LMAnswer, question: Question, task, debug: bool = False) -> float:
-        ma = self._cleanup(model_answer.answer).lower()
-        qa = self._cleanup(question.answer).lower()
-
-        # various words that convey yes or no
-        istrue = ["yes", "true", "correct", "right"]
-        isfalse = ["no", "false", "incorrect", "wrong"]
+        ma = normalize(model_answer.answer, lower=True)
+        qa = normalize_reference(question.answer, lower=True)
 
-        if qa in istrue:
-            expected = istrue
-        elif qa in isfalse:
-            expected = isfalse
+        if qa in _TRUE_WORDS:
+            expected = _TRUE_MATCHER
+        elif qa in _FALSE_WORDS:
+            expected = _FALSE_MATCHER
         else:
-            raise ValueError(f"Question answer {qa} is not a valid boolean answer - must be in {istrue} or {isfalse}")
+            raise ValueError(f"Question answer {qa} is not a valid boolean answer - must be in {_TRUE_WORDS} or {_FALSE_WORDS}")
 
         # check various ways the model could have answered
-        for v in expected:
-            if v in ma:
-                return 1.0
+        if expected.contains_any(ma):
+            return 1.0
         return 0.0
\ No newline at end of file
@@ -0,0 +1,210 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent cache of the scores of expensive scorers.
+
+Model backed scorers are deterministic at temperature 0 but costly, so their
+scores are stored in a local SQLite file keyed by the scorer type, the
+scorer configuration hash, the rater model version and the question and
+answer hashes. The cache is shared by `Evaluator.score_answer()` and
+`Benchmark.rescore()`.
+"""
+
+import sqlite3
+import threading
+import time
+
+from ..logger import log
+from ..models import LMAnswer
+from ..question import Question
+from ..utils import Path
+from .scorer import Scorer, answer_hash, question_hash
+
+_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS scores (
+        scorer_type TEXT NOT NULL,
+        scorer_version TEXT NOT NULL,
+        model_version TEXT NOT NULL,
+        question_hash TEXT NOT NULL,
+        answer_hash TEXT NOT NULL,
+        score REAL NOT NULL,
+        created REAL NOT NULL,
+        accessed REAL NOT NULL,
+        PRIMARY KEY (scorer_type, scorer_version, model_version,
+                     question_hash, answer_hash)
+    );
+    CREATE INDEX IF NOT EXISTS idx_scores_accessed ON scores (accessed);
+'''
+
+
+class ScoreCache:
+    """SQLite cache of scores.
+
+    Only scorers that are not `cpu_bound` are cached by default: the others
+    are cheaper to run again than to look up. Error scores (negative) are
+    never cached so failed ratings are retried.
+    """
+
+    def __init__(self,
+                 path: str,
+                 max_entries: int = 1_000_000,
+                 max_age: float | None = None,
+                 cache_cpu_bound: bool = False):
+        """
+        Args:
+            path: Path of the SQLite file, created if needed.
+            max_entries: Least recently used scores are evicted beyond it.
+            max_age: Scores older than that many seconds are evicted.
+            cache_cpu_bound: Also cache the CPU bound scorers.
+        """
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.cache_cpu_bound = cache_cpu_bound
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # scorers can run in threads, the connection is guarded by the lock
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            with self.conn:
+                self.conn.executescript(_SCHEMA)
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"Error opening score cache at {self.path}: {e}") from e
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # drops the expired scores and counts the entries
+        with self._lock:
+            self._evict()
+
+    def caches(self, scorer: Scorer) -> bool:
+        "True if the scores of this scorer are cached"
+        return self.cache_cpu_bound or not scorer.cpu_bound
+
+    @staticmethod
+    def _key(scorer: Scorer, version: str, answer: LMAnswer,
+             question: Question) -> tuple:
+        scorer_type = getattr(scorer.type, 'value', scorer.type)
+        return (scorer_type, version, scorer.rater_version(answer),
+                question_hash(question), answer_hash(answer))
+
+    def get_many(self, scorer: Scorer, answers: list[LMAnswer],
+                 questions: list[Question]) -> list[float | None]:
+        """Cached scores of the answers, None for the misses.
+
+        Args:
+            scorer: Scorer of the answers.
+            answers: Answers to look up.
+            questions: Question of each answer.
+        """
+        version = scorer.version_hash()
+        keys = [self._key(scorer, version, answer, question)
+                for answer, question in zip(answers, questions)]
+        now = time.time()
+        scores = []
+        with self._lock:
+            for key in keys:
+                row = self.conn.execute(
+                    "SELECT score, created FROM scores WHERE scorer_type=? AND "
+                    "scorer_version=? AND model_version=? AND question_hash=? "
+                    "AND answer_hash=?", key).fetchone()
+                if row and (self.max_age is None or now - row[1] <= self.max_age):
+                    scores.append(row[0])
+                else:
+                    scores.append(None)
+            hits = [key for key, score in zip(keys, scores) if score is not None]
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE scores SET accessed=? WHERE scorer_type=? AND "
+                    "scorer_version=? AND model_version=? AND question_hash=? "
+                    "AND answer_hash=?", [(now, *key) for key in hits])
+            self.hits += len(hits)
+            self.misses += len(keys) - len(hits)
+        return scores
+
+    def put_many(self, scorer: Scorer, answers: list[LMAnswer],
+                 questions: list[Question], scores: list[float]) -> None:
+        """Store the scores of the answers.
+
+        Args:
+            scorer: Scorer of the answers.
+            answers: Scored answers.
+            questions: Question of each answer.
+            scores: Score of each answer, negative (error) ones are skipped.
+        """
+        version = scorer.version_hash()
+        now = time.time()
+        rows = [(*self._key(scorer, version, answer, question), score, now, now)
+                for answer, question, score in zip(answers, questions, scores)
+                if score >= 0]
+        if not rows:
+            return
+        with self._lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows)
+            self._max_count += len(rows)
+            if self._max_count > self.max_entries:
+                self._evict()
+
+    def evict(self) -> int:
+        "Remove the expired and least recently used scores, return how many"
+        with self._lock:
+            return self._evict()
+
+    def _evict(self) -> int:
+        removed = 0
+        with self.conn:
+            if self.max_age is not None:
+                removed += self.conn.execute(
+                    "DELETE FROM scores WHERE created < ?",
+                    (time.time() - self.max_age,)).rowcount
+            # puts track an upper bound of the entries to avoid counting rows
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                removed += self.conn.execute(
+                    "DELETE FROM scores WHERE rowid IN (SELECT rowid FROM "
+                    "scores ORDER BY accessed LIMIT ?)", (excess,)).rowcount
+        self._max_count = self._count()
+        self.evictions += removed
+        if removed:
+            log.debug("Evicted %d cached scores", removed)
+        return removed
+
+    def _count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def stats(self) -> dict:
+        "Hits, misses, hit rate, evictions and number of cached scores"
+        with self._lock:
+            entries = self._count()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+        }
+
+    def clear(self) -> None:
+        "Remove all the cached scores"
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM scores")
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,139 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from lmeval import Evaluator, Question
+from lmeval.fixtures import make_benchmark
+from lmeval.models.mock_model import MockModel
+from lmeval.prompts import QuestionOnlyPrompt
+from lmeval.scorers import LLMRater, ScoreCache, get_scorer
+from lmeval.scorers.scorer import cached_batch_score
+from lmeval.enums import ScorerType
+
+
+def _counting_rater(response='{"score": 0.5}'):
+    rater = MockModel(model_version='rater-1', default_response=response)
+    calls = []
+    generate_text = rater.generate_text
+
+    def _generate_text(*args, **kwargs):
+        calls.append(args)
+        return generate_text(*args, **kwargs)
+
+    object.__setattr__(rater, 'generate_text', _generate_text)
+    return rater, calls
+
+
+def _answers(n):
+    model = MockModel(model_version='mock-1')
+    answers = [model._build_answer(f"answer {i}", generation_time=1)
+               for i in range(n)]
+    questions = [Question(question=f"q{i}", answer=f"answer {i}")
+                 for i in range(n)]
+    return answers, questions
+
+
+def test_cache_hits_and_persistence(tmp_path):
+    path = tmp_path / 'scores.db'
+    rater, calls = _counting_rater()
+    scorer = LLMRater(model=rater)
+    answers, questions = _answers(4)
+
+    cache = ScoreCache(path)
+    assert cached_batch_score(scorer, answers, questions, None, cache) == [0.5] * 4
+    assert cached_batch_score(scorer, answers[:2], questions[:2], None,
+                              cache) == [0.5] * 2
+    assert len(calls) == 4
+    assert cache.stats() == {'hits': 2, 'misses': 4, 'hit_rate': 1 / 3,
+                             'evictions': 0, 'entries': 4}
+    cache.close()
+
+    # shared across runs, keyed by the answer, the question and the scorer
+    cache = ScoreCache(path)
+    answers[0].answer = 'edited'
+    questions[1].answer = 'edited'
+    cached_batch_score(scorer, answers, questions, None, cache)
+    assert len(calls) == 6
+    scorer.temperature = 0.5
+    cached_batch_score(scorer, answers[2:], questions[2:], None, cache)
+    assert len(calls) == 8
+
+    # CPU bound scorers are not cached by default
+    exact = get_scorer(ScorerType.text_exact_sensitive)
+    assert not cache.caches(exact)
+    assert ScoreCache(tmp_path / 'other.db', cache_cpu_bound=True).caches(exact)
+
+
+def test_rater_model_and_errors(tmp_path):
+    cache = ScoreCache(tmp_path / 'scores.db')
+    answers, questions = _answers(2)
+    rater, calls = _counting_rater()
+    cached_batch_score(LLMRater(model=rater), answers, questions, None, cache)
+    # another rater model version is another judgment
+    other, other_calls = _counting_rater()
+    other.version_string = 'rater-2'
+    cached_batch_score(LLMRater(model=other), answers, questions, None, cache)
+    assert len(calls) == len(other_calls) == 2
+
+    # failed ratings are retried
+    failing, failing_calls = _counting_rater('not json')
+    failing.version_string = 'rater-3'
+    for _ in range(2):
+        assert cached_batch_score(LLMRater(model=failing), answers, questions,
+                                  None, cache) == [-1.0, -1.0]
+    assert len(failing_calls) == 4
+
+
+def test_eviction(tmp_path):
+    rater, _ = _counting_rater()
+    scorer = LLMRater(model=rater)
+    answers, questions = _answers(6)
+    cache = ScoreCache(tmp_path / 'scores.db', max_entries=4)
+    cached_batch_score(scorer, answers[:4], questions[:4], None, cache)
+    time.sleep(0.01)
+    cached_batch_score(scorer, answers[:1], questions[:1], None, cache)  # touch
+    cached_batch_score(scorer, answers[4:], questions[4:], None, cache)
+    stats = cache.stats()
+    assert stats['entries'] == 4 and stats['evictions'] == 2
+    assert cache.get_many(scorer, answers, questions) == [
+        0.5, None, None, 0.5, 0.5, 0.5]
+
+    cache.max_age = 0
+    time.sleep(0.01)
+    assert cache.evict() == 4
+
+
+def test_evaluator_and_rescore_share_the_cache(tmp_path):
+    cache = ScoreCache(tmp_path / 'scores.db')
+    rater, calls = _counting_rater()
+    prompt = QuestionOnlyPrompt()
+    model = MockModel(model_version='mock-1', default_response='a')
+
+    for _ in range(2):
+        benchmark = make_benchmark(3)
+        task = benchmark.categories[0].tasks[0]
+        task.additional_scorers = [LLMRater(model=rater)]
+        evaluator = Evaluator(benchmark, score_cache=cache)
+        evaluator.plan(model, prompt, display_report=False)
+        evaluator.execute()
+    assert len(calls) == 3
+    answer = task.questions[0].lm_answers[prompt.version_string()][
+        model.version_string]
+    assert answer.additional_scores[ScorerType.llm_rater] == 0.5
+
+    report = benchmark.rescore(scorers=[LLMRater(model=rater)], force=True,
+                               max_workers=2, cache=cache)
+    assert report['llm_rater']['scored'] == 3
+    assert len(calls) == 3
@@ -0,0 +1,328 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Execution scorer running generated python code against tests.
+
+Executions are dispatched in batches to a pool of long lived worker
+processes. For each run a worker forks a child which sets its resource
+limits, moves into a fresh temporary directory, executes the solution and
+then the tests one by one, reporting each test result through a pipe as
+soon as it is known. The worker enforces the wall-clock limit and keeps the
+results reported before the child was killed.
+
+This is a best effort sandbox: resource limits protect the evaluation from
+runaway code but don't isolate the filesystem or the network.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+import math
+import multiprocessing
+import os
+import re
+import select
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from typing import ClassVar
+
+from pydantic import Field
+
+from .scorer import Scorer
+from ..question import Question
+from ..models import LMAnswer
+
+from ..enums import ScorerType, Modality
+
+_CODE_BLOCK_RE = re.compile(r"```(?:python|py)?[ \t]*\n(.*?)```", re.DOTALL)
+
+# max_workers -> shared pool, workers are reused across batches
+_POOLS: dict[int, ProcessPoolExecutor] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ExecutionLimits:
+    "Resource limits of a single execution"
+    cpu_time: float = 5.0  # seconds of CPU
+    wall_time: float = 10.0  # seconds
+    memory_mb: int = 512  # on top of the worker memory
+
+
+@dataclass(frozen=True)
+class ExecutionResult:
+    """Outcome of running a solution against its tests.
+
+    `status` is `passed`, `failed`, `error` (the solution itself raised),
+    `timeout` or `memory`. Tests that ran before a timeout or a crash are
+    still counted in `passed`.
+    """
+    status: str
+    passed: int
+    total: int
+    error: str = ''
+    duration: float = 0.0
+
+
+def extract_code(text: str) -> str:
+    "Code of the first fenced block of the answer or the whole answer"
+    match = _CODE_BLOCK_RE.search(text)
+    return match.group(1) if match else text
+
+
+def question_tests(question: Question) -> list[str]:
+    """Tests of a question.
+
+    Read from `question.metadata['tests']` (a script or a list of scripts
+    each counted as one test) and fallback to `question.answer`.
+    """
+    tests = question.metadata.get('tests', question.answer)
+    if not tests:
+        return []
+    return [tests] if isinstance(tests, str) else list(tests)
+
+
+def _address_space() -> int:
+    "Current virtual memory size in bytes, 0 when unknown"
+    try:
+        with open('/proc/self/statm', encoding='utf-8') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _child(code: str, tests: list[str], limits: ExecutionLimits,
+           workdir: str, wfd: int) -> None:
+    "Execute the solution and the tests in the forked child, never returns"
+    import resource  # pylint: disable=import-outside-toplevel
+    status = 0
+    try:
+        os.setpgid(0, 0)  # so the worker can kill grandchildren too
+        cpu = max(1, math.ceil(limits.cpu_time))
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        memory = limits.memory_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS,
+                               (_address_space() + memory,) * 2)
+        except (ValueError, OSError):
+            pass  # not enforceable on this platform
+        resource.setrlimit(resource.RLIMIT_FSIZE, (memory, memory))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        os.chdir(workdir)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+
+        namespace = {'__name__': '__main__'}
+        try:
+            exec(compile(code, 'solution.py', 'exec'), namespace)  # pylint: disable=exec-used
+        except MemoryError:
+            os.write(wfd, b'M\n')
+            return
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            msg = f"{type(e).__name__}: {e}".replace('\n', ' ')
+            os.write(wfd, f"E {msg}\n".encode('utf-8', 'replace'))
+            return
+        for test in tests:
+            try:
+                exec(compile(test, 'test.py', 'exec'), namespace)  # pylint: disable=exec-used
+                os.write(wfd, b'T 1\n')
+            except MemoryError:
+                os.write(wfd, b'M\n')
+                return
+            except BaseException:  # pylint: disable=broad-exception-caught
+                os.write(wfd, b'T 0\n')
+    except BaseException:  # pylint: disable=broad-exception-caught
+        status = 1
+    finally:
+        os._exit(status)  # pylint: disable=protected-access
+
+
+def run_code(code: str, tests: list[str],
+             limits: ExecutionLimits = ExecutionLimits()) -> ExecutionResult:
+    """Run a solution and its tests in a forked child with resource limits.
+
+    Args:
+        code: Solution source code.
+        tests: Test scripts executed in the solution namespace, a test
+        passes when it doesn't raise.
+        limits: CPU time, wall-clock time and memory limits.
+    """
+    start = time.perf_counter()
+    workdir = tempfile.mkdtemp(prefix='lmeval_exec_')
+    rfd, wfd = os.pipe()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            os.close(rfd)
+            _child(code, tests, limits, workdir, wfd)
+        os.close(wfd)
+
+        # read the results as they come until EOF or the deadline
+        output = b''
+        timed_out = False
+        deadline = start + limits.wall_time
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                timed_out = True
+                break
+            ready, _, _ = select.select([rfd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(rfd, 65536)
+            if not chunk:
+                break
+            output += chunk
+        if timed_out:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                os.kill(pid, signal.SIGKILL)
+        _, wait_status = os.waitpid(pid, 0)
+    finally:
+        os.close(rfd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    passed, error, status = 0, '', ''
+    for line in output.decode('utf-8', 'replace').splitlines():
+        if line == 'T 1':
+            passed += 1
+        elif line == 'M':
+            status = 'memory'
+        elif line.startswith('E '):
+            status, error = 'error', line[2:]
+    if not status:
+        signum = os.WTERMSIG(wait_status) if os.WIFSIGNALED(wait_status) else 0
+        if timed_out or signum in (signal.SIGXCPU, signal.SIGKILL):
+            status = 'timeout'
+        elif signum or os.WEXITSTATUS(wait_status):
+            status, error = 'error', f"exit status {wait_status}"
+        else:
+            status = 'passed' if passed == len(tests) else 'failed'
+    return ExecutionResult(status=status, passed=passed, total=len(tests),
+                           error=error,
+                           duration=time.perf_counter() - start)
+
+
+def _run_batch(jobs: list[tuple[str, list[str]]],
+               limits: ExecutionLimits) -> list[ExecutionResult]:
+    "Executed in the pool workers"
+    return [run_code(code, tests, limits) for code, tests in jobs]
+
+
+def _warmup(_) -> int:
+    return os.getpid()
+
+
+def get_pool(max_workers: int = 0) -> ProcessPoolExecutor:
+    """Shared pool of execution workers.
+
+    Workers are started eagerly and reused by all the scorers using the
+    same number of workers.
+
+    Args:
+        max_workers: Number of worker processes, defaults to the CPU count.
+    """
+    if not hasattr(os, 'fork'):
+        raise ValueError("Code execution requires a platform supporting fork")
+    max_workers = max_workers or os.cpu_count() or 1
+    with _POOLS_LOCK:
+        if max_workers not in _POOLS:
+            # workers fork the executions so they must be single threaded
+            # even when the evaluator isn't
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                'forkserver' if 'forkserver' in methods else None)
+            pool = ProcessPoolExecutor(max_workers=max_workers,
+                                       mp_context=context)
+            list(pool.map(_warmup, range(max_workers)))
+            _POOLS[max_workers] = pool
+        return _POOLS[max_workers]
+
+
+def shutdown_pools() -> None:
+    "Stop the execution workers"
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.shutdown()
+        _POOLS.clear()
+
+
+def execute_batch(jobs: list[tuple[str, list[str]]],
+                  limits: ExecutionLimits = ExecutionLimits(),
+                  max_workers: int = 0,
+                  batch_size: int = 16) -> list[ExecutionResult]:
+    """Run (code, tests) jobs on the shared worker pool.
+
+    Args:
+        jobs: Solution code and tests of each execution.
+        limits: Resource limits of each execution.
+        max_workers: Number of worker processes, defaults to the CPU count.
+        batch_size: Number of executions sent to a worker at once.
+
+    Returns:
+        The results in the jobs order.
+    """
+    if not jobs:
+        return []
+    pool = get_pool(max_workers)
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+    futures = [pool.submit(_run_batch, batch, limits) for batch in batches]
+    return [result for future in futures for result in future.result()]
+
+
+class CodeExecutionScorer(Scorer):
+    """Fraction of the question tests passed by the generated code.
+
+    With `Task.num_shots` samples, the `pass_at_k` scoring strategy reports
+    pass@`Task.pass_k`, a sample is correct when it passes all its tests.
+    """
+    name: str = ScorerType.python_execution.name
+    description: str = "Run the generated python code against the question tests and return the fraction of tests passed"
+    type: ScorerType = ScorerType.python_execution
+    modality: Modality = Modality.code
+
+    cpu_time: float = Field(default=5.0)
+    wall_time: float = Field(default=10.0)
+    memory_mb: int = Field(default=512)
+    max_workers: int = Field(default=0)  # 0: one worker per CPU
+    batch_size: int = Field(default=16)
+    cpu_bound: ClassVar[bool] = False
+
+    def _score(self, model_answer: LMAnswer, question: Question, task,
+               debug: bool = False) -> float:
+        return self._batch_score([model_answer], [question], task)[0]
+
+    def _batch_score(self, model_answers: list[LMAnswer],
+                     questions: list[Question], task) -> list[float]:
+        limits = ExecutionLimits(cpu_time=self.cpu_time,
+                                 wall_time=self.wall_time,
+                                 memory_mb=self.memory_mb)
+        jobs = [(extract_code(answer.answer), question_tests(question))
+                for answer, question in zip(model_answers, questions)]
+        results = execute_batch(jobs, limits, self.max_workers,
+                                self.batch_size)
+        scores = []
+        for answer, result in zip(model_answers, results):
+            answer.score_raw_data = {**answer.score_raw_data,
+                                     'execution': asdict(result)}
+            if result.total:
+                scores.append(result.passed / result.total)
+            else:
+                # no tests: the code running is all we can check
+                scores.append(float(result.status == 'passed'))
+        return scores
@@ -0,0 +1,112 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+
+from lmeval import LMAnswer, LMModel, Question, ScorerType, Task
+from lmeval.enums import MultiShotStrategy, TaskType
+from lmeval.scorers import get_scorer
+from lmeval.scorers.code_execution import (ExecutionLimits, execute_batch,
+                                           extract_code, run_code)
+from lmeval.scorers.scorer import pass_at_k, score_answers
+
+_SOLUTION = "def add(a, b):\n    return a + b\n"
+_TESTS = ["assert add(1, 2) == 3", "assert add(-1, 1) == 0",
+          "assert add('a', 'b') == 'ab'"]
+_LIMITS = ExecutionLimits(cpu_time=1, wall_time=2, memory_mb=64)
+
+
+@pytest.mark.parametrize('code, status, passed', [
+    (_SOLUTION, 'passed', 3),
+    ("def add(a, b):\n    return int(a) + int(b)\n", 'failed', 2),
+    ("def add(a, b)\n", 'error', 0),
+    ("import os\nos._exit(3)\n", 'error', 0),
+])
+def test_run_code(code, status, passed):
+    result = run_code(code, _TESTS, _LIMITS)
+    assert result.status == status
+    assert result.passed == passed and result.total == 3
+
+
+def test_run_code_limits_keep_partial_results():
+    spin = _SOLUTION + "def spin():\n    while True:\n        pass\n"
+    result = run_code(spin, _TESTS[:2] + ["spin()"] + _TESTS[2:], _LIMITS)
+    assert result.status == 'timeout' and result.passed == 2
+
+    # the wall-clock limit catches code that doesn't use CPU
+    sleep = _SOLUTION + "import time\ntime.sleep(30)\n"
+    result = run_code(sleep, _TESTS, ExecutionLimits(wall_time=0.5))
+    assert result.status == 'timeout' and result.duration < 5
+
+    hog = "blob = bytearray(256 * 1024 * 1024)\n"
+    result = run_code(hog, _TESTS, _LIMITS)
+    assert result.status == 'memory'
+
+
+def test_run_code_uses_temporary_directory():
+    code = "open('out.txt', 'w').write('x')\nimport os\ncwd = os.getcwd()\n"
+    test = f"assert cwd != {os.getcwd()!r} and os.listdir() == ['out.txt']"
+    assert run_code(code, [test], _LIMITS).status == 'passed'
+    assert not os.path.exists('out.txt')
+
+
+def test_execute_batch_keeps_order():
+    jobs = [(f"x = {i}\n", [f"assert x == {i % 3}"]) for i in range(40)]
+    results = execute_batch(jobs, _LIMITS, max_workers=2, batch_size=4)
+    assert [r.passed for r in results] == [int(i < 3) for i in range(40)]
+
+
+def test_scorer():
+    scorer = get_scorer(ScorerType.python_execution)
+    scorer.max_workers = 2
+    question = Question(question='add', metadata={'tests': _TESTS})
+    model = LMModel(name='model')
+    answers = [LMAnswer(answer=f"Here you go:\n```python\n{_SOLUTION}```\n",
+                        model=model),
+               LMAnswer(answer="def add(a, b):\n    return 0\n", model=model),
+               LMAnswer(answer="", iserror=True, model=model)]
+    scores = scorer.batch_score(answers, [question] * 3, None)
+    assert scores == [1.0, pytest.approx(1 / 3), -1.0]  # partial credit
+    assert answers[0].score_raw_data['execution']['status'] == 'passed'
+
+    # the question answer is used when there are no tests
+    question = Question(question='add', answer=_TESTS[0])
+    assert scorer.score(answers[0], question, None) == 1.0
+
+
+def test_samples_keep_their_execution_details():
+    scorer = get_scorer(ScorerType.python_execution)
+    task = Task(name='add', type=TaskType.text_generation, scorer=scorer,
+                multi_short_scoring_strategy=MultiShotStrategy.max)
+    question = Question(question='add', metadata={'tests': _TESTS})
+    samples = ["def add(a, b):\n    return 0\n", _SOLUTION, "def add(a, b)\n"]
+    answer = LMAnswer(answer=samples[0], samples=samples,
+                      model=LMModel(name='model'))
+    assert score_answers(scorer, [answer], [question], task) == [1.0]
+    statuses = [raw['execution']['status'] for raw in answer.sample_raw_data]
+    assert statuses == ['failed', 'passed', 'error']
+    assert answer.sample_raw_data[0]['execution']['passed'] == 1
+    # the answer keeps the details of the sample it reports
+    assert answer.score_raw_data is answer.sample_raw_data[1]
+
+
+def test_extract_code_and_pass_at_k():
+    assert extract_code("a\n```py\nx = 1\n```\nb") == "x = 1\n"
+    assert extract_code("x = 1") == "x = 1"
+    assert pass_at_k(10, 0, 1) == 0.0
+    assert pass_at_k(10, 3, 1) == pytest.approx(0.3)
+    assert pass_at_k(10, 3, 8) == 1.0
+    assert pass_at_k(5, 1, 2) == pytest.approx(0.4)
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from .scorer import Scorer
+from .matching import normalize, normalize_reference
 from ..question import Question
 from ..models import LMAnswer
 
@@ -26,8 +27,8 @@ class TextExactSensitive(Scorer):
     modality: Modality = Modality.text
 
     def _score(self, model_answer: LMAnswer, question: Question, task, debug: bool = False) -> float:
-        ma = self._cleanup(model_answer.answer)
-        qa = self._cleanup(question.answer)
+        ma = normalize(model_answer.answer)
+        qa = normalize_reference(question.answer)
 
         if ma == qa:
             return 1.0
@@ -42,8 +43,8 @@ class TextExactInsensitive(Scorer):
     modality: Modality = Modality.text
 
     def _score(self, model_answer: LMAnswer, question: Question, task, debug: bool = False) -> float:
-        ma = self._cleanup(model_answer.answer).lower()
-        qa = self._cleanup(question.answer).lower()
+        ma = normalize(model_answer.answer, lower=True)
+        qa = normalize_reference(question.answer, lower=True)
 
         if ma == qa:
             return 1.0
@@ -14,6 +14,7 @@
 
 import json
 from string import Template
+from typing import ClassVar
 from pydantic import Field
 from typing_extensions import override
 
@@ -83,6 +84,13 @@ class LLMRater(Scorer):
     rater_prompt_template: Template = DEFAULT_RATER_TEMPLATE
     temperature: float = Field(default=0.0)
     max_tokens: int = Field(default=4096)
+    cpu_bound: ClassVar[bool] = False
+
+    @override
+    def rater_version(self, model_answer: LMAnswer) -> str:
+        # the answer model rates itself when no rater model is set
+        model = self.model if self.model else model_answer.model
+        return model.version_string if model else ''
 
     @override
     def _score(self,
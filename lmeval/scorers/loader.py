@@ -22,6 +22,8 @@ from .multiple_choices import ContainAnswerLetterInsensitive, ContainAnswerLette
 from .exact_text import TextExactInsensitive, TextExactSensitive
 from .regex import TextSensitiveRegex, TextInsensitiveRegex
 from .contain_text import ContainTextSensitive, ContainTextInsensitive
+from .ngram import BleuScorer, MeteorScorer, RougeScorer
+from .code_execution import CodeExecutionScorer
 from .punt_detector import PuntDetector
 from ..enums import ScorerType
 
@@ -48,6 +50,14 @@ _SCORERS = {
     ScorerType.text_regex_sensitive: TextSensitiveRegex,
     ScorerType.text_regex_insensitive: TextInsensitiveRegex,
 
+    # n-gram overlap
+    ScorerType.rouge: RougeScorer,
+    ScorerType.blue: BleuScorer,
+    ScorerType.meteor: MeteorScorer,
+
+    # code execution
+    ScorerType.python_execution: CodeExecutionScorer,
+
     # safety
     ScorerType.punt_detector: PuntDetector,
 
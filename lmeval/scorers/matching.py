@@ -0,0 +1,80 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Text normalization and matching shared by the text scorers."""
+
+from functools import lru_cache
+import re
+
+
+def normalize(text: str, lower: bool = False) -> str:
+    """Collapse whitespace runs (including newlines and tabs) to one space.
+
+    Args:
+        text: Text to normalize.
+        lower: Also lowercase the text.
+    """
+    # split() handles every whitespace character in a single pass
+    text = ' '.join(text.split())
+    return text.lower() if lower else text
+
+
+@lru_cache(maxsize=65536)
+def normalize_reference(text: str, lower: bool = False) -> str:
+    """Cached `normalize()` for the questions answers.
+
+    The same reference is compared to the answers of every model and
+    prompt so it is only normalized once.
+    """
+    return normalize(text, lower)
+
+
+@lru_cache(maxsize=1024)
+def compile_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    "Compiled regular expression, compiled once per (pattern, flags)"
+    return re.compile(pattern, flags)
+
+
+class MultiPatternMatcher:
+    """Find any of several literal patterns in a single scan of the text.
+
+    Patterns are compiled into one alternation, longest first so the
+    longest pattern starting at a position wins.
+    """
+
+    def __init__(self, patterns: list[str], ignore_case: bool = False):
+        """
+        Args:
+            patterns: Literal strings to look for.
+            ignore_case: Match regardless of the case.
+        """
+        if not patterns:
+            raise ValueError("MultiPatternMatcher requires at least one pattern")
+        self.patterns = list(patterns)
+        alternation = '|'.join(re.escape(p) for p in
+                                sorted(set(self.patterns), key=len, reverse=True))
+        self._regex = re.compile(alternation, re.IGNORECASE if ignore_case else 0)
+
+    def search(self, text: str) -> str | None:
+        "First pattern found in the text, None if none is"
+        match = self._regex.search(text)
+        return match.group(0) if match else None
+
+    def contains_any(self, text: str) -> bool:
+        "True if any of the patterns is in the text"
+        return self._regex.search(text) is not None
+
+    def find_all(self, text: str) -> list[str]:
+        "Non overlapping patterns occurrences in order"
+        return self._regex.findall(text)
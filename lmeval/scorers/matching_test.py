@@ -0,0 +1,57 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+
+from lmeval.scorers.matching import (MultiPatternMatcher, compile_pattern,
+                                     normalize, normalize_reference)
+
+
+def _legacy_cleanup(txt):
+    txt = txt.replace('\n', ' ').replace('\r', ' ').replace('\t', ' ')
+    return ' '.join(txt.split()).strip()
+
+
+def test_normalize_matches_legacy_cleanup():
+    rng = random.Random(0)
+    alphabet = ['a', 'B', ' ', '  ', '\n', '\r\n', '\t', '\x0b', '\xa0', 'É']
+    for _ in range(500):
+        text = ''.join(rng.choices(alphabet, k=rng.randint(0, 20)))
+        assert normalize(text) == _legacy_cleanup(text)
+        assert normalize(text, lower=True) == _legacy_cleanup(text).lower()
+    assert normalize_reference(' Paris\n') == 'Paris'
+    assert normalize_reference(' Paris\n', lower=True) == 'paris'
+
+
+def test_compile_pattern_is_cached():
+    assert compile_pattern(r'(\d+)') is compile_pattern(r'(\d+)')
+    assert compile_pattern(r'(\d+)') is not compile_pattern(r'(\d+)', 2)
+
+
+def test_multi_pattern_matcher():
+    words = ["no", "false", "incorrect", "wrong"]
+    matcher = MultiPatternMatcher(words)
+    rng = random.Random(0)
+    vocab = ["it", "is", "not", "false", "wro", "ng", "in", "correct", "yes"]
+    for _ in range(500):
+        text = ' '.join(rng.choices(vocab, k=rng.randint(0, 8)))
+        assert matcher.contains_any(text) == any(w in text for w in words)
+    # longest pattern wins at a given position
+    assert matcher.search("it is incorrect") == "incorrect"
+    assert MultiPatternMatcher(["a.b"]).find_all("a.b axb a.b") == ["a.b"] * 2
+    assert MultiPatternMatcher(["Yes"], ignore_case=True).contains_any("YES")
+    with pytest.raises(ValueError):
+        MultiPatternMatcher([])
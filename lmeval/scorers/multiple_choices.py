@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from .scorer import Scorer
+from .matching import normalize, normalize_reference
 from ..question import Question
 from ..models import LMAnswer
 
@@ -30,11 +31,11 @@ class ContainAnswerLettersInsensitive(Scorer):
         # track mapping for later display
         model_answer.additional_data = question.letter_mapping
 
-        qa = self._cleanup(question.answer_letter).lower().split(',')
+        qa = normalize_reference(question.answer_letter, lower=True).split(',')
         qa_len = len(qa)
         correct = 0
 
-        ma = self._cleanup(model_answer.answer).lower() # don't split this one
+        ma = normalize(model_answer.answer, lower=True) # don't split this one
         ma = ma.replace(' ', '').split(',') # a,b,c -> [a, b, c]
         ma_len = len(ma)
 
@@ -66,8 +67,8 @@ class ContainAnswerLetterInsensitive(Scorer):
         # track mapping for later display
         model_answer.additional_data = question.letter_mapping
 
-        ma = self._cleanup(model_answer.answer).lower()
-        qa = self._cleanup(question.answer_letter).lower()
+        ma = normalize(model_answer.answer, lower=True)
+        qa = normalize_reference(question.answer_letter, lower=True)
 
         if qa and ma and qa in ma[0]:
             return 1.0
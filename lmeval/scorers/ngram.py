@@ -0,0 +1,252 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""N-gram overlap scorers: BLEU, ROUGE-L and METEOR.
+
+Scorers are batch first: texts are tokenized once and encoded with a
+shared vocabulary, then the n-gram counts of all the (answer, reference)
+pairs are computed and clipped in a few numpy passes over flat arrays.
+"""
+
+import re
+
+import numpy as np
+
+from .scorer import Scorer
+from ..question import Question
+from ..models import LMAnswer
+
+from ..enums import ScorerType, Modality
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    "Lowercased word tokens"
+    return _TOKEN_RE.findall(text.lower())
+
+
+def encode(texts: list[str]) -> list[list[int]]:
+    "Tokenize texts into token ids of a vocabulary shared by all the texts"
+    vocab = {}
+    return [[vocab.setdefault(token, len(vocab)) for token in tokenize(text)]
+            for text in texts]
+
+
+def ngram_overlaps(candidates: list[list[int]], references: list[list[int]],
+                   max_n: int) -> list[tuple]:
+    """Clipped n-gram matches of each (candidate, reference) pair.
+
+    N-grams ids are built incrementally from the (n-1)-gram ids so each
+    order only costs a sort of flat integer arrays.
+
+    Returns:
+        For each order from 1 to max_n, arrays of the matches, candidate
+        n-grams and reference n-grams count of each pair.
+    """
+    num_pairs = len(candidates)
+    docs = candidates + references
+    lengths = np.fromiter((len(doc) for doc in docs), dtype=np.int64,
+                          count=len(docs))
+    ids = np.fromiter((t for doc in docs for t in doc), dtype=np.int64,
+                      count=int(lengths.sum()))
+    owner = np.repeat(np.arange(len(docs)), lengths)
+    # candidates and references n-grams of a pair share the same pair index
+    pair_idx = np.where(owner < num_pairs, owner, owner - num_pairs)
+    is_candidate = owner < num_pairs
+    vocab_size = int(ids.max()) + 1 if len(ids) else 1
+
+    results = []
+    grams = ids
+    for n in range(1, max_n + 1):
+        if n > 1:
+            # dense ids of (n-1)-gram followed by a token
+            keys = grams[:len(ids) - n + 1] * vocab_size + ids[n - 1:]
+            _, grams = np.unique(keys, return_inverse=True)
+            grams = grams.ravel()
+        num_windows = max(len(ids) - n + 1, 0)
+        # windows crossing documents boundaries are dropped
+        valid = owner[n - 1:n - 1 + num_windows] == owner[:num_windows]
+        win_pair = pair_idx[:num_windows][valid]
+        win_cand = is_candidate[:num_windows][valid]
+        win_grams = grams[:num_windows][valid]
+        num_grams = int(win_grams.max()) + 1 if len(win_grams) else 1
+        keys = win_pair * num_grams + win_grams
+        cand_keys, cand_counts = np.unique(keys[win_cand], return_counts=True)
+        ref_keys, ref_counts = np.unique(keys[~win_cand], return_counts=True)
+        common, cand_pos, ref_pos = np.intersect1d(cand_keys, ref_keys,
+                                                   assume_unique=True,
+                                                   return_indices=True)
+        matches = np.bincount(common // num_grams,
+                              weights=np.minimum(cand_counts[cand_pos],
+                                                 ref_counts[ref_pos]),
+                              minlength=num_pairs)
+        cand_total = np.bincount(win_pair[win_cand], minlength=num_pairs)
+        ref_total = np.bincount(win_pair[~win_cand], minlength=num_pairs)
+        results.append((matches, cand_total, ref_total))
+        if not len(win_grams):
+            # no longer n-grams either
+            for _ in range(n + 1, max_n + 1):
+                results.append((np.zeros(num_pairs),) * 3)
+            break
+    return results
+
+
+def bleu(candidates: list[list[int]], references: list[list[int]],
+         max_n: int = 4) -> list[float]:
+    """Sentence BLEU of each pair.
+
+    Higher order precisions use add-one smoothing (Lin and Och, 2004) so
+    short answers don't score 0 for lacking 4-grams.
+    """
+    overlaps = ngram_overlaps(candidates, references, max_n)
+    log_precision = np.zeros(len(candidates))
+    for n, (matches, cand_total, _) in enumerate(overlaps, start=1):
+        if n == 1:
+            precision = matches / np.maximum(cand_total, 1)
+        else:
+            precision = (matches + 1) / (cand_total + 1)
+        with np.errstate(divide='ignore'):
+            log_precision += np.log(precision)
+    _, cand_len, ref_len = overlaps[0]
+    brevity = np.where(cand_len >= ref_len, 1.0,
+                       np.exp(1 - ref_len / np.maximum(cand_len, 1)))
+    scores = np.where(cand_len > 0,
+                      brevity * np.exp(log_precision / max_n), 0.0)
+    return scores.tolist()
+
+
+def lcs_length(a: list[int], b: list[int]) -> int:
+    """Longest common subsequence length.
+
+    Bit-parallel algorithm (Allison and Dix, 1986): b positions are bits of
+    an integer so each token of a is processed in a few word operations.
+    """
+    if not a or not b:
+        return 0
+    masks = {}
+    for i, token in enumerate(b):
+        masks[token] = masks.get(token, 0) | (1 << i)
+    full = (1 << len(b)) - 1
+    v = full
+    for token in a:
+        u = v & masks.get(token, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(b) - v.bit_count()
+
+
+def rouge_l(candidates: list[list[int]],
+            references: list[list[int]]) -> list[float]:
+    "ROUGE-L F1 of each pair"
+    scores = []
+    for cand, ref in zip(candidates, references):
+        lcs = lcs_length(cand, ref)
+        if not lcs:
+            scores.append(0.0)
+            continue
+        precision, recall = lcs / len(cand), lcs / len(ref)
+        scores.append(2 * precision * recall / (precision + recall))
+    return scores
+
+
+def _num_chunks(cand: list[int], ref: list[int]) -> int:
+    "Contiguous runs of a greedy left to right exact unigram alignment"
+    positions = {}
+    for i, token in enumerate(ref):
+        positions.setdefault(token, []).append(i)
+    used = {}
+    chunks = 0
+    previous = -2
+    for token in cand:
+        ref_positions = positions.get(token, ())
+        k = used.get(token, 0)
+        if k >= len(ref_positions):
+            previous = -2  # unmatched token
+            continue
+        used[token] = k + 1
+        if ref_positions[k] != previous + 1:
+            chunks += 1
+        previous = ref_positions[k]
+    return chunks
+
+
+def meteor(candidates: list[list[int]],
+           references: list[list[int]]) -> list[float]:
+    """METEOR of each pair using exact unigram matches.
+
+    Stemming and synonym matching are not supported and the alignment is
+    greedy rather than minimizing crossings.
+    """
+    matches, cand_total, ref_total = ngram_overlaps(candidates, references,
+                                                    1)[0]
+    scores = []
+    for i, (cand, ref) in enumerate(zip(candidates, references)):
+        m = matches[i]
+        if not m:
+            scores.append(0.0)
+            continue
+        precision, recall = m / cand_total[i], m / ref_total[i]
+        fmean = 10 * precision * recall / (recall + 9 * precision)
+        penalty = 0.5 * (_num_chunks(cand, ref) / m) ** 3
+        scores.append(float(fmean * (1 - penalty)))
+    return scores
+
+
+class NGramScorer(Scorer):
+    "Base of the n-gram overlap scorers, comparing the answer to question.answer"
+    modality: Modality = Modality.text
+
+    def _metric(self, candidates: list[list[int]],
+                references: list[list[int]]) -> list[float]:
+        raise NotImplementedError
+
+    def _score(self, model_answer: LMAnswer, question: Question, task,
+               debug: bool = False) -> float:
+        return self._batch_score([model_answer], [question], task)[0]
+
+    def _batch_score(self, model_answers: list[LMAnswer],
+                     questions: list[Question], task) -> list[float]:
+        # questions without a reference answer score 0
+        docs = encode([answer.answer or '' for answer in model_answers] +
+                      [question.answer or '' for question in questions])
+        metrics = self._metric(docs[:len(model_answers)],
+                               docs[len(model_answers):])
+        return [float(metric) for metric in metrics]
+
+
+class BleuScorer(NGramScorer):
+    name: str = ScorerType.blue.name
+    description: str = "Sentence BLEU (1 to 4-grams) of the model answer against the real answer"
+    type: ScorerType = ScorerType.blue
+
+    def _metric(self, candidates, references):
+        return bleu(candidates, references)
+
+
+class RougeScorer(NGramScorer):
+    name: str = ScorerType.rouge.name
+    description: str = "ROUGE-L F1 of the model answer against the real answer"
+    type: ScorerType = ScorerType.rouge
+
+    def _metric(self, candidates, references):
+        return rouge_l(candidates, references)
+
+
+class MeteorScorer(NGramScorer):
+    name: str = ScorerType.meteor.name
+    description: str = "METEOR (exact unigram matches) of the model answer against the real answer"
+    type: ScorerType = ScorerType.meteor
+
+    def _metric(self, candidates, references):
+        return meteor(candidates, references)
@@ -0,0 +1,118 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import Counter
+import math
+import random
+
+import pytest
+
+from lmeval import LMAnswer, LMModel, Question, ScorerType
+from lmeval.scorers import get_scorer
+from lmeval.scorers.ngram import bleu, encode, lcs_length, meteor, rouge_l
+
+
+def _naive_bleu(cand, ref, max_n=4):
+    if not cand:
+        return 0.0
+    log_precision = 0
+    for n in range(1, max_n + 1):
+        cand_grams = Counter(tuple(cand[i:i + n]) for i in range(len(cand) - n + 1))
+        ref_grams = Counter(tuple(ref[i:i + n]) for i in range(len(ref) - n + 1))
+        matches = sum(min(c, ref_grams[g]) for g, c in cand_grams.items())
+        total = sum(cand_grams.values())
+        precision = matches / max(total, 1) if n == 1 else (matches + 1) / (total + 1)
+        if not precision:
+            return 0.0
+        log_precision += math.log(precision)
+    brevity = 1 if len(cand) >= len(ref) else math.exp(1 - len(ref) / len(cand))
+    return brevity * math.exp(log_precision / max_n)
+
+
+def _naive_lcs(a, b):
+    table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            table[i + 1][j + 1] = (table[i][j] + 1 if x == y else
+                                   max(table[i][j + 1], table[i + 1][j]))
+    return table[-1][-1]
+
+
+def test_bleu_matches_reference_implementation():
+    rng = random.Random(0)
+    cands = [[rng.randrange(4) for _ in range(rng.randrange(12))] for _ in range(200)]
+    refs = [[rng.randrange(4) for _ in range(rng.randrange(12))] for _ in range(200)]
+    expected = [_naive_bleu(c, r) for c, r in zip(cands, refs)]
+    assert bleu(cands, refs) == pytest.approx(expected)
+
+
+def test_lcs_length():
+    rng = random.Random(0)
+    for _ in range(200):
+        a = [rng.randrange(5) for _ in range(rng.randrange(20))]
+        b = [rng.randrange(5) for _ in range(rng.randrange(20))]
+        assert lcs_length(a, b) == _naive_lcs(a, b)
+
+
+def test_metrics():
+    docs = encode(["the cat is on the mat", "there is a cat on the mat",
+                   "the cat is on the mat", ""])
+    assert bleu([docs[0]], [docs[2]]) == [1.0]
+    assert rouge_l([docs[0]], [docs[1]]) == pytest.approx([2 * 4 / 13])
+    assert meteor([docs[0]], [docs[2]])[0] == pytest.approx(1 - 0.5 / 6 ** 3)
+    assert meteor([docs[0]], [docs[1]])[0] < meteor([docs[0]], [docs[2]])[0]
+    # empty answer
+    assert bleu([docs[3]], [docs[0]]) == [0.0]
+    assert rouge_l([docs[3]], [docs[0]]) == [0.0]
+    assert meteor([docs[3]], [docs[0]]) == [0.0]
+
+
+@pytest.mark.parametrize('scorer_type', [ScorerType.blue, ScorerType.rouge,
+                                         ScorerType.meteor])
+def test_ngram_scorers(scorer_type):
+    scorer = get_scorer(scorer_type)
+    model = LMModel(name='demo', publisher='test', version_string='demo-1.0')
+    question = Question(id=0, question='q', answer='the sky is blue')
+    answer = LMAnswer(answer='The sky is blue.', model=model)
+    assert scorer.score(answer, question, None) == pytest.approx(1.0, abs=0.01)
+    answer = LMAnswer(answer='grass', model=model)
+    assert scorer.score(answer, question, None) == 0.0
+
+    # batch scoring matches single scoring, errors and punts are handled
+    answers = [LMAnswer(answer=text, model=model)
+               for text in ['the sky is red', 'blue sky', 'sky', 'x']]
+    answers[2].iserror = True
+    answers[3].ispunting = True
+    questions = [Question(id=i, question='q', answer='the sky is blue')
+                 for i in range(4)]
+    scores = scorer.batch_score(answers, questions, None)
+    assert scores[2:] == [-1.0, 0.0]
+    assert scores == [scorer.score(a, q, None)
+                      for a, q in zip(answers, questions)]
+    assert scores[0] > scores[1] > 0
+
+
+@pytest.mark.parametrize('scorer_type', [ScorerType.blue, ScorerType.rouge,
+                                         ScorerType.meteor])
+def test_ngram_scorers_without_reference(scorer_type):
+    scorer = get_scorer(scorer_type)
+    model = LMModel(name='demo', publisher='test', version_string='demo-1.0')
+    questions = [Question(id=0, question='q'),
+                 Question(id=1, question='q', answer='the sky is blue')]
+    assert questions[0].answer is None
+    answers = [LMAnswer(answer='the sky is blue', model=model)
+               for _ in questions]
+    scores = scorer.batch_score(answers, questions, None)
+    assert scores[0] == 0.0
+    assert scores[1] == pytest.approx(1.0, abs=0.01)
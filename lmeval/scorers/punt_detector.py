@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import re
+from typing import ClassVar
 from ..template_engine import TemplateEngine
 
 from ..question import Question
@@ -26,6 +27,7 @@ class PuntDetector(Scorer):
     description: str = "return 1.0 if the model in punting"
     type: ScorerType = ScorerType.punt_detector
     modality: Modality = Modality.multimodal
+    cpu_bound: ClassVar[bool] = False
 
     # we need COT for accuracy.
     # some key corner cases:
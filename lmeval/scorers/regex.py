@@ -12,8 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import re
 from .scorer import Scorer
+from .matching import compile_pattern, normalize, normalize_reference
 from ..question import Question
 from ..models import LMAnswer
 from ..enums import ScorerType, Modality
@@ -25,9 +25,9 @@ class TextSensitiveRegex(Scorer):
     modality: Modality = Modality.text
 
     def _score(self, model_answer: LMAnswer, question: Question, task, debug: bool = False) -> float:
-        mdl_answer = self._cleanup(model_answer.answer)
-        answer_match = re.search(self.regex, mdl_answer)
-        qa = self._cleanup(question.answer)
+        mdl_answer = normalize(model_answer.answer)
+        answer_match = compile_pattern(self.regex).search(mdl_answer)
+        qa = normalize_reference(question.answer)
 
         if debug:
             print(answer_match, qa, mdl_answer)
@@ -44,9 +44,9 @@ class TextInsensitiveRegex(Scorer):
     modality: Modality = Modality.text
 
     def _score(self, model_answer: LMAnswer, question: Question, task, debug: bool = False) -> float:
-        mdl_answer = self._cleanup(model_answer.answer).lower()
-        answer_match = re.search(self.regex, mdl_answer)
-        qa = self._cleanup(question.answer).lower()
+        mdl_answer = normalize(model_answer.answer, lower=True)
+        answer_match = compile_pattern(self.regex).search(mdl_answer)
+        qa = normalize_reference(question.answer, lower=True)
 
         if debug:
             print(answer_match, qa, mdl_answer)
@@ -12,13 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import Counter
+from enum import Enum
+from hashlib import blake2b
+import json
+import math
+from string import Template
+from typing import TYPE_CHECKING, ClassVar
 from pydantic import Field
 
 from ..custom_model import CustomModel
+from .matching import normalize
 from ..models import LMModel, LMAnswer
 from ..question import Question
 
-from ..enums import ScorerType, Modality
+from ..enums import ScorerType, Modality, MultiShotStrategy
+
+if TYPE_CHECKING:
+    from .cache import ScoreCache
 
 
 class Scorer(CustomModel):
@@ -31,6 +42,10 @@ class Scorer(CustomModel):
     regex: str = Field(default='')
     model: LMModel | None = Field(default=None)
 
+    # CPU bound scorers can be run in a process pool when rescoring, the
+    # others (model backed, own workers) are run in threads
+    cpu_bound: ClassVar[bool] = True
+
     def _score(self,
                model_answer: LMAnswer,
                question: Question,
@@ -53,14 +68,223 @@ class Scorer(CustomModel):
             return 0.0
         return self._score(model_answer, question, task)
 
+    def batch_score(self, model_answers: list[LMAnswer],
+                    questions: list[Question], task) -> list[float]:
+        """Score several answers at once.
+
+        Errors and punts are scored as in `score()`, the other answers are
+        scored together by `_batch_score()`.
+        """
+        scores = [-1.0 if answer.iserror else 0.0 for answer in model_answers]
+        todo = [idx for idx, answer in enumerate(model_answers)
+                if not answer.iserror and not answer.ispunting]
+        if todo:
+            batch_scores = self._batch_score(
+                [model_answers[idx] for idx in todo],
+                [questions[idx] for idx in todo], task)
+            for idx, score in zip(todo, batch_scores):
+                scores[idx] = score
+        return scores
+
+    def _batch_score(self, model_answers: list[LMAnswer],
+                     questions: list[Question], task) -> list[float]:
+        """Score answers that are neither errors nor punts.
+
+        Scorers that can vectorize their computation override it, the
+        default scores each answer on its own.
+        """
+        return [self._score(answer, question, task)
+                for answer, question in zip(model_answers, questions)]
+
+    def version_hash(self) -> str:
+        """Hash of the scorer configuration, including the rater model version.
+
+        Changes whenever a field changing how answers are scored changes.
+        """
+        config = self.model_dump(exclude={'name', 'description', 'model'})
+        model_version = self.model.version_string if self.model else ''
+        data = json.dumps([type(self).__name__, config, model_version],
+                          sort_keys=True, default=_stable_json)
+        return blake2b(data.encode(), digest_size=8).hexdigest()
+
+    def rater_version(self, model_answer: LMAnswer) -> str:
+        "Version of the model rating the answer, empty when there is none"
+        return self.model.version_string if self.model else ''
+
     def _cleanup(self, txt: str) -> str:
         "Clean up text for comparison"
-        txt = txt.replace('\n', ' ').replace('\r', ' ').replace('\t', ' ')
-        txt = ' '.join(txt.split()).strip()  # remove multiple spaces
-        return txt
+        return normalize(txt)
 
     def __str__(self) -> str:
         return self.name
 
     def __repr__(self) -> str:
         return str(self)
+
+
+def _stable_json(obj):
+    "Deterministic JSON fallback for scorers configuration fields"
+    if isinstance(obj, Template):
+        return obj.template
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
+
+
+def answer_hash(answer: LMAnswer) -> str:
+    "Hash of what scorers see of an answer: its text or its samples"
+    # the answer text of multi-samples answers is set by the scoring
+    texts = answer.samples if len(answer.samples) > 1 else [answer.answer]
+    h = blake2b(digest_size=8)
+    for text in texts:
+        h.update(text.encode('utf-8', 'replace'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+def question_hash(question: Question) -> str:
+    "Hash of the question fields scorers compare answers to"
+    data = json.dumps([question.question, question.answer,
+                       question.additional_answers, question.answer_letter,
+                       question.metadata], sort_keys=True, default=str)
+    return blake2b(data.encode(), digest_size=8).hexdigest()
+
+
+def scoring_key(version: str, answer: LMAnswer, question: Question) -> str:
+    """Provenance of a score: scorer version, answer and question hashes.
+
+    Args:
+        version: `Scorer.version_hash()` of the scorer.
+        answer: Scored answer.
+        question: Question of the answer.
+    """
+    return f"{version}:{answer_hash(answer)}:{question_hash(question)}"
+
+
+def provenance_slot(scorer: Scorer, main: bool = False) -> str:
+    "Key of `LMAnswer.score_provenance` recording where a score comes from"
+    if main:
+        return 'score'
+    return scorer.type.value if isinstance(scorer.type, Enum) else scorer.type
+
+
+def cached_batch_score(scorer: Scorer, answers: list[LMAnswer],
+                       questions: list[Question], task,
+                       cache: "ScoreCache | None" = None) -> list[float]:
+    "`Scorer.batch_score()` only scoring the answers missing from the cache"
+    if cache is None or not cache.caches(scorer):
+        return scorer.batch_score(answers, questions, task)
+    scores = cache.get_many(scorer, answers, questions)
+    misses = [i for i, score in enumerate(scores) if score is None]
+    if misses:
+        miss_answers = [answers[i] for i in misses]
+        miss_questions = [questions[i] for i in misses]
+        miss_scores = scorer.batch_score(miss_answers, miss_questions, task)
+        cache.put_many(scorer, miss_answers, miss_questions, miss_scores)
+        for i, score in zip(misses, miss_scores):
+            scores[i] = score
+    return scores
+
+
+def score_answers(scorer: Scorer, answers: list[LMAnswer],
+                  questions: list[Question], task,
+                  cache: "ScoreCache | None" = None) -> list[float]:
+    """Batch score answers, aggregating the samples of multi-samples answers.
+
+    Each sample is scored and the answers with several samples get their
+    `sample_scores` and `sample_raw_data` set, and their `answer` and
+    `score_raw_data` set to the sample the task scoring strategy keeps.
+
+    Args:
+        scorer: Scorer to use.
+        answers: Answers to score.
+        questions: Question of each answer.
+        task: Task of the questions.
+        cache: Reuse and store the scores of the cached scorers there.
+    """
+    batch_answers, batch_questions, owners = [], [], []
+    for idx, (answer, question) in enumerate(zip(answers, questions)):
+        if len(answer.samples) > 1:
+            for sample in answer.samples:
+                # own raw data so scorers don't mix up the samples details
+                batch_answers.append(answer.model_copy(update={
+                    'answer': sample,
+                    'score_raw_data': dict(answer.score_raw_data)}))
+                batch_questions.append(question)
+                owners.append(idx)
+        else:
+            batch_answers.append(answer)
+            batch_questions.append(question)
+            owners.append(idx)
+    batch_scores = cached_batch_score(scorer, batch_answers, batch_questions,
+                                      task, cache)
+
+    per_answer = [[] for _ in answers]
+    per_answer_raw = [[] for _ in answers]
+    for idx, score, scored in zip(owners, batch_scores, batch_answers):
+        per_answer[idx].append(score)
+        per_answer_raw[idx].append(scored.score_raw_data)
+    scores = []
+    for answer, sample_scores, raw_data in zip(answers, per_answer,
+                                               per_answer_raw):
+        if len(answer.samples) > 1:
+            answer.sample_scores = sample_scores
+            answer.sample_raw_data = raw_data
+            score, best = aggregate_samples(
+                answer.samples, sample_scores,
+                task.multi_short_scoring_strategy, k=task.pass_k)
+            # the answer is the sample the score comes from
+            answer.answer = answer.samples[best]
+            answer.score_raw_data = raw_data[best]
+            scores.append(score)
+        else:
+            scores.append(sample_scores[0])
+    return scores
+
+
+def pass_at_k(n: int, c: int, k: int) -> float:
+    """Unbiased pass@k estimator (Chen et al., 2021).
+
+    Args:
+        n: Number of samples.
+        c: Number of correct samples.
+        k: Number of attempts allowed.
+    """
+    if n - c < k:
+        return 1.0
+    return 1.0 - math.prod(1.0 - k / i for i in range(n - c + 1, n + 1))
+
+
+def aggregate_samples(samples: list[str], scores: list[float],
+                      strategy: MultiShotStrategy | str,
+                      k: int = 1) -> tuple[float, int]:
+    """Aggregate the scores of the samples generated for a question.
+
+    Args:
+        samples: Generated samples.
+        scores: Score of each sample.
+        strategy: `single` keeps the first sample, `average` averages the
+        scores, `max` keeps the best sample (pass@k for binary scorers) and
+        `majority` keeps the most frequent answer (self-consistency) and
+        `pass_at_k` estimates pass@k, a sample is correct when it scores 1.
+        k: Number of attempts of the `pass_at_k` strategy.
+
+    Returns:
+        The aggregated score and the index of the sample representing it.
+    """
+    strategy = MultiShotStrategy(strategy)
+    if strategy == MultiShotStrategy.average:
+        return sum(scores) / len(scores), 0
+    if strategy == MultiShotStrategy.max:
+        best = max(range(len(scores)), key=scores.__getitem__)
+        return scores[best], best
+    if strategy == MultiShotStrategy.majority:
+        normalized = [' '.join(sample.split()).lower() for sample in samples]
+        majority = Counter(normalized).most_common(1)[0][0]
+        idx = normalized.index(majority)
+        return scores[idx], idx
+    if strategy == MultiShotStrategy.pass_at_k:
+        correct = [idx for idx, score in enumerate(scores) if score >= 1.0]
+        return (pass_at_k(len(scores), len(correct), k),
+                correct[0] if correct else 0)
+    return scores[0], 0
@@ -13,7 +13,6 @@
 # limitations under the License.
 
 from typing_extensions import Unpack
-from litellm import ConfigDict
 from pydantic import Field
 from typing import List
 
@@ -35,6 +34,7 @@ class Task(CustomModel):
     # scorers
     num_shots: int = Field(default=1)  # how many answers
     multi_short_scoring_strategy: MultiShotStrategy = Field(default=MultiShotStrategy.single)
+    pass_k: int = Field(default=1)  # k of the pass_at_k strategy
     scorer: Scorer
     additional_scorers: List[Scorer] = Field(default_factory=list)
 
@@ -0,0 +1,158 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per stage timing of the evaluation of each question."""
+
+from contextlib import contextmanager
+import hashlib
+import json
+import time
+from typing import Any
+
+from pydantic import Field
+
+from lmeval.custom_model import CustomModel
+from lmeval.enums import SpanType
+
+
+class Span(CustomModel):
+    "Timing of an evaluation stage, times are client side epoch seconds"
+    name: SpanType | str
+    start: float
+    end: float
+    attributes: dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@contextmanager
+def trace_span(spans: list[Span], name: SpanType | str, **attributes):
+    """Time the enclosed block and append the resulting span to spans.
+
+    Args:
+        spans: List receiving the span.
+        name: Stage name.
+        attributes: Additional attributes stored with the span.
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        spans.append(Span(name=name, start=start, end=time.time(),
+                          attributes=attributes))
+
+
+def spans_summary(spans: list[Span]) -> dict[str, float]:
+    "Total duration per stage"
+    summary = {}
+    for span in spans:
+        summary[span.name] = summary.get(span.name, 0.0) + span.duration
+    return summary
+
+
+def _hex_id(key: str, size: int) -> str:
+    return hashlib.blake2b(key.encode(), digest_size=size).hexdigest()
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+
+def _otlp_span(trace_id: str, span_id: str, parent_id: str, name: str,
+               start: float, end: float, attributes: dict) -> dict:
+    return {
+        "traceId": trace_id,
+        "spanId": span_id,
+        "parentSpanId": parent_id,
+        "name": name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(int(start * 1e9)),
+        "endTimeUnixNano": str(int(end * 1e9)),
+        "attributes": _otlp_attributes(attributes),
+    }
+
+
+def benchmark_to_otlp(benchmark) -> dict:
+    """Convert the answers spans of a benchmark to OpenTelemetry JSON.
+
+    Each answer is a trace made of a root `evaluation` span enclosing the
+    stages spans. The output follows the OTLP/JSON `ExportTraceServiceRequest`
+    format so it can be sent to a collector or loaded by tracing tools.
+
+    Args:
+        benchmark: Benchmark to export the traces from.
+
+    Returns:
+        OTLP JSON payload.
+    """
+    otlp_spans = []
+    for category in benchmark.categories:
+        for task in category.tasks:
+            for question in task.questions:
+                for prompt_ver, answers in question.lm_answers.items():
+                    for model_ver, answer in answers.items():
+                        if not answer.spans:
+                            continue
+                        key = f"{category.name}/{task.name}/{question.id}/{prompt_ver}/{model_ver}"
+                        trace_id = _hex_id(key, 16)
+                        root_id = _hex_id(key + "/evaluation", 8)
+                        attributes = {"lmeval.category": category.name,
+                                      "lmeval.task": task.name,
+                                      "lmeval.question_id": question.id,
+                                      "lmeval.prompt": prompt_ver,
+                                      "lmeval.model": model_ver,
+                                      "lmeval.error": answer.iserror,
+                                      "lmeval.score": answer.score}
+                        otlp_spans.append(_otlp_span(
+                            trace_id, root_id, "", "evaluation",
+                            min(s.start for s in answer.spans),
+                            max(s.end for s in answer.spans), attributes))
+                        for idx, span in enumerate(answer.spans):
+                            span_id = _hex_id(f"{key}/{idx}/{span.name}", 8)
+                            otlp_spans.append(_otlp_span(
+                                trace_id, span_id, root_id, span.name,
+                                span.start, span.end, span.attributes))
+
+    return {
+        "resourceSpans": [{
+            "resource": {
+                "attributes": _otlp_attributes({
+                    "service.name": "lmeval",
+                    "lmeval.benchmark": benchmark.name
+                })
+            },
+            "scopeSpans": [{
+                "scope": {"name": "lmeval"},
+                "spans": otlp_spans
+            }]
+        }]
+    }
+
+
+def export_otlp(benchmark, path: str) -> None:
+    "Write the benchmark traces as OpenTelemetry JSON to path"
+    with open(path, "w") as f:
+        json.dump(benchmark_to_otlp(benchmark), f)
@@ -0,0 +1,67 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from litellm import ModelResponse
+
+from lmeval import Evaluator
+from lmeval.enums import SpanType
+from lmeval.fixtures import make_benchmark
+from lmeval.models.litellm import LiteLLMModel
+from lmeval.models.mock_model import MockModel
+from lmeval.prompts import QuestionOnlyPrompt
+from lmeval.tracing import benchmark_to_otlp, spans_summary
+
+
+def test_execute_records_spans():
+    benchmark = make_benchmark(3)
+    prompt = QuestionOnlyPrompt()
+    model = MockModel(model_version='mock-1', default_response='a')
+    evaluator = Evaluator(benchmark)
+    evaluator.plan(model, prompt, display_report=False)
+    evaluator.execute()
+
+    question = benchmark.categories[0].tasks[0].questions[0]
+    answer = question.lm_answers[prompt.version_string()][model.version_string]
+    names = [span.name for span in answer.spans]
+    assert names == [SpanType.plan.value, SpanType.queue.value,
+                     SpanType.render.value, SpanType.scoring.value,
+                     SpanType.persist.value]
+    for span in answer.spans:
+        assert span.end >= span.start
+    assert set(spans_summary(answer.spans)) == set(names)
+
+    otlp = benchmark_to_otlp(benchmark)
+    spans = otlp['resourceSpans'][0]['scopeSpans'][0]['spans']
+    # one root span per answer plus the stages
+    assert len(spans) == 3 * (len(names) + 1)
+    roots = [s for s in spans if not s['parentSpanId']]
+    assert len(roots) == 3
+    assert all(len(s['traceId']) == 32 and len(s['spanId']) == 16
+               for s in spans)
+
+
+def test_litellm_client_side_timing():
+    model = LiteLLMModel(model_version='test', litellm_model='openai/test',
+                         publisher='test', base_url='http://localhost')
+    resp = ModelResponse(choices=[{"message": {"content": "hi",
+                                               "role": "assistant"}}])
+    # server clock far in the past must not impact the generation time
+    resp.created = 0
+    start = time.time()
+    answer = model._make_answer(resp, "prompt", timing=(start, start + 1.5))
+    assert answer.steps[0].execution_time == 1.5
+    names = [span.name for span in answer.spans]
+    assert names == [SpanType.network.value, SpanType.parse.value]